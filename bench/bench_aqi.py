@@ -0,0 +1,51 @@
+"""
+Benchmark for AQI conversion
+
+Measures converting a sweep of PM2.5 readings to AQI with the legacy
+purpleair.aqiFromPM, AqiScale.aqi and AqiScale.aqi_many, and choosing the
+colors of a sweep of AQI values with purpleair.aqiColor.
+
+Run from the project root with:
+    python bench/bench_aqi.py
+"""
+
+from array import array
+
+import benchlib
+
+benchlib.setup_paths()
+
+import purpleair
+from aqiscale import PM25_2012
+
+SAMPLES = 10000
+
+def main():
+    readings = array('f', [(i * 7919 % 5000) / 10.0 for i in range(SAMPLES)])
+    values = [i * 7919 % 600 for i in range(SAMPLES)]
+    out = array('h', bytes(2 * SAMPLES))
+
+    def legacy():
+        for v in readings:
+            purpleair.aqiFromPM(v)
+
+    def scalar():
+        for v in readings:
+            PM25_2012.aqi(v)
+
+    def colors():
+        for v in values:
+            purpleair.aqiColor(v)
+
+    results = benchlib.run(f"AQI over {SAMPLES} readings (per sweep)", [
+        ("purpleair.aqiFromPM", legacy),
+        ("AqiScale.aqi", scalar),
+        ("AqiScale.aqi_many", lambda: PM25_2012.aqi_many(readings, out)),
+        ("purpleair.aqiColor", colors),
+    ], number=5)
+    for name, us, _, _ in results:
+        print(f"{name:36s} {us * 1000 / SAMPLES:10.3f} ns/sample")
+    return results
+
+if __name__ == "__main__":
+    main()
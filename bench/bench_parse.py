@@ -0,0 +1,84 @@
+"""
+Benchmark for sensor response parsing
+
+Parses a recorded local sensor payload (example-local.json) and API shaped
+responses with json.loads and with the streaming FieldExtractor, fed in the
+chunk size HttpConnection reads.
+
+The API responses are built here from the documented response layout, as no
+recorded API payload is kept in the repository.
+
+Run from the project root with:
+    python bench/bench_parse.py
+"""
+
+import json
+import os
+
+import benchlib
+
+benchlib.setup_paths()
+
+from jsonfields import FieldExtractor
+from purpleair import HttpConnection, RESPONSE_KEYS, decode_sensor_batch
+
+FIELDS = ["pm2.5", "last_seen"]
+
+SENSOR_FIELDS = {
+    "sensor_index": 12345, "last_modified": 1693526400, "date_created": 1600000000,
+    "last_seen": 1756695878, "private": 0, "is_owner": 0, "name": "PurpleAir-126a",
+    "location_type": 0, "model": "PA-II", "hardware": "2.0+BME280+PMSX003-B+PMSX003-A",
+    "led_brightness": 35, "firmware_version": "7.04", "rssi": -58, "uptime": 11033,
+    "pa_latency": 312, "memory": 15600, "position_rating": 5, "latitude": 45.360802,
+    "longitude": -121.934097, "altitude": 2150, "channel_state": 3, "channel_flags": 0,
+    "confidence": 100, "humidity": 42, "temperature": 78, "pressure": 964.25,
+    "pm1.0": 1.2, "pm2.5": 2.3, "pm2.5_alt": 2.1, "pm10.0": 3.4,
+    "stats": {"pm2.5": 2.3, "pm2.5_10minute": 2.4, "pm2.5_30minute": 2.5,
+              "pm2.5_60minute": 2.6, "pm2.5_6hour": 3.1, "pm2.5_24hour": 3.9,
+              "pm2.5_1week": 4.2, "time_stamp": 1756695878},
+}
+
+def api_sensor_payload():
+    return json.dumps({
+        "api_version": "V1.0.11-0.0.49", "time_stamp": 1756695900,
+        "data_time_stamp": 1756695878, "sensor": SENSOR_FIELDS,
+    }).encode()
+
+def api_batch_payload(sensors=20):
+    return json.dumps({
+        "api_version": "V1.0.11-0.0.49", "time_stamp": 1756695900,
+        "data_time_stamp": 1756695878, "max_age": 604800,
+        "fields": ["sensor_index", "last_seen", "pm2.5"],
+        "data": [[1000 + i, 1756695800 + i, 2.0 + i / 10] for i in range(sensors)],
+    }).encode()
+
+def feed_chunks(extractor, payload, size=HttpConnection.CHUNK_SIZE):
+    view = memoryview(payload)
+    for i in range(0, len(payload), size):
+        extractor.feed(view[i:i + size])
+
+def main():
+    with open(os.path.join(benchlib.ROOT, "example-local.json"), "rb") as f:
+        local = f.read()
+    sensor = api_sensor_payload()
+    batch = api_batch_payload()
+    local_extractor = FieldExtractor(["DateTime", "pm2_5_atm", "pm2_5_atm_b"])
+    sensor_extractor = FieldExtractor(FIELDS + RESPONSE_KEYS)
+
+    def stream(extractor, payload):
+        def parse():
+            extractor.reset()
+            feed_chunks(extractor, payload)
+        return parse
+
+    print(f"Payloads: local {len(local)} B, sensor {len(sensor)} B, batch {len(batch)} B\n")
+    return benchlib.run("Response parsing", [
+        ("json.loads local", lambda: json.loads(local)),
+        ("FieldExtractor local", stream(local_extractor, local)),
+        ("json.loads sensor", lambda: json.loads(sensor)),
+        ("FieldExtractor sensor", stream(sensor_extractor, sensor)),
+        ("decode_sensor_batch x20", lambda: decode_sensor_batch(json.loads(batch))),
+    ], number=200)
+
+if __name__ == "__main__":
+    main()
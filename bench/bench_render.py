@@ -0,0 +1,72 @@
+"""
+Benchmark for drawing and rendering
+
+Measures text drawing with a pixelfonts font straight onto PixelKit and
+through a FrameBuffer, the Wi-Fi logo, pixel writes, LED rendering and
+layer composition.
+
+Run from the project root with:
+    python bench/bench_render.py
+"""
+
+import benchlib
+
+benchlib.setup_paths()
+
+import PixelKit as kit
+import wifi
+from compositor import Compositor, Layer
+from framebuffer import FrameBuffer
+from pixelfonts import Font4x7
+
+COLOR = (0x10, 0x20, 0x30)
+
+def main():
+    font = Font4x7(kit.WIDTH, kit.HEIGHT, kit.set_pixel)
+    fb = FrameBuffer(kit.WIDTH, kit.HEIGHT, kit)
+    fb_font = Font4x7(kit.WIDTH, kit.HEIGHT, fb.pixel)
+
+    def set_all_pixels():
+        for y in range(kit.HEIGHT):
+            for x in range(kit.WIDTH):
+                kit.set_pixel(x, y, COLOR)
+
+    def render_changed():
+        kit.np.buf[0] ^= 1
+        kit.render()
+
+    def show_frame():
+        fb.clear()
+        fb.text(fb_font, "123", 0, 0, COLOR)
+        fb.show()
+
+    value = Layer(kit.WIDTH, kit.HEIGHT)
+    status = Layer(1, 1, kit.WIDTH - 1, 0)
+    compositor = Compositor(fb, (value, status))
+
+    def compose_text():
+        value.clear()
+        value.text(fb_font, "123", 0, 0, COLOR)
+        compositor.compose()
+
+    def compose_status():
+        status.clear()
+        status.pixel(0, 0, COLOR)
+        compositor.compose()
+
+    return benchlib.run("Drawing and rendering", [
+        ("BaseFont.text -> PixelKit", lambda: font.text("888", 0, 0, COLOR)),
+        ("BaseFont.text clipped", lambda: font.text("888", -2, 2, COLOR)),
+        ("FrameBuffer.text", lambda: fb.text(fb_font, "888", 0, 0, COLOR)),
+        ("wifi.draw_logo -> PixelKit", lambda: wifi.draw_logo(3, 0, kit.set_pixel, COLOR)),
+        ("FrameBuffer.blit logo", lambda: fb.blit(wifi.LOGO, 3, 0, COLOR)),
+        ("PixelKit.set_pixel x128", set_all_pixels),
+        ("PixelKit.render unchanged", kit.render),
+        ("PixelKit.render changed", render_changed),
+        ("frame: clear, text, show", show_frame),
+        ("compose: value layer", compose_text),
+        ("compose: status pixel", compose_status),
+    ])
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""
+Helpers for the host-side benchmarks
+
+Each benchmark is a function called many times. `measure` reports the best
+time per call and, traced separately with tracemalloc, the memory a single
+call allocates: `peak` is the most it had allocated at once (transient
+objects included) and `kept` is what was still allocated when it returned.
+
+The benchmarks run on CPython, so absolute times say nothing about the
+ESP32; compare them between revisions. Allocations track the device more
+closely, since every CPython allocation in these paths is an object the
+device would allocate as well.
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+def setup_paths():
+    """Make lib/ and the MicroPython mocks importable, and register the mocks"""
+    for path in (os.path.join(ROOT, 'lib'), os.path.join(ROOT, 'tests', 'mocks')):
+        if path not in sys.path:
+            sys.path.insert(0, path)
+    for name in ('machine', 'neopixel', 'network', 'urequests', 'config'):
+        sys.modules[name] = __import__(name)
+
+def measure(function, number=1000, repeat=5):
+    """
+    Time and trace the allocations of `function`.
+
+    Args:
+        function: Called without arguments
+        number (int): Calls per timed run
+        repeat (int): Timed runs, the best one is reported
+
+    Returns:
+        tuple: (us per call, peak bytes per call, kept bytes per call)
+    """
+    function()  # Warm up caches (glyph tables, metrics) outside the measurement
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        function()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return best * 1e6 / number, peak - before, current - before
+
+def run(title, cases, number=1000):
+    """
+    Measure and print a table of benchmark cases.
+
+    Args:
+        title (str): Heading
+        cases (list): (name, function) pairs
+        number (int): Calls per timed run
+
+    Returns:
+        list: (name, us, peak, kept) for each case
+    """
+    results = []
+    print(title)
+    print(f"{'':36s} {'us/call':>10s} {'peak B':>8s} {'kept B':>8s}")
+    for name, function in cases:
+        us, peak, kept = measure(function, number)
+        results.append((name, us, peak, kept))
+        print(f"{name:36s} {us:10.2f} {peak:8d} {kept:8d}")
+    print()
+    return results
@@ -0,0 +1,15 @@
+"""
+Run every host-side benchmark
+
+Run from the project root with:
+    python bench/run_all.py
+"""
+
+import bench_aqi
+import bench_parse
+import bench_render
+
+if __name__ == "__main__":
+    bench_render.main()
+    bench_aqi.main()
+    bench_parse.main()
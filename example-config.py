@@ -3,5 +3,35 @@ CONFIG = {
     'ssid': 'YourNetworkName',
     'psk': 'YourNetworkPassword',
     'api_key': 'PURPLEAIR-API-KEY',
+    # One sensor ID, or a list of IDs to show the average of nearby sensors
     'sensor_id': '123456',
+    # Optional: fixed IP settings (ip, netmask, gateway, dns) instead of DHCP
+    # 'static_ip': ('192.168.1.60', '255.255.255.0', '192.168.1.1', '192.168.1.1'),
+    # Optional: reuse the last DHCP lease when reconnecting to a known access
+    # point, skipping DHCP (falls back to DHCP if the connection fails)
+    # 'reuse_lease': True,
+    # Optional: IP address of the sensor, to poll it directly on the local
+    # network instead of through the PurpleAir API
+    # 'sensor_ip': '192.168.1.50',
+    # Optional: API points that may be spent per day, polls are spaced out to
+    # stay within it, and the estimated cost of one poll
+    # 'api_points_per_day': 20000,
+    # 'api_points_per_poll': 2,
+    # Optional: AQI breakpoints, one of 'pm2.5' (EPA 2012, default) or
+    # 'pm2.5_2024' (EPA 2024 revision)
+    # 'aqi_scale': 'pm2.5_2024',
+    # Optional: keep every reading on flash, so the NowCast survives a reboot
+    # (also requests the A/B channels, humidity and temperature)
+    # 'history': True,
+    # Optional: hours shown by the trend view (joystick click)
+    # 'trend_hours': 8,
+    # Optional: frame period in milliseconds, shorter makes fades and
+    # scrolling smoother
+    # 'frame_ms': 100,
+    # Optional: how often the brightness dial is sampled, in milliseconds
+    # 'dial_period_ms': 100,
+    # Optional: light sleep between frames and polls, with Wi-Fi modem sleep
+    # 'power_save': True,
+    # Optional: record hot path timings, printed after every poll
+    # 'instrument': True,
 }
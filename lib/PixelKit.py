@@ -4,6 +4,7 @@ Kano PixelKit.py v1.0
 
 from machine import Pin, ADC
 from neopixel import NeoPixel
+import instrument
 
 # Hardware information:
 # Pin numbers for each hardware connected to the PixelKit ESP32
@@ -53,7 +54,8 @@ is_pressing_click = False
 is_pressing_a = False
 is_pressing_b = False
 
-# Group all the other functions to check the hardware
+# Group all the other functions to check the hardware. This polls every pin,
+# see `controls.Controls` for interrupt-driven events instead
 def check_controls():
     check_joystick()
     check_buttons()
@@ -119,7 +121,7 @@ def check_dial():
     global dial_value
     newValue = dial.read()
     if newValue != dial_value:
-        dial_value = dial.read()
+        dial_value = newValue
         on_dial(dial_value)
 
 # Called when those hardware change values
@@ -162,8 +164,48 @@ def set_background(color=[10,10,0]):
 def clear():
     set_background([0, 0, 0])
 
+# Copy of the last frame sent to the hardware, so `render` can skip writing a
+# frame that is already on the LEDs
+last_frame = bytearray(len(np.buf))
+has_rendered = False
+render_writes = 0
+render_skips = 0
+render_timer = instrument.timer("kit.render")
+
 # Send the "buffer" (`np`) values to the hardware. This operation is slower
 # since it requires to send the information to the actual hardware and should be
-# called as little as possible.
-def render():
+# called as little as possible. Frames identical to the last one written are
+# skipped unless `force` is set. Returns True if the LEDs were written. Timed by
+# the `kit.render` timer when instrumentation is enabled.
+def render(force=False):
+    global has_rendered
+    global render_writes
+    global render_skips
+    start = render_timer.start()
+    if has_rendered and not force and np.buf == last_frame:
+        render_skips += 1
+        render_timer.stop(start)
+        return False
+    last_frame[:] = np.buf
     np.write()
+    has_rendered = True
+    render_writes += 1
+    render_timer.stop(start)
+    return True
+
+# Bulk copy a whole GRB frame (such as `FrameBuffer.buf`) into the "buffer"
+# (`np`) and render it. This lets a FrameBuffer use this module as its backend.
+def write(buf):
+    np.buf[:] = buf
+    return render()
+
+# Number of frames written to the hardware and skipped as unchanged since boot
+# (or the last `reset_render_stats`)
+def render_stats():
+    return (render_writes, render_skips)
+
+def reset_render_stats():
+    global render_writes
+    global render_skips
+    render_writes = 0
+    render_skips = 0
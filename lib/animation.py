@@ -0,0 +1,181 @@
+"""
+Frame timing, cross-fades and scrolling text
+
+Governor paces frames on a fixed time grid: when a frame runs late, the
+slots it overran are dropped rather than drawn back to back, so the frame
+rate never drifts. Animations are driven by ticks_ms rather than by frame
+counts, so they keep their speed when frames are dropped.
+
+Text is pre-rendered once into a strip of column bitmasks (the format
+FrameBuffer.blit takes), so a scrolling frame is a single clipped blit of
+the visible columns and a cross-fade is three blits of masks combined from
+two strips.
+"""
+
+from utils import ticks_add, ticks_diff
+
+# Transition levels run from 0 (start) to FULL (done)
+FULL = 256
+
+class Governor:
+    """Fixed-timestep frame clock that drops frames instead of drifting"""
+
+    def __init__(self, frame_ms, now):
+        """
+        Args:
+            frame_ms (int): Frame period
+            now (int): ticks_ms of the first frame
+        """
+        self.frame_ms = frame_ms
+        self.next_frame = now
+        self.frames = 0
+        self.dropped = 0
+
+    def wait_ms(self, now):
+        """
+        Advance to the next frame slot after a frame was drawn.
+
+        Args:
+            now (int): ticks_ms at the end of the frame
+
+        Returns:
+            int: Time until the next frame; slots already passed are dropped
+        """
+        self.frames += 1
+        next_frame = ticks_add(self.next_frame, self.frame_ms)
+        late = ticks_diff(now, next_frame)
+        if late > 0:
+            missed = (late + self.frame_ms - 1) // self.frame_ms
+            self.dropped += missed
+            next_frame = ticks_add(next_frame, missed * self.frame_ms)
+        self.next_frame = next_frame
+        return ticks_diff(next_frame, now)
+
+class Transition:
+    """Progress of a timed transition"""
+
+    def __init__(self, duration_ms):
+        """
+        Args:
+            duration_ms (int): Length of the transition
+        """
+        self.duration_ms = duration_ms
+        self.active = False
+        self._start = 0
+
+    def start(self, now):
+        self.active = True
+        self._start = now
+
+    def level(self, now):
+        """
+        Return the progress at `now`, from 0 to FULL.
+
+        The transition stops being active once it reaches FULL.
+        """
+        if not self.active:
+            return FULL
+        elapsed = ticks_diff(now, self._start)
+        if elapsed >= self.duration_ms or self.duration_ms <= 0:
+            self.active = False
+            return FULL
+        return max(elapsed, 0) * FULL // self.duration_ms
+
+def blend(a, b, level, out):
+    """
+    Mix two colors into a preallocated buffer.
+
+    Args:
+        a: (r, g, b) color at level 0
+        b: (r, g, b) color at level FULL, None for black
+        level (int): Mix from 0 to FULL
+        out (bytearray): Receives the mixed (r, g, b) color
+
+    Returns:
+        bytearray: out
+    """
+    inverse = FULL - level
+    if b is None:
+        out[0] = a[0] * inverse >> 8
+        out[1] = a[1] * inverse >> 8
+        out[2] = a[2] * inverse >> 8
+    else:
+        out[0] = (a[0] * inverse + b[0] * level) >> 8
+        out[1] = (a[1] * inverse + b[1] * level) >> 8
+        out[2] = (a[2] * inverse + b[2] * level) >> 8
+    return out
+
+def render_strip(font, text, out=None, missing=None):
+    """
+    Pre-render text into one strip of column bitmasks.
+
+    Glyphs are placed like FrameBuffer.text places them, each followed by a
+    blank column.
+
+    Args:
+        font: pixelfonts font
+        text (str): Text to render
+        out (bytearray): Optional buffer of at least len(text) * (font.WIDTH + 1)
+            bytes to render into, cleared first
+        missing (str): Character drawn for characters not in the font, None
+            to raise instead
+
+    Returns:
+        bytearray: The strip
+
+    Raises:
+        ValueError: If a character is not in the font and missing is None
+    """
+    advance = font.WIDTH + 1
+    if out is None:
+        out = bytearray(len(text) * advance)
+    else:
+        for i in range(len(out)):
+            out[i] = 0
+    x = 0
+    for char in text:
+        try:
+            glyph = font.glyph(char)
+        except ValueError:
+            if missing is None:
+                raise
+            glyph = font.glyph(missing)
+        for column in glyph:
+            out[x] = column
+            x += 1
+        x += advance - len(glyph)
+    return out
+
+class Scroller:
+    """Strip scrolling right to left across a window, entering from the right edge"""
+
+    def __init__(self, strip, width, speed=20):
+        """
+        Args:
+            strip (bytearray): Column bitmasks, see render_strip
+            width (int): Window width
+            speed (int): Pixels per second
+        """
+        self.strip = strip
+        self.width = width
+        self.speed = speed
+        self._start = 0
+
+    def start(self, now):
+        self._start = now
+
+    def offset(self, now):
+        """Return the strip column at the left edge of the window, negative before it arrives"""
+        return ticks_diff(now, self._start) * self.speed // 1000 - self.width
+
+    def done(self, now):
+        """Return True once the strip has left the window"""
+        return self.offset(now) >= len(self.strip)
+
+    def draw(self, fb, x, y, color, now):
+        """Draw the window's part of the strip with its left edge at (x, y)"""
+        offset = self.offset(now)
+        if offset < 0:
+            fb.blit(self.strip, x - offset, y, color, 0, min(self.width + offset, len(self.strip)))
+        else:
+            fb.blit(self.strip, x, y, color, offset, min(offset + self.width, len(self.strip)))
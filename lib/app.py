@@ -0,0 +1,259 @@
+"""
+Application tasks
+
+The display runs as a set of asyncio tasks sharing one State object:
+poll_task fetches sensor readings, render_task draws frames at a steady
+rate, input_task handles control events and wifi_task keeps the network
+connected. Blocking network calls are handed to `offload`, which runs them
+in a worker thread when the port has _thread, so frames keep coming while a
+request is in flight.
+
+Tasks get the time from a clock object so the scheduling can be tested on
+CPython with a fake clock.
+"""
+
+import asyncio
+from animation import Governor
+from utils import ticks_ms, ticks_add, ticks_diff, backoff_delay
+
+try:
+    import _thread
+except ImportError:
+    _thread = None
+
+# Stack for the worker thread. The ESP32 default of about 5 KB is not enough
+# for the mbedTLS handshake a fetch runs
+WORKER_STACK = 16 * 1024
+
+class Clock:
+    """Real time for tasks: ticks_ms and an awaitable sleep_ms"""
+
+    def ticks_ms(self):
+        return ticks_ms()
+
+    async def sleep_ms(self, ms):
+        if hasattr(asyncio, "sleep_ms"):
+            await asyncio.sleep_ms(ms)
+        else:
+            await asyncio.sleep(ms / 1000)
+
+class State:
+    """Values shared between the tasks"""
+
+    def __init__(self):
+        self.aqi = None           # Displayed AQI, None when there is no valid reading
+        self.color = (255, 255, 255)
+        self.error = False        # The last poll failed
+        self.api_time = None      # time_stamp of the last poll result
+        self.brightness = 0.3
+        self.trend = False        # Showing the trend instead of the AQI
+        self.link_up = False
+        self.connecting = False
+        self.fetching = False     # A network call is in flight
+        self.next_poll = None     # ticks_ms of the next scheduled poll
+        self.polls = 0
+        self.poll_errors = 0
+        self.frames = 0
+        self.late_frames = 0      # Frames dropped because drawing ran late
+
+async def run_blocking(function, clock=None, poll_ms=20, stack_size=WORKER_STACK):
+    """
+    Run a blocking function without stalling the other tasks.
+
+    The function runs in a worker thread when _thread is available and is
+    awaited by polling, otherwise it is simply called.
+
+    Args:
+        function (function): Called without arguments
+        clock: Clock providing sleep_ms, app.Clock by default
+        poll_ms (int): How often the worker is checked for completion
+        stack_size (int): Stack of the worker thread in bytes, where the port
+            allows setting it
+
+    Returns:
+        The function's result
+
+    Raises:
+        BaseException: Whatever the function raised
+    """
+    if _thread is None:
+        return function()
+    clock = clock or Clock()
+    outcome = [False, None, None]  # done, result, exception
+
+    def worker():
+        try:
+            outcome[1] = function()
+        except BaseException as e:
+            outcome[2] = e
+        finally:
+            outcome[0] = True
+
+    try:
+        previous = _thread.stack_size(stack_size)
+    except (AttributeError, ValueError):
+        # No stack_size, or the size is below the port's minimum
+        previous = None
+    try:
+        _thread.start_new_thread(worker, ())
+    finally:
+        if previous is not None:
+            _thread.stack_size(previous)
+    while not outcome[0]:
+        await clock.sleep_ms(poll_ms)
+    if outcome[2] is not None:
+        raise outcome[2]
+    return outcome[1]
+
+async def poll_task(state, clock, fetch, update, after=None, retry_ms=30000, offload=run_blocking, retry=None):
+    """
+    Poll the sensor forever.
+
+    Args:
+        state (State): Shared state
+        clock: Clock providing ticks_ms and sleep_ms
+        fetch (function): Blocking call returning the sensor fields
+        update (function): Called with the fields on success, applies them to
+            the state and returns the delay in ms before the next poll
+        after (function): Optional blocking call made after a successful
+            update, once the new value can be shown (e.g. metadata refresh)
+        retry_ms (int): Delay before retrying after an error
+        offload: Coroutine function running a blocking call, see run_blocking
+        retry (function): Optional, called after an error and returns the
+            delay in ms before the next attempt, instead of retry_ms
+    """
+    while True:
+        if not state.link_up:
+            await clock.sleep_ms(500)
+            continue
+
+        state.fetching = True
+        try:
+            fields = await offload(fetch)
+            delay_ms = update(fields)
+            state.error = False
+            state.polls += 1
+        except Exception as e:
+            print(f"Error fetching sensor data: {e}")
+            delay_ms = retry_ms if retry is None else retry()
+            print(f"Will retry in {delay_ms // 1000} seconds")
+            # Blank display on error
+            state.aqi = None
+            state.error = True
+            state.poll_errors += 1
+            after_poll = None
+        else:
+            after_poll = after
+        finally:
+            state.fetching = False
+
+        state.next_poll = ticks_add(clock.ticks_ms(), delay_ms)
+
+        if after_poll is not None:
+            state.fetching = True
+            try:
+                await offload(after_poll)
+            except Exception as e:
+                print(f"Error after sensor poll: {e}")
+            finally:
+                state.fetching = False
+
+        await clock.sleep_ms(delay_ms)
+
+async def render_task(state, clock, draw, frame_ms=100):
+    """
+    Draw frames at a fixed rate.
+
+    Frames are scheduled on a fixed grid by an animation.Governor; when
+    drawing falls behind, the missed frames are dropped rather than drawn
+    back to back, and the grid does not shift.
+
+    Args:
+        state (State): Shared state
+        clock: Clock providing ticks_ms and sleep_ms
+        draw (function): Called as draw(state, now) to draw and show one
+            frame, with the clock's ticks_ms of the frame
+        frame_ms (int): Frame period
+    """
+    governor = Governor(frame_ms, clock.ticks_ms())
+    while True:
+        draw(state, clock.ticks_ms())
+        state.frames += 1
+        delay = governor.wait_ms(clock.ticks_ms())
+        state.late_frames = governor.dropped
+        await clock.sleep_ms(delay)
+
+async def input_task(state, clock, controls, handle, period_ms=50):
+    """
+    Sample the dial and hand queued control events to `handle`.
+
+    The joystick and buttons queue their events from interrupts, so each
+    period only costs a dial sample and a check of the queue.
+
+    Args:
+        state (State): Shared state
+        clock: Clock providing ticks_ms and sleep_ms
+        controls (controls.Controls): Event source with sample() and get()
+        handle (function): Called as handle(state, kind, value) for each event
+        period_ms (int): Dial sampling period
+    """
+    while True:
+        controls.sample()
+        event = controls.get()
+        while event is not None:
+            handle(state, event[0], event[1])
+            event = controls.get()
+        await clock.sleep_ms(period_ms)
+
+async def wifi_task(state, clock, isconnected, connect, check_ms=5000, retry_ms=2000, max_retry_ms=120000,
+                    offload=run_blocking, randrange=None, lead_ms=2000):
+    """
+    Keep the network connected.
+
+    The link is also checked `lead_ms` before each scheduled poll, so a lost
+    link is being recovered by the time the poll is due, and the poll waits
+    for it instead of failing. Failed attempts are retried after an
+    exponential backoff with jitter, so a display that lost its access point
+    does not keep the radio busy and several displays do not retry in step.
+
+    Args:
+        state (State): Shared state, link_up and connecting are maintained here
+        clock: Clock providing ticks_ms and sleep_ms
+        isconnected (function): Returns True while the link is up
+        connect (function): Blocking call that tries to connect once
+        check_ms (int): Link check period while connected
+        retry_ms (int): Delay after the first failed attempt
+        max_retry_ms (int): Longest delay between attempts
+        offload: Coroutine function running a blocking call, see run_blocking
+        randrange (function): Random source for the jitter, see utils.backoff_delay
+        lead_ms (int): How long before a scheduled poll the link is checked
+    """
+    failures = 0
+    while True:
+        state.link_up = isconnected()
+        if state.link_up:
+            failures = 0
+            delay = check_ms
+            if state.next_poll is not None:
+                until_check = ticks_diff(state.next_poll, clock.ticks_ms()) - lead_ms
+                if 0 < until_check < delay:
+                    delay = until_check
+            await clock.sleep_ms(delay)
+            continue
+
+        state.connecting = True
+        start = clock.ticks_ms()
+        try:
+            await offload(connect)
+        except Exception as e:
+            print(f"Error connecting to Wi-Fi: {e}")
+        state.connecting = False
+        state.link_up = isconnected()
+        elapsed = ticks_diff(clock.ticks_ms(), start)
+        if state.link_up:
+            print(f"Connection successful after {elapsed} ms")
+        else:
+            delay = backoff_delay(failures, retry_ms, max_retry_ms, randrange)
+            failures += 1
+            print(f"Connection failed after {elapsed} ms, retrying in {delay / 1000} seconds...")
+            await clock.sleep_ms(delay)
@@ -0,0 +1,14 @@
+"""
+AQI category colors
+
+The (r, g, b) colors of the AQI categories, kept apart from the API client
+so the drawing code can use them without importing the network stack.
+"""
+
+WHITE = (255,255,255)
+GREEN  = (0, 228, 0)
+YELLOW = (255, 255, 0)
+ORANGE = (255, 126, 0)
+RED   = (255, 0, 0)
+PURPLE = (143, 63, 151)
+MAROON = (126, 0, 35)
@@ -0,0 +1,158 @@
+"""
+Table driven AQI calculation
+
+Each AqiScale is built from a breakpoint table and precomputes the slope and
+intercept of every segment, so converting a concentration is a bisection
+over the segment lower bounds and one multiply-add. Concentrations are
+truncated to the table's precision first, as the EPA specifies, and kept as
+integers in those units so breakpoint comparisons are exact with both
+single and double precision floats.
+"""
+
+from array import array
+
+# Marks a reading that could not be converted in AqiScale.aqi_many output
+INVALID = -1
+
+class AqiScale:
+    """AQI breakpoint table for one pollutant and standard"""
+
+    def __init__(self, name, breakpoints, precision=1, limit=None):
+        """
+        Args:
+            name (str): Name of the scale
+            breakpoints (list): (C_low, C_high, I_low, I_high) tuples in
+                increasing order of concentration
+            precision (int): Decimal places concentrations are truncated to
+            limit (float): Highest concentration converted; above the last
+                breakpoint the top segment is extrapolated up to this limit.
+                Defaults to the last C_high.
+        """
+        self.name = name
+        self.breakpoints = tuple(breakpoints)
+        self.units = 10 ** precision
+        units = self.units
+        self.limit = breakpoints[-1][1] if limit is None else limit
+        self._limit = int(self.limit * units + 0.5)
+        self._lows = array('l')
+        self._slopes = array('f')
+        self._intercepts = array('f')
+        for c_low, c_high, i_low, i_high in breakpoints:
+            low = int(c_low * units + 0.5)
+            high = int(c_high * units + 0.5)
+            slope = (i_high - i_low) / (high - low)
+            self._lows.append(low)
+            self._slopes.append(slope)
+            # Includes the +0.5 that rounds the result to the nearest integer
+            self._intercepts.append(i_low - slope * low + 0.5)
+
+    def aqi(self, concentration):
+        """
+        Convert a concentration to an AQI.
+
+        Args:
+            concentration (float): Concentration in the table's units
+
+        Returns:
+            int: The AQI, or None if the concentration is missing, not a
+                number, negative or above the limit
+        """
+        if not isinstance(concentration, (int, float)) or concentration < 0:
+            return None
+        try:
+            c = int(concentration * self.units + 1e-6)
+        except (ValueError, OverflowError):
+            # NaN or infinity
+            return None
+        if c > self._limit:
+            return None
+        lows = self._lows
+        lo = 0
+        hi = len(lows)
+        while lo < hi:
+            mid = (lo + hi) >> 1
+            if lows[mid] <= c:
+                lo = mid + 1
+            else:
+                hi = mid
+        return int(self._slopes[lo - 1] * c + self._intercepts[lo - 1])
+
+    def aqi_many(self, readings, out=None):
+        """
+        Convert a sequence of concentrations in one pass.
+
+        Args:
+            readings: List or array of concentrations
+            out (array): Optional array('h') of the same length to fill
+
+        Returns:
+            array: array('h') of AQI values, INVALID where aqi() returns None
+        """
+        n = len(readings)
+        if out is None:
+            out = array('h', bytes(2 * n))
+        lows = self._lows
+        slopes = self._slopes
+        intercepts = self._intercepts
+        units = self.units
+        limit = self._limit
+        segments = len(lows)
+        for i in range(n):
+            value = readings[i]
+            # Negative, missing, NaN or too large
+            if value is None or not value >= 0 or value > self.limit:
+                out[i] = INVALID
+                continue
+            c = int(value * units + 1e-6)
+            if c > limit:
+                out[i] = INVALID
+                continue
+            lo = 0
+            hi = segments
+            while lo < hi:
+                mid = (lo + hi) >> 1
+                if lows[mid] <= c:
+                    lo = mid + 1
+                else:
+                    hi = mid
+            out[i] = int(slopes[lo - 1] * c + intercepts[lo - 1])
+        return out
+
+# PM2.5 (µg/m³, 24-hour), EPA 2012 breakpoints
+PM25_2012 = AqiScale("pm2.5 (2012)", [
+    (0.0, 12.0, 0, 50),
+    (12.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 150.4, 151, 200),
+    (150.5, 250.4, 201, 300),
+    (250.5, 350.4, 301, 400),
+    (350.5, 500.4, 401, 500),
+], limit=1000)
+
+# PM2.5 (µg/m³, 24-hour), EPA 2024 revision
+PM25_2024 = AqiScale("pm2.5 (2024)", [
+    (0.0, 9.0, 0, 50),
+    (9.1, 35.4, 51, 100),
+    (35.5, 55.4, 101, 150),
+    (55.5, 125.4, 151, 200),
+    (125.5, 225.4, 201, 300),
+    (225.5, 325.4, 301, 500),
+], limit=1000)
+
+# PM10 (µg/m³, 24-hour)
+PM10 = AqiScale("pm10", [
+    (0, 54, 0, 50),
+    (55, 154, 51, 100),
+    (155, 254, 101, 150),
+    (255, 354, 151, 200),
+    (355, 424, 201, 300),
+    (425, 504, 301, 400),
+    (505, 604, 401, 500),
+], precision=0)
+
+# Scales by the name used in config.py
+SCALES = {
+    "pm2.5": PM25_2012,
+    "pm2.5_2024": PM25_2024,
+    "pm10": PM10,
+}
@@ -0,0 +1,173 @@
+"""
+Layered frames with partial recomposition
+
+A screen is split into layers, each a FrameBuffer of its own (the back
+buffers) drawn with the usual primitives. Every primitive records the
+rectangle it touched, so a layer knows which part of it changed since the
+last frame. Compositor recomposes only the union of those rectangles into
+the front FrameBuffer, stacking the layers in order with black as
+transparent, and sends the frame to the hardware once. A frame where only a
+status pixel changed costs one pixel of compositing, not a full redraw.
+"""
+
+from framebuffer import FrameBuffer, BPP
+
+class Layer(FrameBuffer):
+    """FrameBuffer placed on the screen that tracks the area drawn since the last frame"""
+
+    def __init__(self, width, height, x=0, y=0):
+        """
+        Args:
+            width (int): Width in pixels
+            height (int): Height in pixels
+            x (int): Screen position of the left column
+            y (int): Screen position of the top row
+        """
+        # The layer is its own backend, see write
+        super().__init__(width, height, self)
+        self.x = x
+        self.y = y
+        self.visible = True
+        # Changed area and drawn area since the last clear, as x0, y0, x1, y1
+        # in layer coordinates, empty when x0 >= x1
+        self.dirty = [0, 0, 0, 0]
+        self.extent = [0, 0, 0, 0]
+
+    def write(self, buf):
+        """Backend for show(): marks the whole layer changed"""
+        self._mark(0, 0, self.width, self.height)
+        return True
+
+    def _mark(self, x0, y0, x1, y1):
+        x0 = max(x0, 0)
+        y0 = max(y0, 0)
+        x1 = min(x1, self.width)
+        y1 = min(y1, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        _union(self.extent, x0, y0, x1, y1)
+        if self.visible:
+            _union(self.dirty, x0, y0, x1, y1)
+
+    def pixel(self, x, y, color):
+        super().pixel(x, y, color)
+        self._mark(x, y, x + 1, y + 1)
+
+    def fill_rect(self, x, y, w, h, color):
+        super().fill_rect(x, y, w, h, color)
+        self._mark(x, y, x + w, y + h)
+
+    def blit(self, columns, x, y, color, first=0, last=None):
+        super().blit(columns, x, y, color, first, last)
+        if last is None:
+            last = len(columns)
+        self._mark(x, y, x + last - first, self.height)
+
+    def clear(self):
+        """Set every pixel to black (transparent), marking only what was drawn as changed"""
+        extent = self.extent
+        if extent[0] < extent[2]:
+            super().clear()
+            if self.visible:
+                _union(self.dirty, extent[0], extent[1], extent[2], extent[3])
+            extent[0] = extent[1] = extent[2] = extent[3] = 0
+
+    def set_visible(self, visible):
+        """Show or hide the layer"""
+        if visible != self.visible:
+            self.visible = visible
+            extent = self.extent
+            if extent[0] < extent[2]:
+                _union(self.dirty, extent[0], extent[1], extent[2], extent[3])
+
+def _union(rect, x0, y0, x1, y1):
+    if rect[0] >= rect[2]:
+        rect[0] = x0
+        rect[1] = y0
+        rect[2] = x1
+        rect[3] = y1
+        return
+    if x0 < rect[0]:
+        rect[0] = x0
+    if y0 < rect[1]:
+        rect[1] = y0
+    if x1 > rect[2]:
+        rect[2] = x1
+    if y1 > rect[3]:
+        rect[3] = y1
+
+class Compositor:
+    """Stacks layers into a front FrameBuffer, recomposing only what changed"""
+
+    def __init__(self, fb, layers):
+        """
+        Args:
+            fb (FrameBuffer): Front buffer, shown after each composition
+            layers: Layers from the bottom up; black pixels are transparent
+        """
+        self.fb = fb
+        self.layers = layers
+        self.region = [0, 0, 0, 0]
+        self.frames = 0
+        self.pixels = 0           # Pixels recomposed, over all frames
+
+    def invalidate(self):
+        """Recompose the whole screen on the next frame, e.g. after something else drew on it"""
+        _union(self.region, 0, 0, self.fb.width, self.fb.height)
+
+    def compose(self):
+        """
+        Recompose the changed area and show the frame.
+
+        Returns:
+            bool: False if no layer changed and nothing was shown
+        """
+        region = self.region
+        for layer in self.layers:
+            dirty = layer.dirty
+            if dirty[0] < dirty[2]:
+                _union(region, layer.x + dirty[0], layer.y + dirty[1], layer.x + dirty[2], layer.y + dirty[3])
+                dirty[0] = dirty[1] = dirty[2] = dirty[3] = 0
+        x0 = max(region[0], 0)
+        y0 = max(region[1], 0)
+        x1 = min(region[2], self.fb.width)
+        y1 = min(region[3], self.fb.height)
+        region[0] = region[1] = region[2] = region[3] = 0
+        if x0 >= x1 or y0 >= y1:
+            return False
+
+        fb = self.fb
+        front = fb.buf
+        stride = fb.width * BPP
+        for row in range(y0, y1):
+            start = row * stride
+            for i in range(start + x0 * BPP, start + x1 * BPP):
+                front[i] = 0
+        for layer in self.layers:
+            if layer.visible:
+                self._stack(layer, x0, y0, x1, y1)
+        fb.show()
+        self.frames += 1
+        self.pixels += (x1 - x0) * (y1 - y0)
+        return True
+
+    def _stack(self, layer, x0, y0, x1, y1):
+        # The region clipped to the layer, in screen coordinates
+        lx0 = max(x0, layer.x)
+        ly0 = max(y0, layer.y)
+        lx1 = min(x1, layer.x + layer.width)
+        ly1 = min(y1, layer.y + layer.height)
+        front = self.fb.buf
+        back = layer.buf
+        stride = self.fb.width * BPP
+        layer_stride = layer.width * BPP
+        for row in range(ly0, ly1):
+            i = row * stride + lx0 * BPP
+            j = (row - layer.y) * layer_stride + (lx0 - layer.x) * BPP
+            for _ in range(lx1 - lx0):
+                if back[j] or back[j + 1] or back[j + 2]:
+                    front[i] = back[j]
+                    front[i + 1] = back[j + 1]
+                    front[i + 2] = back[j + 2]
+                i += BPP
+                j += BPP
@@ -0,0 +1,213 @@
+"""
+Interrupt-driven controls
+
+The joystick and buttons raise pin interrupts; each edge is debounced in the
+handler and turned into an event in a preallocated EventQueue, so the main
+loop no longer polls the pins. The dial has no interrupt, DialSampler reads
+it at the caller's rate, averaging several ADC readings and only queueing an
+event when the value moves by more than the hysteresis.
+
+The interrupt handlers do not allocate, so they are safe to run as hard
+interrupts.
+"""
+
+from array import array
+from machine import Pin
+from utils import ticks_ms, ticks_add, ticks_diff
+
+# Event kinds
+UP = 1
+DOWN = 2
+LEFT = 3
+RIGHT = 4
+CLICK = 5
+BUTTON_A = 6
+BUTTON_B = 7
+DIAL = 8
+
+# Event values for the joystick and buttons
+RELEASED = 0
+PRESSED = 1
+
+class EventQueue:
+    """
+    Fixed-size FIFO of (kind, value) events, filled from interrupt handlers.
+
+    Only put writes the tail and only get writes the head, so an interrupt
+    between any two instructions of get cannot lose or repeat an event. One
+    slot is always left empty to tell a full queue from an empty one.
+    """
+
+    def __init__(self, capacity=16):
+        """
+        Args:
+            capacity (int): Number of pending events kept, further events are dropped
+        """
+        self.capacity = capacity
+        self.kinds = bytearray(capacity + 1)
+        self.values = array('l', [0] * (capacity + 1))
+        self.dropped = 0
+        self._head = 0            # Next event to get, written by get only
+        self._tail = 0            # Next free slot, written by put only
+
+    def __len__(self):
+        return (self._tail - self._head) % (self.capacity + 1)
+
+    def put(self, kind, value=0):
+        """
+        Add an event without allocating.
+
+        Returns:
+            bool: False if the queue was full and the event was dropped
+        """
+        i = self._tail
+        tail = (i + 1) % (self.capacity + 1)
+        if tail == self._head:
+            self.dropped += 1
+            return False
+        self.kinds[i] = kind
+        self.values[i] = value
+        # Publish the event only once its slot is written
+        self._tail = tail
+        return True
+
+    def get(self):
+        """Remove and return the oldest event as (kind, value), or None if empty"""
+        i = self._head
+        if i == self._tail:
+            return None
+        event = self.kinds[i], self.values[i]
+        self._head = (i + 1) % (self.capacity + 1)
+        return event
+
+    def clear(self):
+        """Remove all pending events"""
+        self._head = self._tail
+
+class Button:
+    """
+    Debounced active-low input queueing PRESSED and RELEASED events.
+
+    An edge is accepted when it comes at least `debounce_ms` after the last
+    accepted one. Edges inside that window are ignored, and `settle` checks
+    the level again once the window has passed in case the contact bounced
+    to a different state.
+    """
+
+    def __init__(self, pin, kind, queue, debounce_ms=30):
+        """
+        Args:
+            pin (Pin): Input pin, low while pressed
+            kind (int): Event kind queued for this input
+            queue (EventQueue): Queue receiving the events
+            debounce_ms (int): Minimum time between accepted edges
+        """
+        self.pin = pin
+        self.kind = kind
+        self.queue = queue
+        self.debounce_ms = debounce_ms
+        self.pressed = pin.value() == 0
+        # The first edge is never treated as a bounce
+        self._last_edge = ticks_add(ticks_ms(), -debounce_ms)
+        self._pending = False
+        # Bound once, creating the bound method in the handler would allocate
+        self._handler = self._irq
+        pin.irq(handler=self._handler, trigger=Pin.IRQ_FALLING | Pin.IRQ_RISING)
+
+    def _irq(self, pin):
+        now = ticks_ms()
+        if ticks_diff(now, self._last_edge) < self.debounce_ms:
+            self._pending = True
+            return
+        self._last_edge = now
+        self._update()
+
+    def _update(self):
+        pressed = self.pin.value() == 0
+        if pressed != self.pressed:
+            self.pressed = pressed
+            self.queue.put(self.kind, PRESSED if pressed else RELEASED)
+
+    def settle(self):
+        """Pick up a level change whose edge fell inside the debounce window"""
+        if self._pending and ticks_diff(ticks_ms(), self._last_edge) >= self.debounce_ms:
+            self._pending = False
+            self._update()
+
+    def resync(self):
+        """Read the level again, after edges may have been missed (e.g. in light sleep)"""
+        self._pending = False
+        self._update()
+
+class DialSampler:
+    """Oversampled dial reading with hysteresis, queueing DIAL events on change"""
+
+    def __init__(self, adc, queue, oversample=4, hysteresis=24):
+        """
+        Args:
+            adc (ADC): Dial input
+            queue (EventQueue): Queue receiving the events
+            oversample (int): ADC readings averaged per sample
+            hysteresis (int): Change in raw units needed before a new value is reported
+        """
+        self.adc = adc
+        self.queue = queue
+        self.oversample = oversample
+        self.hysteresis = hysteresis
+        self.value = None
+
+    def sample(self):
+        """
+        Read the dial and queue a DIAL event if it moved.
+
+        Returns:
+            bool: True if a new value was queued
+        """
+        total = 0
+        for _ in range(self.oversample):
+            total += self.adc.read()
+        reading = total // self.oversample
+        if self.value is not None and abs(reading - self.value) <= self.hysteresis:
+            return False
+        self.value = reading
+        self.queue.put(DIAL, reading)
+        return True
+
+class Controls:
+    """The PixelKit joystick, buttons and dial feeding one event queue"""
+
+    def __init__(self, kit, capacity=16, debounce_ms=30, oversample=4, hysteresis=24):
+        """
+        Args:
+            kit: PixelKit module (or an object with the same pins)
+            capacity (int): Event queue size
+            debounce_ms (int): Debounce time for the joystick and buttons
+            oversample (int): ADC readings averaged per dial sample
+            hysteresis (int): Dial change needed for a new event
+        """
+        self.queue = EventQueue(capacity)
+        self.buttons = [
+            Button(kit.joystick_up, UP, self.queue, debounce_ms),
+            Button(kit.joystick_down, DOWN, self.queue, debounce_ms),
+            Button(kit.joystick_left, LEFT, self.queue, debounce_ms),
+            Button(kit.joystick_right, RIGHT, self.queue, debounce_ms),
+            Button(kit.joystick_click, CLICK, self.queue, debounce_ms),
+            Button(kit.button_a, BUTTON_A, self.queue, debounce_ms),
+            Button(kit.button_b, BUTTON_B, self.queue, debounce_ms),
+        ]
+        self.dial = DialSampler(kit.dial, self.queue, oversample, hysteresis)
+
+    def sample(self):
+        """Sample the dial and settle bounced buttons, from the main loop"""
+        for button in self.buttons:
+            button.settle()
+        self.dial.sample()
+
+    def resync(self):
+        """Queue any button change missed while the interrupts were not serviced"""
+        for button in self.buttons:
+            button.resync()
+
+    def get(self):
+        """Return the oldest pending event as (kind, value), or None"""
+        return self.queue.get()
@@ -0,0 +1,296 @@
+"""
+AQI screen
+
+AqiDisplay draws the application state as layers of a compositor.Compositor:
+the value, a scrolling ticker, a status pixel and the Wi-Fi logo overlay.
+Each layer is only redrawn when the state it shows changes (the dimmed
+color comes from a palette.Palette) or while it is animated, and only the
+area the redrawn layers touched is recomposed, so a frame costs time in
+proportion to what changed and an unchanged state is not drawn at all. The
+steady-state render path does not allocate.
+
+A new value cross-fades from the old one, and text scrolls across the
+ticker, see animation.
+
+TrendDisplay draws the PM2.5 trend as a sparkline, one column per bucket of
+a trend.Trend, and is likewise only redrawn when the trend changes.
+"""
+
+from animation import FULL, Transition, Scroller, blend, render_strip
+from aqicolors import RED, WHITE
+from compositor import Compositor, Layer
+from palette import Palette
+
+# Wi-Fi logo colors: white while connecting, red after a failed attempt
+CONNECTING = (0x10, 0x10, 0x10)
+DISCONNECTED = (0x10, 0x0, 0x0)
+ERROR = RED
+# Status pixel color while a network call is in flight
+FETCHING = (0x0, 0x0, 0x10)
+# Ticker text color
+TICKER = WHITE
+
+# Linear brightness of a trend column's min to max range relative to its mean
+RANGE_DIM = 0.25
+
+def scale_color(brightness, color, out):
+    """
+    Dim a color into a preallocated buffer.
+
+    Args:
+        brightness (float): Factor between 0 and 1.0
+        color: (r, g, b) color
+        out (bytearray): Receives the dimmed (r, g, b) color
+
+    Returns:
+        bytearray: out
+
+    Raises:
+        ValueError: If brightness is outside 0 to 1.0
+    """
+    if not 0 <= brightness <= 1.0:
+        raise ValueError("Factor must be between 0 and 1.0")
+    out[0] = int(color[0] * brightness)
+    out[1] = int(color[1] * brightness)
+    out[2] = int(color[2] * brightness)
+    return out
+
+class AqiDisplay:
+    """Draws the AQI, or the Wi-Fi logo while the link is down"""
+
+    def __init__(self, fb, font, logo, logo_x=3, palette=None, fade_ms=600):
+        """
+        Args:
+            fb (FrameBuffer): Frame buffer to compose into and show
+            font: pixelfonts font for the value
+            logo: Wi-Fi logo column masks, see wifi.LOGO
+            logo_x (int): X position of the logo
+            palette (Palette): Dims the value color, may be shared with other views
+            fade_ms (int): Length of the cross-fade to a new value, 0 for none
+        """
+        self.fb = fb
+        self.font = font
+        self.logo = logo
+        self.logo_x = logo_x
+        self.palette = palette or Palette((ERROR, TICKER))
+        self.text = " --"
+        self._text_aqi = None     # AQI `text` was formatted from
+        self.frames = 0
+        # Bottom up: the value, the ticker shown instead of it while text
+        # scrolls, the status pixel in the top right corner and the logo,
+        # shown instead of the value while the link is down
+        self.value = Layer(fb.width, fb.height)
+        self.ticker = Layer(fb.width, fb.height)
+        self.status = Layer(1, 1, fb.width - 1, 0)
+        self.overlay = Layer(fb.width, fb.height)
+        self.compositor = Compositor(fb, (self.value, self.ticker, self.status, self.overlay))
+        self.scroller = None
+        self._ticker_y = 0
+        # Value text as column strips: the one shown and, while fading, the
+        # previous one, with the masks of the pixels in either or both
+        columns = (fb.width // (font.WIDTH + 1) + 1) * (font.WIDTH + 1)
+        self._strip = render_strip(font, self.text, bytearray(columns))
+        self._old_strip = bytearray(columns)
+        self._old_only = bytearray(columns)
+        self._new_only = bytearray(columns)
+        self._both = bytearray(columns)
+        self._color = bytearray(3)       # Dimmed color of the value shown
+        self._old_color = bytearray(3)
+        self._mix = bytearray(3)
+        self.fade = Transition(fade_ms)
+        # State the layers were drawn from, None until the first frame
+        self._link_up = None
+        self._connecting = None
+        self._fetching = None
+        self._aqi = None
+        self._error = None
+        self._base_color = None
+        self._brightness = None
+
+    def invalidate(self):
+        """Draw the next frame even if the state did not change, e.g. after another view was shown"""
+        self._link_up = None
+
+    def scroll(self, text, font, now, speed=20):
+        """
+        Scroll text once across the display in place of the value.
+
+        Args:
+            text (str): Text to show, characters missing from the font are drawn as spaces
+            font: pixelfonts font for the text
+            now (int): ticks_ms to start scrolling at, from the clock passed to draw
+            speed (int): Pixels per second
+        """
+        self.scroller = Scroller(render_strip(font, text, missing=" "), self.fb.width, speed)
+        self.scroller.start(now)
+        self._ticker_y = (self.fb.height - font.HEIGHT) // 2
+
+    def _unchanged(self, state):
+        return (state.link_up == self._link_up
+                and state.connecting == self._connecting
+                and state.fetching == self._fetching
+                and state.aqi == self._aqi
+                and state.error == self._error
+                and state.color == self._base_color
+                and state.brightness == self._brightness)
+
+    def _draw_fade(self, level):
+        """Draw the old value fading out and the new one fading in"""
+        old = self._old_strip
+        new = self._strip
+        for x in range(len(new)):
+            self._old_only[x] = old[x] & ~new[x]
+            self._new_only[x] = new[x] & ~old[x]
+            self._both[x] = old[x] & new[x]
+        value = self.value
+        value.blit(self._old_only, 0, 0, blend(self._old_color, None, level, self._mix))
+        value.blit(self._new_only, 0, 0, blend(self._color, None, FULL - level, self._mix))
+        value.blit(self._both, 0, 0, blend(self._old_color, self._color, level, self._mix))
+
+    def draw(self, state, now):
+        """
+        Redraw the layers whose state changed or that are animated, and show the result.
+
+        Args:
+            state (app.State): State to draw
+            now (int): ticks_ms of the frame, animations are timed from it
+
+        Returns:
+            bool: True if a new frame was shown
+        """
+        redraw = self._link_up is None
+        if not redraw and not self.fade.active and self.scroller is None and self._unchanged(state):
+            return False
+        if redraw:
+            self.compositor.invalidate()
+
+        if redraw or state.link_up != self._link_up or state.connecting != self._connecting:
+            overlay = self.overlay
+            overlay.clear()
+            if not state.link_up:
+                overlay.blit(self.logo, self.logo_x, 0, CONNECTING if state.connecting else DISCONNECTED)
+
+        if self.scroller is not None:
+            ticker = self.ticker
+            ticker.clear()
+            if self.scroller.done(now):
+                self.scroller = None
+            else:
+                self.scroller.draw(ticker, 0, self._ticker_y, self.palette.scaled(TICKER), now)
+        self.value.set_visible(state.link_up and self.scroller is None)
+
+        # A brightness change within the same palette level looks the same
+        level_changed = self.palette.set_brightness(state.brightness)
+        value_changed = (state.aqi != self._aqi or state.error != self._error
+                         or state.color != self._base_color)
+        if value_changed and not redraw and state.link_up and self._link_up and self.fade.duration_ms:
+            # Fade from what is on the display now
+            self._old_strip[:] = self._strip
+            self._old_color[:] = self._color
+            self.fade.start(now)
+        if redraw or level_changed or value_changed or self.fade.active:
+            if state.aqi != self._text_aqi:
+                # Blank if aqi is None (error)
+                self.text = "%3d" % state.aqi if state.aqi is not None else " --"
+                self._text_aqi = state.aqi
+                render_strip(self.font, self.text, self._strip)
+            self._color[:] = self.palette.scaled(ERROR if state.error else state.color)
+            value = self.value
+            value.clear()
+            level = self.fade.level(now)
+            if level < FULL:
+                self._draw_fade(level)
+            else:
+                value.blit(self._strip, 0, 0, self._color)
+
+        if redraw or state.fetching != self._fetching:
+            self.status.clear()
+            if state.fetching:
+                self.status.pixel(0, 0, FETCHING)
+
+        self._link_up = state.link_up
+        self._connecting = state.connecting
+        self._fetching = state.fetching
+        self._aqi = state.aqi
+        self._error = state.error
+        self._base_color = state.color
+        self._brightness = state.brightness
+
+        if not self.compositor.compose():
+            return False
+        self.frames += 1
+        return True
+
+class TrendDisplay:
+    """
+    Draws the PM2.5 trend as a sparkline.
+
+    Each column spans its bucket's min to max in a dim color, with the mean
+    at full brightness, colored by the AQI of the mean. The scale runs from
+    0 at the bottom row to the highest value shown, but at least `floor`.
+    """
+
+    def __init__(self, fb, trend, color_of, floor=12.0, palette=None):
+        """
+        Args:
+            fb (FrameBuffer): Frame buffer to draw into and show
+            trend (trend.Trend): Trend to draw, right-aligned
+            color_of (function): Returns the (r, g, b) color for a PM2.5 value
+            floor (float): Smallest value at the top of the scale, so clean
+                air does not fill the display
+            palette (Palette): Dims the colors, may be shared with other views
+        """
+        self.fb = fb
+        self.trend = trend
+        self.color_of = color_of
+        self.floor = floor
+        self.palette = palette or Palette()
+        self.dim = bytearray(3)
+        self.frames = 0
+        self._version = None
+        self._brightness = None
+
+    def invalidate(self):
+        """Draw the next frame even if the trend did not change"""
+        self._version = None
+
+    def _row(self, value, top):
+        last = self.fb.height - 1
+        return last - min(int(value * last / top + 0.5), last)
+
+    def draw(self, state, now=None):
+        """
+        Draw and show the trend unless it is unchanged since the last frame.
+
+        Args:
+            state (app.State): State to draw
+            now (int): ticks_ms of the frame, unused as nothing is animated
+
+        Returns:
+            bool: True if a new frame was drawn
+        """
+        trend = self.trend
+        if trend.version == self._version and state.brightness == self._brightness:
+            return False
+
+        fb = self.fb
+        fb.clear()
+        self.palette.set_brightness(state.brightness)
+        top = max(trend.peak(), self.floor)
+        x0 = fb.width - trend.columns
+        for i in range(trend.columns):
+            stats = trend.column(i)
+            if stats is None:
+                continue
+            low, high, mean = stats
+            color = self.palette.scaled(self.color_of(mean))
+            scale_color(RANGE_DIM, color, self.dim)
+            y = self._row(high, top)
+            fb.vline(x0 + i, y, self._row(low, top) - y + 1, self.dim)
+            fb.pixel(x0 + i, self._row(mean, top), color)
+        fb.show()
+        self.frames += 1
+
+        self._version = trend.version
+        self._brightness = state.brightness
+        return True
@@ -0,0 +1,156 @@
+"""
+FrameBuffer for the PixelKit LED matrix
+
+Pixels are kept in a single bytearray in GRB order, the same layout the
+NeoPixel driver uses, so a finished frame reaches the hardware with one bulk
+copy. Drawing never touches the hardware; `show` hands the whole buffer to a
+backend, which is any object with a `write(buf)` method. On the device the
+PixelKit module is the backend, on a host `MemoryBackend` keeps the frame in
+memory for tests and benchmarks.
+"""
+
+import instrument
+
+BPP = 3 # Bytes per pixel (G, R, B)
+
+_text_timer = instrument.timer("fb.text")
+
+class MemoryBackend:
+    """Backend that keeps the last frame written in memory"""
+
+    def __init__(self, size):
+        """
+        Args:
+            size (int): Frame size in bytes
+        """
+        self.buf = bytearray(size)
+        self.writes = 0
+
+    def write(self, buf):
+        """Copy a frame into memory. Returns True like PixelKit.write"""
+        self.buf[:] = buf
+        self.writes += 1
+        return True
+
+class FrameBuffer:
+    """GRB frame buffer with clipped drawing primitives"""
+
+    def __init__(self, width, height, backend=None):
+        """
+        Initialize a frame buffer.
+
+        Args:
+            width (int): Width in pixels
+            height (int): Height in pixels
+            backend: Object with a write(buf) method, defaults to a MemoryBackend
+        """
+        self.width = width
+        self.height = height
+        self.buf = bytearray(width * height * BPP)
+        self._blank = bytes(len(self.buf))
+        if backend is None:
+            backend = MemoryBackend(len(self.buf))
+        self.backend = backend
+
+    def pixel(self, x, y, color):
+        """Set one pixel, ignoring coordinates outside the buffer"""
+        if 0 <= x < self.width and 0 <= y < self.height:
+            i = (y * self.width + x) * BPP
+            buf = self.buf
+            buf[i] = color[1]
+            buf[i + 1] = color[0]
+            buf[i + 2] = color[2]
+
+    def get_pixel(self, x, y):
+        """Return the (r, g, b) color of one pixel"""
+        i = (y * self.width + x) * BPP
+        return (self.buf[i + 1], self.buf[i], self.buf[i + 2])
+
+    def clear(self):
+        """Set every pixel to black"""
+        self.buf[:] = self._blank
+
+    def fill(self, color):
+        """Set every pixel to `color`"""
+        self.fill_rect(0, 0, self.width, self.height, color)
+
+    def fill_rect(self, x, y, w, h, color):
+        """Fill a rectangle, clipped to the buffer"""
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+        if x0 >= x1 or y0 >= y1:
+            return
+        r, g, b = color[0], color[1], color[2]
+        buf = self.buf
+        stride = self.width * BPP
+        for row in range(y0, y1):
+            start = row * stride + x0 * BPP
+            for i in range(start, start + (x1 - x0) * BPP, BPP):
+                buf[i] = g
+                buf[i + 1] = r
+                buf[i + 2] = b
+
+    def hline(self, x, y, w, color):
+        """Draw a horizontal line of width `w` starting at (x, y)"""
+        self.fill_rect(x, y, w, 1, color)
+
+    def vline(self, x, y, h, color):
+        """Draw a vertical line of height `h` starting at (x, y)"""
+        self.fill_rect(x, y, 1, h, color)
+
+    def blit(self, columns, x, y, color, first=0, last=None):
+        """
+        Draw a 1-bit sprite, clipped to the buffer.
+
+        Args:
+            columns: One bitmask per column, bit 0 is the top row (the format
+                produced by pixelfonts.basefont.compile_glyph)
+            x (int): X position of the left column
+            y (int): Y position of the top row
+            color (tuple): (r, g, b) color for lit pixels
+            first (int): Index of the first column drawn, at x
+            last (int): Index after the last column drawn, the end by default
+        """
+        r, g, b = color[0], color[1], color[2]
+        buf = self.buf
+        width = self.width
+        height = self.height
+        if last is None:
+            last = len(columns)
+        # Only the columns that land on the buffer
+        if x < 0:
+            first -= x
+            x = 0
+        last = min(last, first + width - x)
+        for c in range(first, last):
+            mask = columns[c]
+            row = y
+            while mask:
+                if mask & 1 and 0 <= row < height:
+                    i = (row * width + x) * BPP
+                    buf[i] = g
+                    buf[i + 1] = r
+                    buf[i + 2] = b
+                mask >>= 1
+                row += 1
+            x += 1
+
+    def text(self, font, string, x, y, color):
+        """
+        Draw a string with a pixelfonts font, clipped to the buffer.
+
+        Raises:
+            ValueError: If a character is not in the font
+        """
+        start = _text_timer.start()
+        advance = font.WIDTH + 1
+        for char in string:
+            self.blit(font.glyph(char), x, y, color)
+            x += advance
+        _text_timer.stop(start)
+
+    def show(self):
+        """Send the frame to the backend. Returns the backend's result"""
+        return self.backend.write(self.buf)
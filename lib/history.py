@@ -0,0 +1,254 @@
+"""
+Reading history on flash
+
+HistoryStore keeps every poll result in fixed-width binary records packed
+with struct, so a day of 2 minute readings takes under 9 kB. Records are
+appended to a ring of segment files: when the newest segment is full a new
+one is started and the oldest is deleted. New records are collected in a
+block buffer and written to flash a block at a time, which keeps the number
+of filesystem writes (and flash erase cycles) low at the cost of losing at
+most one block on a power cut.
+
+Each segment has a sparse index in RAM, the timestamp of every `stride`-th
+record, rebuilt from a few seeks when the store is opened. A scan from a
+given time seeks straight to the nearest indexed record and reads the files
+one block at a time, so neither appending nor scanning needs more RAM than
+a block, however long the history is.
+"""
+
+import os
+import struct
+from array import array
+
+# timestamp, pm2.5 A and B (0.1 ug/m3), AQI, humidity (%), temperature (F)
+RECORD = "<IHHHBb"
+RECORD_SIZE = struct.calcsize(RECORD)
+
+# Stored in place of a missing value
+NO_PM = 0xFFFF
+NO_AQI = 0xFFFF
+NO_HUMIDITY = 0xFF
+NO_TEMPERATURE = -128
+
+SUFFIX = ".bin"
+
+def encode(buf, offset, timestamp, pm25_a, pm25_b, aqi, humidity, temperature):
+    """
+    Pack one record into `buf` at `offset`.
+
+    Values are rounded to the record's resolution and clamped to its range.
+    None is stored as missing for every field but the timestamp.
+    """
+    struct.pack_into(RECORD, buf, offset, timestamp,
+                     NO_PM if pm25_a is None else min(max(int(pm25_a * 10 + 0.5), 0), NO_PM - 1),
+                     NO_PM if pm25_b is None else min(max(int(pm25_b * 10 + 0.5), 0), NO_PM - 1),
+                     NO_AQI if aqi is None else min(max(int(aqi), 0), NO_AQI - 1),
+                     NO_HUMIDITY if humidity is None else min(max(int(humidity + 0.5), 0), NO_HUMIDITY - 1),
+                     NO_TEMPERATURE if temperature is None else min(max(int(round(temperature)), -127), 127))
+
+def decode(buf, offset=0):
+    """
+    Unpack the record at `offset` in `buf`.
+
+    Returns:
+        tuple: (timestamp, pm25_a, pm25_b, aqi, humidity, temperature), with
+            None for missing values
+    """
+    timestamp, pm25_a, pm25_b, aqi, humidity, temperature = struct.unpack_from(RECORD, buf, offset)
+    return (timestamp,
+            None if pm25_a == NO_PM else pm25_a / 10,
+            None if pm25_b == NO_PM else pm25_b / 10,
+            None if aqi == NO_AQI else aqi,
+            None if humidity == NO_HUMIDITY else humidity,
+            None if temperature == NO_TEMPERATURE else temperature)
+
+def pm25(record):
+    """Return the mean of a record's reported PM2.5 channels, or None if neither was"""
+    a = record[1]
+    b = record[2]
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return (a + b) / 2
+
+class HistoryStore:
+    """Time-ordered readings in a ring of segment files"""
+
+    def __init__(self, directory="history", segments=4, segment_records=720, block_records=10, stride=32):
+        """
+        Args:
+            directory (str): Directory holding the segment files
+            segments (int): Number of segments kept, the oldest is deleted
+                when a new one is started
+            segment_records (int): Records per segment (720 is a day of
+                2 minute readings)
+            block_records (int): Records buffered before a write to flash
+            stride (int): Records between sparse index entries
+        """
+        self.directory = directory
+        self.segments = segments
+        self.segment_records = segment_records
+        self.block_records = block_records
+        self.stride = stride
+        self._block = bytearray(block_records * RECORD_SIZE)
+        self._pending = 0           # Records in _block, not yet on flash
+        self._seqs = []             # Segment sequence numbers, oldest first
+        self._counts = []           # Records in each segment, pending ones included
+        self._index = []            # Per segment, array of every stride-th timestamp
+        self._sealed = False        # The newest segment takes no more records
+        self.latest = 0             # Timestamp of the newest record, 0 if empty
+        self.writes = 0
+
+    def _path(self, seq):
+        return "%s/%08d%s" % (self.directory, seq, SUFFIX)
+
+    def open(self):
+        """
+        Find the segments on flash and build their sparse indexes.
+
+        Returns:
+            int: Number of records in the store
+        """
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            os.mkdir(self.directory)
+            names = []
+        self._seqs = sorted(int(name[:-len(SUFFIX)]) for name in names if name.endswith(SUFFIX))
+        self._counts = []
+        self._index = []
+        self._pending = 0
+        self._sealed = False
+        self.latest = 0
+        buf = bytearray(RECORD_SIZE)
+        for seq in self._seqs:
+            size = os.stat(self._path(seq))[6]
+            count = size // RECORD_SIZE
+            index = array('L')
+            with open(self._path(seq), "rb") as f:
+                for i in range(0, count, self.stride):
+                    f.seek(i * RECORD_SIZE)
+                    f.readinto(buf)
+                    index.append(struct.unpack_from("<I", buf, 0)[0])
+                if count:
+                    f.seek((count - 1) * RECORD_SIZE)
+                    f.readinto(buf)
+                    self.latest = struct.unpack_from("<I", buf, 0)[0]
+            self._counts.append(count)
+            self._index.append(index)
+            # A partly written record from a power cut: appending after it
+            # would misalign the file, so new records go to a new segment
+            self._sealed = size % RECORD_SIZE != 0
+        return len(self)
+
+    def __len__(self):
+        return sum(self._counts)
+
+    def append(self, timestamp, pm25_a=None, pm25_b=None, aqi=None, humidity=None, temperature=None):
+        """
+        Add a reading, written to flash once a block is full.
+
+        Returns:
+            bool: False if the reading is not newer than the latest one and was ignored
+        """
+        if timestamp <= self.latest:
+            return False
+        if not self._seqs or self._sealed or self._counts[-1] >= self.segment_records:
+            self._new_segment()
+        count = self._counts[-1]
+        if count % self.stride == 0:
+            self._index[-1].append(timestamp)
+        encode(self._block, self._pending * RECORD_SIZE, timestamp, pm25_a, pm25_b, aqi, humidity, temperature)
+        self._pending += 1
+        self._counts[-1] = count + 1
+        self.latest = timestamp
+        if self._pending >= self.block_records:
+            self.flush()
+        return True
+
+    def flush(self):
+        """Write the buffered records to flash"""
+        if not self._pending:
+            return
+        with open(self._path(self._seqs[-1]), "ab") as f:
+            f.write(memoryview(self._block)[:self._pending * RECORD_SIZE])
+        self._pending = 0
+        self.writes += 1
+
+    def _new_segment(self):
+        self.flush()
+        self._seqs.append(self._seqs[-1] + 1 if self._seqs else 0)
+        self._counts.append(0)
+        self._index.append(array('L'))
+        self._sealed = False
+        while len(self._seqs) > self.segments:
+            try:
+                os.remove(self._path(self._seqs[0]))
+            except OSError:
+                pass
+            self._seqs.pop(0)
+            self._counts.pop(0)
+            self._index.pop(0)
+
+    def _locate(self, timestamp):
+        """Return (segment, record) of an indexed record at or before the first one at `timestamp`"""
+        segment = 0
+        for i in range(len(self._seqs)):
+            index = self._index[i]
+            if index and index[0] <= timestamp:
+                segment = i
+        index = self._index[segment] if self._seqs else ()
+        # Last index entry at or before timestamp
+        lo = 0
+        hi = len(index)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if index[mid] <= timestamp:
+                lo = mid + 1
+            else:
+                hi = mid
+        return segment, max(lo - 1, 0) * self.stride
+
+    def scan(self, start=None, end=None):
+        """
+        Yield the records from `start` to `end`, oldest first.
+
+        Reads one block at a time. Records appended while the scan is under
+        way may or may not be included.
+
+        Args:
+            start (int): First timestamp, None for the oldest record
+            end (int): Last timestamp, None for the newest record
+
+        Yields:
+            tuple: Records as returned by decode
+        """
+        segment, rec = (0, 0) if start is None else self._locate(start)
+        buf = bytearray(self.block_records * RECORD_SIZE)
+        for i in range(segment, len(self._seqs)):
+            count = self._counts[i]
+            newest = i == len(self._seqs) - 1
+            on_flash = count - self._pending if newest else count
+            if rec < on_flash:
+                with open(self._path(self._seqs[i]), "rb") as f:
+                    f.seek(rec * RECORD_SIZE)
+                    while rec < on_flash:
+                        n = min(self.block_records, on_flash - rec)
+                        f.readinto(memoryview(buf)[:n * RECORD_SIZE])
+                        for j in range(n):
+                            record = decode(buf, j * RECORD_SIZE)
+                            if end is not None and record[0] > end:
+                                return
+                            if start is None or record[0] >= start:
+                                yield record
+                        rec += n
+            if newest:
+                while rec < count:
+                    record = decode(self._block, (rec - on_flash) * RECORD_SIZE)
+                    if end is not None and record[0] > end:
+                        return
+                    if start is None or record[0] >= start:
+                        yield record
+                    rec += 1
+            rec = 0
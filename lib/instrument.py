@@ -0,0 +1,170 @@
+"""
+Lightweight timers and counters for the device loop
+
+Hot paths hold a Timer or Counter created once at import time and call it
+on every pass. While instrumentation is disabled (the default) each call
+only checks a module flag, so the probes can stay in place. Enable it from
+config or the REPL:
+
+    >>> import instrument
+    >>> instrument.enable()
+    >>> instrument.report()
+
+Timers keep a count, total, maximum and a fixed log2 histogram of durations
+in microseconds; nothing is allocated when a value is recorded. To stay a
+MicroPython small int (below 2**30) the total restarts from the new value
+when it would overflow, about every 18 minutes of timed code, so the mean
+covers the durations since then.
+"""
+
+import gc
+from array import array
+from utils import ticks_us, ticks_diff
+
+enabled = False
+
+# Largest Timer.total, the top of the MicroPython small int range
+MAX_TOTAL = (1 << 30) - 1
+
+# All metrics by name, in creation order for reports
+_metrics = {}
+
+def enable(on=True):
+    """Turn recording on or off"""
+    global enabled
+    enabled = on
+
+class Counter:
+    """Event counter"""
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+
+    def add(self, n=1):
+        if enabled:
+            self.count += n
+
+    def reset(self):
+        self.count = 0
+
+    def summary(self):
+        return "%s=%d" % (self.name, self.count)
+
+class Timer:
+    """Duration statistics with a log2 histogram, in microseconds"""
+
+    BUCKETS = 24  # Bucket i holds durations below 2**i us, the last one everything longer
+
+    def __init__(self, name):
+        self.name = name
+        self.histogram = array('L', [0] * self.BUCKETS)
+        self.reset()
+
+    def start(self):
+        """Return a start time for `stop`, or 0 when disabled"""
+        return ticks_us() if enabled else 0
+
+    def stop(self, start):
+        """Record the time since `start` (from `start()`)"""
+        if enabled and start:
+            self.record(ticks_diff(ticks_us(), start))
+
+    def record(self, us):
+        """Record a duration measured elsewhere"""
+        if not enabled:
+            return
+        self.count += 1
+        if self.total > MAX_TOTAL - us:
+            # Restart the mean rather than grow into a bigint
+            self.total = 0
+            self._total_count = 0
+        self.total += us
+        self._total_count += 1
+        if us > self.max:
+            self.max = us
+        bucket = 0
+        while us > 0 and bucket < self.BUCKETS - 1:
+            us >>= 1
+            bucket += 1
+        self.histogram[bucket] += 1
+
+    def reset(self):
+        self.count = 0
+        self.total = 0            # Since the last restart, see MAX_TOTAL
+        self._total_count = 0     # Durations in total
+        self.max = 0
+        for i in range(self.BUCKETS):
+            self.histogram[i] = 0
+
+    def mean(self):
+        return self.total // self._total_count if self._total_count else 0
+
+    def percentile(self, p):
+        """
+        Return an upper bound for the `p` percentile from the histogram.
+
+        Args:
+            p (float): Percentile between 0 and 100
+
+        Returns:
+            int: Upper edge of the bucket holding the percentile in us, or 0 if empty
+        """
+        if not self.count:
+            return 0
+        target = self.count * p / 100
+        seen = 0
+        for bucket in range(self.BUCKETS):
+            seen += self.histogram[bucket]
+            if seen >= target:
+                return min(1 << bucket, self.max)
+        return self.max
+
+    def summary(self):
+        return "%s n=%d avg=%dus p90<=%dus max=%dus" % (
+            self.name, self.count, self.mean(), self.percentile(90), self.max)
+
+def timer(name):
+    """Return the Timer called `name`, creating it on first use"""
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics[name] = Timer(name)
+    return metric
+
+def counter(name):
+    """Return the Counter called `name`, creating it on first use"""
+    metric = _metrics.get(name)
+    if metric is None:
+        metric = _metrics[name] = Counter(name)
+    return metric
+
+def reset():
+    """Clear every metric"""
+    for metric in _metrics.values():
+        metric.reset()
+
+def log_line():
+    """Return a one-line summary of every metric that has recorded something"""
+    parts = []
+    for metric in _metrics.values():
+        if metric.count:
+            parts.append(metric.summary())
+    return " | ".join(parts)
+
+def report():
+    """Print every metric with its histogram, for the REPL"""
+    for metric in _metrics.values():
+        print(metric.summary())
+        if isinstance(metric, Timer) and metric.count:
+            for bucket in range(metric.BUCKETS):
+                n = metric.histogram[bucket]
+                if n:
+                    print("  <%9dus %6d" % (1 << bucket, n))
+
+_gc_timer = timer("gc")
+
+def collect():
+    """Run the garbage collector, timing the pause"""
+    start = _gc_timer.start()
+    gc.collect()
+    _gc_timer.stop(start)
@@ -0,0 +1,243 @@
+"""
+Streaming JSON field extraction
+
+FieldExtractor scans a JSON document fed to it in pieces of any size and
+keeps only the scalar values of the keys it was asked for, wherever they
+appear in the document. Nothing else is decoded, so memory use depends on
+the number of fields rather than the size of the response.
+"""
+
+import instrument
+
+# Bytes with a special meaning outside of strings
+_QUOTE = 0x22      # "
+_BACKSLASH = 0x5C  # \
+_OPEN_OBJECT = 0x7B   # {
+_CLOSE_OBJECT = 0x7D  # }
+_OPEN_ARRAY = 0x5B    # [
+_CLOSE_ARRAY = 0x5D   # ]
+_COMMA = 0x2C
+_COLON = 0x3A
+_WHITESPACE = b" \t\r\n"
+
+_feed_timer = instrument.timer("json.feed")
+
+# Escapes decoded inside captured strings, besides \uXXXX; anything else
+# is kept as is
+_ESCAPES = {0x6E: 0x0A, 0x74: 0x09, 0x72: 0x0D, 0x62: 0x08, 0x66: 0x0C}
+_U = 0x75
+
+MAX_DEPTH = 30
+_NOT_FOUND = 255
+
+class FieldExtractor:
+    """
+    Incremental JSON scanner that keeps the values of selected keys.
+
+    Values are stored in `values`, in the same order as `fields`. Strings,
+    numbers, true, false and null are decoded; a key whose value is an object
+    or array is left as None. When a key appears more than once the value
+    nearest the top of the document wins, then the first one seen. Escapes,
+    \\uXXXX ones included, are decoded. Strings longer than `max_value_len`
+    bytes of UTF-8 are truncated at the last whole character that fits.
+    """
+
+    def __init__(self, fields, max_value_len=64):
+        """
+        Args:
+            fields (list): Keys to extract
+            max_value_len (int): Longest key or value kept, in bytes
+        """
+        self.fields = tuple(fields)
+        self.values = [None] * len(self.fields)
+        self._depths = bytearray(len(self.fields))
+        self._index = {}
+        for i, field in enumerate(self.fields):
+            self._index[field.encode()] = i
+        self._token = bytearray(max_value_len)
+        self.reset()
+
+    def reset(self):
+        """Clear the extracted values and get ready for a new document"""
+        for i in range(len(self.values)):
+            self.values[i] = None
+            self._depths[i] = _NOT_FOUND
+        self.found = 0
+        self._depth = 0
+        self._objects = 0       # Bit n is set when nesting level n is an object
+        self._expect_key = False
+        self._in_string = False
+        self._in_literal = False
+        self._escape = False
+        self._hex_digits = 0    # Digits of a \u escape still to come
+        self._code = 0          # Code point of the \u escape being read
+        self._high = 0          # High surrogate waiting for its low half
+        self._capture = False   # Keep the bytes of the current token
+        self._is_key = False
+        self._slot = -1         # Index of the field the next value belongs to
+        self._length = 0
+
+    def get(self, field, default=None):
+        """Return the extracted value of `field`, or default if it was not found"""
+        value = self.values[self.fields.index(field)]
+        return default if value is None else value
+
+    def as_dict(self):
+        """Return the extracted values as a dict"""
+        result = {}
+        for i, field in enumerate(self.fields):
+            result[field] = self.values[i]
+        return result
+
+    def _append(self, byte):
+        if self._length < len(self._token):
+            self._token[self._length] = byte
+            self._length += 1
+
+    def _append_code(self, code):
+        # Append a code point as UTF-8
+        if code < 0x80:
+            self._append(code)
+        elif code < 0x800:
+            self._append(0xC0 | code >> 6)
+            self._append(0x80 | code & 0x3F)
+        elif code < 0x10000:
+            self._append(0xE0 | code >> 12)
+            self._append(0x80 | code >> 6 & 0x3F)
+            self._append(0x80 | code & 0x3F)
+        else:
+            self._append(0xF0 | code >> 18)
+            self._append(0x80 | code >> 12 & 0x3F)
+            self._append(0x80 | code >> 6 & 0x3F)
+            self._append(0x80 | code & 0x3F)
+
+    def _end_escape(self):
+        code = self._code
+        if 0xD800 <= code < 0xDC00:
+            # First half of a surrogate pair, combined with the next escape
+            self._high = code
+            return
+        if 0xDC00 <= code < 0xE000 and self._high:
+            code = 0x10000 + (self._high - 0xD800 << 10) + (code - 0xDC00)
+        self._high = 0
+        self._append_code(code)
+
+    def _text(self):
+        # The token as a str, without a character cut short by the truncation
+        length = self._length
+        token = self._token
+        i = length - 1
+        while i > 0 and token[i] & 0xC0 == 0x80:
+            i -= 1
+        if i >= 0:
+            lead = token[i]
+            size = 4 if lead >= 0xF0 else 3 if lead >= 0xE0 else 2 if lead >= 0xC0 else 1
+            if i + size > length:
+                length = i
+        return bytes(token[:length]).decode()
+
+    def _end_key(self):
+        self._slot = self._index.get(bytes(self._token[:self._length]), -1)
+        self._expect_key = False
+
+    def _store(self, value):
+        slot = self._slot
+        if slot >= 0:
+            if self._depths[slot] == _NOT_FOUND:
+                self.found += 1
+            if self._depth < self._depths[slot]:
+                self.values[slot] = value
+                self._depths[slot] = self._depth
+            self._slot = -1
+
+    def _end_literal(self):
+        self._in_literal = False
+        if self._slot < 0:
+            return
+        text = bytes(self._token[:self._length]).decode()
+        if text == "true":
+            value = True
+        elif text == "false":
+            value = False
+        elif text == "null":
+            value = None
+        else:
+            try:
+                if "." in text or "e" in text or "E" in text:
+                    value = float(text)
+                else:
+                    value = int(text)
+            except ValueError:
+                value = None
+        self._store(value)
+
+    def feed(self, data):
+        """
+        Scan the next piece of the document.
+
+        Args:
+            data: bytes, bytearray or memoryview holding the next bytes
+        """
+        start = _feed_timer.start()
+        for byte in data:
+            if self._in_string:
+                if self._hex_digits:
+                    self._hex_digits -= 1
+                    # Hex digit value, anything else counts as 0
+                    digit = byte - 0x30 if 0x30 <= byte <= 0x39 else (byte | 0x20) - 0x57
+                    self._code = self._code << 4 | (digit if 0 <= digit < 16 else 0)
+                    if not self._hex_digits and self._capture:
+                        self._end_escape()
+                elif self._escape:
+                    self._escape = False
+                    if byte == _U:
+                        self._hex_digits = 4
+                        self._code = 0
+                    elif self._capture:
+                        self._append(_ESCAPES.get(byte, byte))
+                elif byte == _BACKSLASH:
+                    self._escape = True
+                elif byte == _QUOTE:
+                    self._in_string = False
+                    if self._is_key:
+                        self._end_key()
+                    elif self._capture:
+                        self._store(self._text())
+                elif self._capture:
+                    self._append(byte)
+                continue
+
+            if byte in _WHITESPACE or byte == _COMMA or byte == _CLOSE_OBJECT or byte == _CLOSE_ARRAY:
+                if self._in_literal:
+                    self._end_literal()
+                if byte == _COMMA:
+                    self._expect_key = bool(self._objects >> self._depth & 1)
+                elif byte == _CLOSE_OBJECT or byte == _CLOSE_ARRAY:
+                    if self._depth > 0:
+                        self._objects &= ~(1 << self._depth)
+                        self._depth -= 1
+                    self._expect_key = False
+                    self._slot = -1
+            elif byte == _QUOTE:
+                self._in_string = True
+                self._is_key = self._expect_key
+                self._capture = self._is_key or self._slot >= 0
+                self._length = 0
+                self._high = 0
+            elif byte == _OPEN_OBJECT or byte == _OPEN_ARRAY:
+                # Containers are not captured, their keys are matched on their own
+                self._slot = -1
+                if self._depth < MAX_DEPTH:
+                    self._depth += 1
+                    if byte == _OPEN_OBJECT:
+                        self._objects |= 1 << self._depth
+                self._expect_key = byte == _OPEN_OBJECT
+            elif byte == _COLON:
+                pass
+            else:
+                if not self._in_literal:
+                    self._in_literal = True
+                    self._length = 0
+                if self._slot >= 0:
+                    self._append(byte)
+        _feed_timer.stop(start)
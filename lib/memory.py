@@ -0,0 +1,136 @@
+"""
+Heap statistics and garbage collection tuning
+
+By default MicroPython only collects when an allocation fails, so garbage
+piles up until the heap is full and the collection lands wherever that
+happens, possibly in the fetch thread in the middle of a TLS handshake.
+`configure_gc` sets `gc.threshold` to also collect after a quarter of the
+free heap has been allocated since the last collection, which bounds the
+garbage (and makes automatic collections more frequent than the default,
+not rarer). main.py also collects explicitly right after each poll, when
+the poll's garbage is freshly made and nothing is being drawn. MemoryMonitor records the free heap after those collections
+to show leaks over days of uptime. Measuring fragmentation means allocating
+the largest free block, which forces collections and can starve another
+thread's allocations, so it is only done on request: from the REPL, or
+after each poll when instrumentation is enabled.
+"""
+
+import gc
+from array import array
+
+def mem_free():
+    """Free heap in bytes, or 0 where the port cannot tell"""
+    return gc.mem_free() if hasattr(gc, "mem_free") else 0
+
+def mem_alloc():
+    """Allocated heap in bytes, or 0 where the port cannot tell"""
+    return gc.mem_alloc() if hasattr(gc, "mem_alloc") else 0
+
+def configure_gc(fraction=4):
+    """
+    Also collect automatically after `1 / fraction` of the free heap has been
+    allocated since the last collection.
+
+    The free heap is measured after a collection, so the threshold is a
+    fraction of what the program can actually use.
+
+    Returns:
+        int: The threshold set in bytes, or 0 if the port has no gc.threshold
+    """
+    if not hasattr(gc, "threshold") or not hasattr(gc, "mem_free"):
+        return 0
+    gc.collect()
+    threshold = gc.mem_free() // fraction
+    gc.threshold(threshold)
+    return threshold
+
+def largest_free_block(limit=None, step=64):
+    """
+    Find the largest block that can be allocated, by trying to allocate it.
+
+    Args:
+        limit (int): Largest size tried, defaults to the free heap
+        step (int): Resolution of the search in bytes
+
+    Returns:
+        int: Size in bytes, a multiple of step
+    """
+    high = (limit if limit is not None else mem_free()) // step
+    low = 0
+    while low < high:
+        mid = (low + high + 1) // 2
+        try:
+            block = bytearray(mid * step)
+        except MemoryError:
+            high = mid - 1
+        else:
+            del block
+            low = mid
+    return low * step
+
+class MemoryMonitor:
+    """Fixed-size history of heap samples"""
+
+    def __init__(self, capacity=48):
+        """
+        Args:
+            capacity (int): Samples kept, the oldest are overwritten
+        """
+        self.capacity = capacity
+        self.free = array('L', [0] * capacity)
+        self.largest = array('L', [0] * capacity)
+        self.count = 0
+        self.min_free = None
+        self._next = 0
+
+    def sample(self, free=None, largest=None, probe=False):
+        """
+        Record the heap now, normally right after a collection.
+
+        Args:
+            free (int): Free bytes, measured when not given
+            largest (int): Largest free block, 0 if unknown
+            probe (bool): Measure the largest free block when not given, see
+                largest_free_block. Only for the REPL or diagnostics, never
+                while another thread may be allocating
+        """
+        if free is None:
+            free = mem_free()
+        if largest is None:
+            largest = largest_free_block(free) if probe else 0
+        self.free[self._next] = free
+        self.largest[self._next] = largest
+        self._next = (self._next + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        if self.min_free is None or free < self.min_free:
+            self.min_free = free
+
+    def fragmentation(self):
+        """
+        Return the share of free memory outside the largest block in the latest sample.
+
+        Returns:
+            float: Between 0 and 1.0, None if the largest block was not measured
+        """
+        if not self.count:
+            return 0.0
+        i = self._next - 1
+        free = self.free[i]
+        if not free:
+            return 0.0
+        if not self.largest[i]:
+            return None
+        return 1 - self.largest[i] / free
+
+    def summary(self):
+        """Return a one-line report of the latest sample and the history"""
+        if not self.count:
+            return "no samples"
+        i = self._next - 1
+        oldest = (self._next - self.count) % self.capacity
+        line = "free=%d " % self.free[i]
+        if self.largest[i]:
+            line += "largest=%d frag=%.0f%% " % (self.largest[i], self.fragmentation() * 100)
+        return line + "min_free=%d change=%+d over %d samples" % (
+            self.min_free, self.free[i] - self.free[oldest], self.count)
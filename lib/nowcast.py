@@ -0,0 +1,170 @@
+"""
+Rolling PM2.5 history and the EPA NowCast
+
+SampleRing keeps the most recent timestamped readings in fixed arrays that
+are allocated once. NowCast folds each reading into hourly averages, also
+kept in fixed arrays, and computes the EPA NowCast concentration from the
+last 12 clock hours on demand, without going back to the raw readings.
+"""
+
+from array import array
+
+HOUR = 3600
+
+class SampleRing:
+    """Fixed-size ring buffer of (timestamp, value) samples"""
+
+    def __init__(self, capacity):
+        """
+        Args:
+            capacity (int): Number of samples kept, the oldest are overwritten
+        """
+        self.capacity = capacity
+        self.times = array('L', [0] * capacity)
+        self.values = array('f', [0.0] * capacity)
+        self.count = 0
+        self._next = 0
+
+    def __len__(self):
+        return self.count
+
+    def append(self, timestamp, value):
+        """
+        Add a sample.
+
+        Returns:
+            bool: False if the sample is not newer than the latest one and was ignored
+        """
+        if self.count and timestamp <= self.times[self._next - 1]:
+            return False
+        self.times[self._next] = timestamp
+        self.values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        return True
+
+    def get(self, i):
+        """
+        Return sample `i` as (timestamp, value), 0 being the oldest kept.
+        Negative indices count from the newest.
+        """
+        if i < 0:
+            i += self.count
+        if not 0 <= i < self.count:
+            raise IndexError("sample index out of range")
+        j = (self._next - self.count + i) % self.capacity
+        return self.times[j], self.values[j]
+
+    def latest(self):
+        """Return the newest sample as (timestamp, value), or None if empty"""
+        return self.get(-1) if self.count else None
+
+    def clear(self):
+        """Remove all samples"""
+        self.count = 0
+        self._next = 0
+
+class NowCast:
+    """
+    EPA NowCast for PM2.5 from incrementally updated hourly averages.
+
+    Each sample is added to the average of its clock hour in O(1). The
+    NowCast weights the last 12 hourly averages, the newest (the current,
+    possibly partial, hour) by 1 and each older one by a further factor w,
+    where w is the ratio of the lowest to the highest average, but at least
+    0.5. At least two of the three most recent hours need data.
+    """
+
+    HOURS = 12
+
+    def __init__(self):
+        self._sums = array('f', [0.0] * self.HOURS)
+        self._counts = array('H', [0] * self.HOURS)
+        self._hours = array('L', [0] * self.HOURS)
+        self.latest = 0
+
+    def add(self, timestamp, value):
+        """
+        Add a sample.
+
+        Args:
+            timestamp (int): Unix time of the sample
+            value (float): PM2.5 concentration
+
+        Returns:
+            bool: False if the sample is not newer than the latest one and was ignored
+        """
+        if timestamp <= self.latest or value is None or value < 0:
+            return False
+        self.latest = timestamp
+        hour = timestamp // HOUR
+        slot = hour % self.HOURS
+        if self._hours[slot] != hour:
+            self._hours[slot] = hour
+            self._sums[slot] = 0.0
+            self._counts[slot] = 0
+        self._sums[slot] += value
+        self._counts[slot] += 1
+        return True
+
+    def load(self, ring):
+        """Add every sample of a SampleRing, oldest first"""
+        for i in range(len(ring)):
+            timestamp, value = ring.get(i)
+            self.add(timestamp, value)
+
+    def hourly_average(self, hours_ago, now=None):
+        """
+        Return the average of one clock hour, or None if it has no samples.
+
+        Args:
+            hours_ago (int): 0 for the hour of `now`, 1 for the one before, ...
+            now (int): Unix time, defaults to the latest sample
+        """
+        hour = (self.latest if now is None else now) // HOUR - hours_ago
+        slot = hour % self.HOURS
+        if self._hours[slot] != hour or not self._counts[slot]:
+            return None
+        return self._sums[slot] / self._counts[slot]
+
+    def concentration(self, now=None):
+        """
+        Compute the NowCast concentration.
+
+        Args:
+            now (int): Unix time, defaults to the latest sample
+
+        Returns:
+            float: NowCast PM2.5, or None if there is not enough recent data
+        """
+        if not self.latest:
+            return None
+        recent = 0
+        low = None
+        high = None
+        for i in range(self.HOURS):
+            average = self.hourly_average(i, now)
+            if average is None:
+                continue
+            if i < 3:
+                recent += 1
+            if low is None or average < low:
+                low = average
+            if high is None or average > high:
+                high = average
+        if recent < 2:
+            return None
+        weight = low / high if high > 0 else 1.0
+        if weight < 0.5:
+            weight = 0.5
+        total = 0.0
+        weights = 0.0
+        factor = 1.0
+        for i in range(self.HOURS):
+            average = self.hourly_average(i, now)
+            if average is not None:
+                total += factor * average
+                weights += factor
+            factor *= weight
+        return total / weights
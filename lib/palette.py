@@ -0,0 +1,96 @@
+"""
+Brightness-scaled colors with gamma correction
+
+LED brightness is linear in the PWM duty but perceived brightness is not:
+halving the duty looks only slightly dimmer. Palette dims colors through a
+gamma lookup table, so equal steps of the dial look like equal steps of
+brightness, and caches the dimmed copy of each color. The cache is rebuilt
+only when the brightness moves to another of a fixed number of levels;
+otherwise a frame gets its colors with a dictionary lookup, without any
+arithmetic or allocation.
+"""
+
+GAMMA = 2.2
+
+def gamma_table(gamma=GAMMA):
+    """
+    Build the 256 entry table mapping a perceived level to a linear LED level.
+
+    Args:
+        gamma (float): Display gamma, 1.0 for a linear table
+
+    Returns:
+        bytes: Entry i is 255 * (i / 255) ** gamma, rounded
+    """
+    return bytes(int(255 * (i / 255) ** gamma + 0.5) for i in range(256))
+
+LUT = gamma_table()
+
+class Palette:
+    """Cache of colors dimmed to the current brightness level"""
+
+    def __init__(self, colors=(), levels=64, lut=LUT):
+        """
+        Args:
+            colors: (r, g, b) colors to cache from the start; others are
+                added on first use
+            levels (int): Number of brightness levels the brightness is
+                quantized to
+            lut (bytes): Perceived to linear level table, see gamma_table
+        """
+        self.levels = levels
+        self.lut = lut
+        self.level = None
+        self.factor = 0           # Linear brightness 0 to 255 for the level
+        self.rebuilds = 0
+        self._cache = {}
+        for color in colors:
+            self._cache[color] = bytearray(3)
+        self.set_brightness(1.0)
+
+    def set_brightness(self, brightness):
+        """
+        Set the perceived brightness, rebuilding the cache if its level changed.
+
+        Args:
+            brightness (float): Perceived brightness between 0 and 1.0
+
+        Returns:
+            bool: True if the level changed
+
+        Raises:
+            ValueError: If brightness is outside 0 to 1.0
+        """
+        if not 0 <= brightness <= 1.0:
+            raise ValueError("Brightness must be between 0 and 1.0")
+        level = int(brightness * (self.levels - 1) + 0.5)
+        if level == self.level:
+            return False
+        self.level = level
+        self.factor = self.lut[level * 255 // (self.levels - 1)]
+        for color, out in self._cache.items():
+            self._scale(color, out)
+        self.rebuilds += 1
+        return True
+
+    def _scale(self, color, out):
+        factor = self.factor
+        out[0] = (color[0] * factor + 127) // 255
+        out[1] = (color[1] * factor + 127) // 255
+        out[2] = (color[2] * factor + 127) // 255
+
+    def scaled(self, color):
+        """
+        Return `color` dimmed to the current brightness.
+
+        Args:
+            color (tuple): (r, g, b) color
+
+        Returns:
+            bytearray: The cached dimmed (r, g, b), do not modify
+        """
+        out = self._cache.get(color)
+        if out is None:
+            out = self._cache[color] = bytearray(3)
+            self._scale(color, out)
+        return out
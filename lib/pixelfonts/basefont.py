@@ -2,14 +2,42 @@
 """
 BaseFont class for bitmap fonts.
 This is the parent class for all bitmap font implementations.
+
+Glyphs are authored as string art in each subclass's FONT table and compiled
+once per font class, on first use, into column bitmasks: one integer per
+column with bit ``y`` set when the pixel in row ``y`` is lit. Device builds
+(tools/build.py) replace FONT with a GLYPHS table of those bitmasks as bytes
+literals, so the string art is never loaded.
 """
 
+# Compiled glyph tables, keyed by font class
+_GLYPH_CACHE = {}
+
+def compile_glyph(rows):
+    """
+    Compile a string-art glyph into column bitmasks.
+
+    Args:
+        rows (list): Rows of the glyph, '#' marks a lit pixel
+
+    Returns:
+        bytes: One mask per column, bit 0 is the top row
+    """
+    width = max(len(row) for row in rows) if rows else 0
+    columns = [0] * width
+    for y, row in enumerate(rows):
+        for x, col in enumerate(row):
+            if col == '#':
+                columns[x] |= 1 << y
+    return bytes(columns)
+
 class BaseFont:
     """Base class for bitmap fonts"""
     
     WIDTH = 0  # Width will be defined in subclasses
     HEIGHT = 0  # Height will be defined in subclasses
     FONT = {}   # Font dictionary will be defined in subclasses
+    GLYPHS = None  # Or precompiled column bitmasks, see compile_glyph
     
     def __init__(self, region_width, region_height, pixel_func):
         """
@@ -23,6 +51,46 @@ class BaseFont:
         self.region_width = region_width
         self.region_height = region_height
         self.pixel_func = pixel_func
+        self._glyphs = self.glyphs()
+
+    @classmethod
+    def glyphs(cls):
+        """
+        Return the compiled glyph table for this font, compiling it on first use.
+
+        Returns:
+            dict: Character to column bitmasks (see compile_glyph)
+        """
+        table = _GLYPH_CACHE.get(cls)
+        if table is None and cls.GLYPHS is not None:
+            # Precompiled by tools/build.py, nothing to do at runtime
+            table = _GLYPH_CACHE[cls] = cls.GLYPHS
+        if table is None:
+            if cls.HEIGHT > 8:
+                raise ValueError("Glyphs taller than 8 pixels are not supported")
+            table = {}
+            for char, rows in cls.FONT.items():
+                table[char] = compile_glyph(rows)
+            _GLYPH_CACHE[cls] = table
+        return table
+
+    def glyph(self, char):
+        """
+        Get the compiled column bitmasks for a character.
+
+        Args:
+            char (str): The character to look up
+
+        Returns:
+            bytes: One mask per column, bit 0 is the top row
+
+        Raises:
+            ValueError: If the character is not in the font
+        """
+        try:
+            return self._glyphs[char]
+        except KeyError:
+            raise ValueError(f"Character '{char}' not found in font.")
     
     def _safe_pixel(self, x, y, *args, **kwargs):
         """
@@ -51,20 +119,50 @@ class BaseFont:
         Raises:
             ValueError: If the character is not in the font
         """
-        if char not in self.FONT:
-            raise ValueError(f"Character '{char}' not found in font.")
+        columns = self.glyph(char)
         
         # Skip drawing if character is completely outside the display region
         if x_offset + self.WIDTH < 0 or y_offset + self.HEIGHT < 0:
             return
         elif x_offset >= self.region_width or y_offset >= self.region_height:
             return
-        
-        for y, row in enumerate(self.FONT[char]):
-            for x, col in enumerate(row):
-                if col == '#':
-                    self._safe_pixel(x + x_offset, y + y_offset, *args, **kwargs)
+
+        # Fast path: the whole glyph is visible, so no per-pixel bounds checks
+        visible = (x_offset >= 0 and y_offset >= 0
+                   and x_offset + self.WIDTH <= self.region_width
+                   and y_offset + self.HEIGHT <= self.region_height)
+
+        if len(args) == 1 and not kwargs:
+            # Common case of a single color argument: pass it on directly
+            # rather than repacking *args for every pixel
+            self._draw_columns(columns, x_offset, y_offset, args[0], visible)
+            return
+
+        pixel = self.pixel_func if visible else self._safe_pixel
+        x = x_offset
+        for mask in columns:
+            y = y_offset
+            while mask:
+                if mask & 1:
+                    pixel(x, y, *args, **kwargs)
+                mask >>= 1
+                y += 1
+            x += 1
     
+    def _draw_columns(self, columns, x, y_offset, color, visible):
+        pixel = self.pixel_func
+        width = self.region_width
+        height = self.region_height
+        for mask in columns:
+            if visible or 0 <= x < width:
+                y = y_offset
+                while mask:
+                    if mask & 1 and (visible or 0 <= y < height):
+                        pixel(x, y, color)
+                    mask >>= 1
+                    y += 1
+            x += 1
+
     def text(self, string, x_offset, y_offset, *args, **kwargs):
         """
         Draw a string of text at the specified position.
@@ -77,4 +175,4 @@ class BaseFont:
             **kwargs: Additional keyword arguments to pass to pixel_func
         """
         for i, char in enumerate(string):
-            self.draw_char(char, x_offset + i * (self.WIDTH + 1), y_offset, *args, **kwargs)
\ No newline at end of file
+            self.draw_char(char, x_offset + i * (self.WIDTH + 1), y_offset, *args, **kwargs)
@@ -1,13 +1,13 @@
 #!/usr/bin/env python3
 """
 Font3x5 class for 3x5 pixel bitmap font.
-Implements numerals 0-9 in a 3x5 pixel grid.
+Implements numerals 0-9 and capital letters A-Z in a 3x5 pixel grid.
 """
 
 from ..basefont import BaseFont
 
 class Font3x5(BaseFont):
-    """3x5 pixel bitmap font for numerals"""
+    """3x5 pixel bitmap font for numerals and capital letters"""
     
     WIDTH = 3
     HEIGHT = 5
@@ -30,6 +30,15 @@ class Font3x5(BaseFont):
             "   ",
         ],
 
+        # 0x2E  .
+        ".": [
+            "   ",
+            "   ",
+            "   ",
+            "   ",
+            " # ",
+        ],
+
         # 0x30  0
         "0": [
             "###",
@@ -118,5 +127,239 @@ class Font3x5(BaseFont):
             "###",
             "  #",
             "###",
+        ],
+
+        # 0x41  A
+        "A": [
+            " # ",
+            "# #",
+            "###",
+            "# #",
+            "# #",
+        ],
+
+        # 0x42  B
+        "B": [
+            "## ",
+            "# #",
+            "## ",
+            "# #",
+            "## ",
+        ],
+
+        # 0x43  C
+        "C": [
+            " ##",
+            "#  ",
+            "#  ",
+            "#  ",
+            " ##",
+        ],
+
+        # 0x44  D
+        "D": [
+            "## ",
+            "# #",
+            "# #",
+            "# #",
+            "## ",
+        ],
+
+        # 0x45  E
+        "E": [
+            "###",
+            "#  ",
+            "## ",
+            "#  ",
+            "###",
+        ],
+
+        # 0x46  F
+        "F": [
+            "###",
+            "#  ",
+            "## ",
+            "#  ",
+            "#  ",
+        ],
+
+        # 0x47  G
+        "G": [
+            " ##",
+            "#  ",
+            "# #",
+            "# #",
+            " ##",
+        ],
+
+        # 0x48  H
+        "H": [
+            "# #",
+            "# #",
+            "###",
+            "# #",
+            "# #",
+        ],
+
+        # 0x49  I
+        "I": [
+            "###",
+            " # ",
+            " # ",
+            " # ",
+            "###",
+        ],
+
+        # 0x4A  J
+        "J": [
+            "  #",
+            "  #",
+            "  #",
+            "# #",
+            " # ",
+        ],
+
+        # 0x4B  K
+        "K": [
+            "# #",
+            "# #",
+            "## ",
+            "# #",
+            "# #",
+        ],
+
+        # 0x4C  L
+        "L": [
+            "#  ",
+            "#  ",
+            "#  ",
+            "#  ",
+            "###",
+        ],
+
+        # 0x4D  M
+        "M": [
+            "# #",
+            "###",
+            "###",
+            "# #",
+            "# #",
+        ],
+
+        # 0x4E  N
+        "N": [
+            "## ",
+            "# #",
+            "# #",
+            "# #",
+            "# #",
+        ],
+
+        # 0x4F  O
+        "O": [
+            " # ",
+            "# #",
+            "# #",
+            "# #",
+            " # ",
+        ],
+
+        # 0x50  P
+        "P": [
+            "## ",
+            "# #",
+            "## ",
+            "#  ",
+            "#  ",
+        ],
+
+        # 0x51  Q
+        "Q": [
+            " # ",
+            "# #",
+            "# #",
+            "## ",
+            " ##",
+        ],
+
+        # 0x52  R
+        "R": [
+            "## ",
+            "# #",
+            "## ",
+            "# #",
+            "# #",
+        ],
+
+        # 0x53  S
+        "S": [
+            " ##",
+            "#  ",
+            " # ",
+            "  #",
+            "## ",
+        ],
+
+        # 0x54  T
+        "T": [
+            "###",
+            " # ",
+            " # ",
+            " # ",
+            " # ",
+        ],
+
+        # 0x55  U
+        "U": [
+            "# #",
+            "# #",
+            "# #",
+            "# #",
+            "###",
+        ],
+
+        # 0x56  V
+        "V": [
+            "# #",
+            "# #",
+            "# #",
+            "# #",
+            " # ",
+        ],
+
+        # 0x57  W
+        "W": [
+            "# #",
+            "# #",
+            "###",
+            "###",
+            "# #",
+        ],
+
+        # 0x58  X
+        "X": [
+            "# #",
+            "# #",
+            " # ",
+            "# #",
+            "# #",
+        ],
+
+        # 0x59  Y
+        "Y": [
+            "# #",
+            "# #",
+            " # ",
+            " # ",
+            " # ",
+        ],
+
+        # 0x5A  Z
+        "Z": [
+            "###",
+            "  #",
+            " # ",
+            "#  ",
+            "###",
         ]
     }
@@ -0,0 +1,125 @@
+"""
+Light sleep between deadlines
+
+The display only needs the CPU for a frame, a dial sample or a sensor poll,
+each due at a known time. PowerManager is a clock for the application tasks
+that records when each sleeping task is due; its idle task puts the ESP32 in
+light sleep until the earliest of those deadlines, so the idle time between
+them is spent asleep instead of spinning in the scheduler.
+
+Light sleep is skipped while a network call is in flight, since it would
+stall the worker thread and the radio.
+"""
+
+import machine
+from utils import ticks_add, ticks_diff
+
+try:
+    import esp32
+except ImportError:
+    esp32 = None
+
+# Typical ESP32 supply current from the datasheet, board LEDs not included
+AWAKE_MA = 50.0   # CPU running, Wi-Fi in modem sleep
+ASLEEP_MA = 0.8   # Light sleep
+
+class PowerManager:
+    """Clock wrapper that light-sleeps until the next task deadline"""
+
+    def __init__(self, clock, sleep=None, min_sleep_ms=10, max_sleep_ms=1000, wake_pin=None):
+        """
+        Args:
+            clock: Clock providing ticks_ms and sleep_ms, see app.Clock
+            sleep (function): Called with a duration in ms to sleep, machine.lightsleep by default
+            min_sleep_ms (int): Shorter idle periods are waited out awake
+            max_sleep_ms (int): Longest single sleep, so Wi-Fi keeps its association
+            wake_pin (Pin): Optional RTC pin waking the board when pulled low
+        """
+        self.clock = clock
+        self.sleep = sleep or machine.lightsleep
+        self.min_sleep_ms = min_sleep_ms
+        self.max_sleep_ms = max_sleep_ms
+        self._deadlines = []
+        if wake_pin is not None and esp32 is not None:
+            esp32.wake_on_ext0(wake_pin, esp32.WAKEUP_ALL_LOW)
+        self.reset_stats()
+
+    def ticks_ms(self):
+        return self.clock.ticks_ms()
+
+    async def sleep_ms(self, ms):
+        deadline = ticks_add(self.clock.ticks_ms(), ms)
+        self._deadlines.append(deadline)
+        try:
+            await self.clock.sleep_ms(ms)
+        finally:
+            self._deadlines.remove(deadline)
+
+    def next_deadline_ms(self):
+        """Return the time in ms until the earliest task deadline, or None if no task is sleeping"""
+        if not self._deadlines:
+            return None
+        now = self.clock.ticks_ms()
+        delay = None
+        for deadline in self._deadlines:
+            d = ticks_diff(deadline, now)
+            if delay is None or d < delay:
+                delay = d
+        return max(delay, 0)
+
+    async def idle_task(self, busy, on_wake=None):
+        """
+        Sleep whenever every other task is waiting.
+
+        Args:
+            busy (function): Returns True while sleeping is not allowed, e.g.
+                during a network call
+            on_wake (function): Optional, called after each sleep (e.g. to
+                pick up input that changed while asleep)
+        """
+        while True:
+            # Let every ready task run first
+            await self.clock.sleep_ms(0)
+            delay = self.next_deadline_ms()
+            if delay is None or busy():
+                await self.clock.sleep_ms(self.min_sleep_ms)
+                continue
+            if delay < self.min_sleep_ms:
+                await self.clock.sleep_ms(delay)
+                continue
+            start = self.clock.ticks_ms()
+            self.sleep(min(delay, self.max_sleep_ms))
+            self.asleep_ms += ticks_diff(self.clock.ticks_ms(), start)
+            self.sleeps += 1
+            if on_wake is not None:
+                on_wake()
+
+    def reset_stats(self):
+        """Restart the duty cycle measurement"""
+        self.asleep_ms = 0
+        self.sleeps = 0
+        self._started = self.clock.ticks_ms()
+
+    def duty_cycle(self):
+        """Return the fraction of time spent awake since the last reset"""
+        elapsed = ticks_diff(self.clock.ticks_ms(), self._started)
+        if elapsed <= 0:
+            return 1.0
+        return max(elapsed - self.asleep_ms, 0) / elapsed
+
+    def stats(self):
+        """
+        Return the measured duty cycle and the estimated average current.
+
+        Returns:
+            dict: duty_cycle (awake fraction), sleeps, asleep_ms, elapsed_ms
+                and current_ma (estimate from AWAKE_MA and ASLEEP_MA)
+        """
+        duty = self.duty_cycle()
+        return {
+            "duty_cycle": duty,
+            "sleeps": self.sleeps,
+            "asleep_ms": self.asleep_ms,
+            "elapsed_ms": ticks_diff(self.clock.ticks_ms(), self._started),
+            "current_ma": duty * AWAKE_MA + (1 - duty) * ASLEEP_MA,
+        }
@@ -9,15 +9,47 @@ It uses the API key and sensor ID from config.yml file.
 import os
 import sys
 import json
+import socket
+import ssl
 import urequests
+from utils import ticks_ms, ticks_diff, parse_sensor_datetime
+from jsonfields import FieldExtractor
+from aqiscale import PM25_2012
+import instrument
+from aqicolors import WHITE, GREEN, YELLOW, ORANGE, RED, PURPLE, MAROON
 
-WHITE = (255,255,255)
-GREEN  = (0, 228, 0)
-YELLOW = (255, 255, 0)
-ORANGE = (255, 126, 0)
-RED   = (255, 0, 0)
-PURPLE = (143, 63, 151)
-MAROON = (126, 0, 35)
+API_HOST = "api.purpleair.com"
+API_PATH = "/v1"
+
+# Keys of a sensor's local /json payload for each API field. Fields with two
+# keys are the mean of the sensor's A and B channels.
+LOCAL_FIELDS = {
+    "name": ("Geo",),
+    "latitude": ("lat",),
+    "longitude": ("lon",),
+    "rssi": ("rssi",),
+    "uptime": ("uptime",),
+    "humidity": ("current_humidity",),
+    "temperature": ("current_temp_f",),
+    "pressure": ("pressure",),
+    "pm1.0": ("pm1_0_atm", "pm1_0_atm_b"),
+    "pm2.5": ("pm2_5_atm", "pm2_5_atm_b"),
+    "pm2.5_a": ("pm2_5_atm",),
+    "pm2.5_b": ("pm2_5_atm_b",),
+    "pm2.5_atm": ("pm2_5_atm", "pm2_5_atm_b"),
+    "pm2.5_cf_1": ("pm2_5_cf_1", "pm2_5_cf_1_b"),
+    "pm10.0": ("pm10_0_atm", "pm10_0_atm_b"),
+}
+
+# Per-phase request timers, recorded from HttpConnection.timing
+_HTTP_TIMERS = {}
+for _phase in ("connect", "tls", "request", "headers", "body", "total"):
+    _HTTP_TIMERS[_phase] = instrument.timer("http." + _phase)
+_parse_timer = instrument.timer("http.parse")
+_retry_counter = instrument.counter("http.retries")
+
+# Top level response keys that are always extracted by fetch_sensor_fields
+RESPONSE_KEYS = ["time_stamp", "data_time_stamp", "error", "description"]
 
 def url_encode(string):
     encoded_string = ""
@@ -28,6 +60,41 @@ def url_encode(string):
             encoded_string += f"%{ord(character):x}"
     return encoded_string
 
+def fields_param(field_list):
+    """
+    Build the url-encoded `fields` query parameter.
+
+    Args:
+        field_list (list or str): List of fields to retrieve
+
+    Returns:
+        str: The "fields=..." query string parameter
+
+    Raises:
+        ValueError: If field_list is not a list or string
+    """
+    if isinstance(field_list, list):
+        fields = ','.join(field_list)
+    elif isinstance(field_list, str):
+        fields = field_list
+    else:
+        raise ValueError("field_list must be a list or a string")
+    return "fields=" + url_encode(fields)
+
+def sensor_ids(sensor_id):
+    """
+    Normalize a configured sensor ID or list of sensor IDs.
+
+    Args:
+        sensor_id (str, int or list): One sensor ID or a list of them
+
+    Returns:
+        list: Sensor IDs as strings
+    """
+    if isinstance(sensor_id, (list, tuple)):
+        return [str(s) for s in sensor_id]
+    return [str(sensor_id)]
+
 def fetch_sensor_data(api_key, sensor_id, field_list):
     """
     Fetch data for a specific sensor from PurpleAir API.
@@ -53,14 +120,7 @@ def fetch_sensor_data(api_key, sensor_id, field_list):
         "Content-Type": "application/json"
     }
 
-    if isinstance(field_list, list):
-        fields = ','.join(field_list)
-    elif isinstance(field_list, str):
-        fields = field_list
-    else:
-        raise ValueError("field_list must be a list or a string")
-
-    param_string = "fields=" + url_encode(fields)
+    param_string = fields_param(field_list)
 
     try:
         print(f"Fetching data for sensor {sensor_id}")
@@ -86,43 +146,740 @@ def fetch_sensor_data(api_key, sensor_id, field_list):
         print(error_msg)
         raise Exception(error_msg)
 
+class SensorBatch:
+    """
+    Latest data of several sensors, decoded from the columnar response of
+    the /sensors endpoint.
+
+    Each sensor is kept as one tuple of values in the order of `fields`, in
+    `records` keyed by sensor index. `get` combines a field over all sensors
+    so a batch can be used where a single sensor's fields are expected.
+    """
+
+    def __init__(self, fields, records, time_stamp=None):
+        """
+        Args:
+            fields (tuple): Field names, in record order
+            records (dict): Sensor index to tuple of values
+            time_stamp (int): API time of the response
+        """
+        self.fields = fields
+        self.records = records
+        self.time_stamp = time_stamp
+
+    def get_sensor(self, sensor_index, field, default=None):
+        """Return one sensor's value of `field`, or default if it is missing"""
+        record = self.records.get(int(sensor_index))
+        if record is None or field not in self.fields:
+            return default
+        value = record[self.fields.index(field)]
+        return default if value is None else value
+
+    def values(self, field):
+        """Return the values of `field` reported by the sensors"""
+        if field not in self.fields:
+            return []
+        column = self.fields.index(field)
+        return [record[column] for record in self.records.values() if record[column] is not None]
+
+    def get(self, field, default=None):
+        """
+        Return `field` combined over all sensors: the mean of the reported
+        values (rounded down when they are all integers, such as timestamps),
+        or the response time_stamp for "time_stamp".
+        """
+        if field == "time_stamp":
+            return default if self.time_stamp is None else self.time_stamp
+        values = self.values(field)
+        if not values:
+            return default
+        total = sum(values)
+        if isinstance(total, int):
+            return total // len(values)
+        return total / len(values)
+
+def decode_sensor_batch(response):
+    """
+    Decode a /sensors response into a SensorBatch.
+
+    Args:
+        response (dict): Parsed JSON with "fields" and "data" lists
+
+    Returns:
+        SensorBatch: One record per row of "data"
+
+    Raises:
+        ValueError: If the response has no sensor_index column
+    """
+    fields = tuple(response.get("fields", ()))
+    if "sensor_index" not in fields:
+        raise ValueError("Response has no sensor_index field")
+    column = fields.index("sensor_index")
+    records = {}
+    for row in response.get("data", ()):
+        records[row[column]] = tuple(row)
+    return SensorBatch(fields, records, response.get("time_stamp"))
+
+class HttpConnection:
+    """
+    HTTP/1.1 connection to one host that is kept open between requests.
+
+    The socket (and TLS session) is reused for every request until the server
+    closes it, so repeated polls skip the DNS lookup, TCP handshake and TLS
+    handshake. A request on a reused connection that the server has already
+    closed is retried once on a fresh connection.
+
+    The time spent in each phase of the last request, in milliseconds, is kept
+    in `timing`: connect (DNS and TCP), tls, request, headers (waiting for the
+    response headers), body and total. Phases that did not run are 0. The
+    status of the last request is kept in `status`, None if no response
+    came back.
+    """
+
+    CHUNK_SIZE = 256
+
+    def __init__(self, host, port=443, use_ssl=True, timeout=10):
+        """
+        Args:
+            host (str): Server host name
+            port (int): Server port
+            use_ssl (bool): Wrap the socket in TLS
+            timeout (int): Socket timeout in seconds
+        """
+        self.host = host
+        self.port = port
+        self.use_ssl = use_ssl
+        self.timeout = timeout
+        self.connects = 0
+        self.requests = 0
+        self.status = None
+        self.timing = {"connect": 0, "tls": 0, "request": 0, "headers": 0, "body": 0, "total": 0}
+        self._sock = None
+        self._stream = None
+        self._ssl_context = None
+        self._chunk = bytearray(self.CHUNK_SIZE)
+
+    def connected(self):
+        """Return True if a connection is open"""
+        return self._sock is not None
+
+    def connect(self):
+        """Open a new connection, closing any existing one"""
+        self.close()
+        start = ticks_ms()
+        addr = socket.getaddrinfo(self.host, self.port, 0, socket.SOCK_STREAM)[0][-1]
+        sock = socket.socket()
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(addr)
+            connected = ticks_ms()
+            secured = connected
+            if self.use_ssl:
+                if self._ssl_context is None:
+                    context = ssl.SSLContext(ssl.PROTOCOL_TLS_CLIENT)
+                    context.check_hostname = False
+                    context.verify_mode = ssl.CERT_NONE
+                    self._ssl_context = context
+                sock = self._ssl_context.wrap_socket(sock, server_hostname=self.host)
+                secured = ticks_ms()
+        except:
+            sock.close()
+            raise
+        self.timing["connect"] = ticks_diff(connected, start)
+        self.timing["tls"] = ticks_diff(secured, connected)
+        _HTTP_TIMERS["connect"].record(self.timing["connect"] * 1000)
+        if self.use_ssl:
+            _HTTP_TIMERS["tls"].record(self.timing["tls"] * 1000)
+        self._sock = sock
+        # MicroPython sockets are streams already, CPython needs a file object
+        self._stream = sock if hasattr(sock, "readline") else sock.makefile("rwb")
+        self.connects += 1
+
+    def close(self):
+        """Close the connection if it is open"""
+        if self._stream is not None and self._stream is not self._sock:
+            try:
+                self._stream.close()
+            except OSError:
+                pass
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+        self._sock = None
+        self._stream = None
+
+    def request(self, method, path, headers=None, sink=None):
+        """
+        Send a request and read the whole response.
+
+        Args:
+            method (str): HTTP method
+            path (str): Request path including the query string
+            headers (dict): Extra request headers
+            sink (function): Called with a memoryview of each piece of the
+                body as it arrives. The view is only valid during the call.
+                When not given the body is collected and returned.
+
+        Returns:
+            tuple: (status, headers, body) where headers is a dict with
+                lower-case names and body is bytes, or None when a sink is used
+
+        Raises:
+            OSError: For network errors or a malformed response
+        """
+        timing = self.timing
+        for key in timing:
+            timing[key] = 0
+        self.status = None
+        start = ticks_ms()
+
+        lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host}", "Connection: keep-alive"]
+        if headers:
+            for name in headers:
+                lines.append(f"{name}: {headers[name]}")
+        lines.append("\r\n")
+        data = "\r\n".join(lines).encode()
+
+        reused = self.connected()
+        if not reused:
+            self.connect()
+        try:
+            sent = ticks_ms()
+            self._send(data)
+            waiting = ticks_ms()
+            status = self._read_status()
+        except OSError:
+            self.close()
+            if not reused:
+                raise
+            # The server closed the idle connection, try once more on a new one
+            _retry_counter.add()
+            self.connect()
+            sent = ticks_ms()
+            self._send(data)
+            waiting = ticks_ms()
+            status = self._read_status()
+        timing["request"] = ticks_diff(waiting, sent)
+        self.status = status
+
+        try:
+            response_headers = self._read_headers()
+            read = ticks_ms()
+            timing["headers"] = ticks_diff(read, waiting)
+            body = None
+            if sink is None:
+                body = bytearray()
+                sink = body.extend
+            keep_alive = self._read_body(method, status, response_headers, sink)
+            timing["body"] = ticks_diff(ticks_ms(), read)
+        except:
+            self.close()
+            raise
+
+        if not keep_alive:
+            self.close()
+        self.requests += 1
+        timing["total"] = ticks_diff(ticks_ms(), start)
+        if instrument.enabled:
+            for phase in ("request", "headers", "body", "total"):
+                _HTTP_TIMERS[phase].record(timing[phase] * 1000)
+        return status, response_headers, None if body is None else bytes(body)
+
+    def _send(self, data):
+        stream = self._stream
+        stream.write(data)
+        flush = getattr(stream, "flush", None)
+        if flush:
+            flush()
+
+    def _read_status(self):
+        line = self._stream.readline()
+        if not line:
+            raise OSError("Connection closed by server")
+        parts = line.split(None, 2)
+        if len(parts) < 2 or not parts[0].startswith(b"HTTP/"):
+            raise OSError(f"Malformed status line: {line}")
+        return int(parts[1])
+
+    def _read_headers(self):
+        headers = {}
+        while True:
+            line = self._stream.readline()
+            if not line:
+                raise OSError("Connection closed while reading headers")
+            if line == b"\r\n" or line == b"\n":
+                return headers
+            name, _, value = line.decode().partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+    def _read_exactly(self, length, sink):
+        view = memoryview(self._chunk)
+        size = len(view)
+        while length > 0:
+            n = self._stream.readinto(view[:min(length, size)])
+            if not n:
+                raise OSError("Connection closed while reading body")
+            sink(view[:n])
+            length -= n
+
+    def _read_body(self, method, status, headers, sink):
+        """Read the response body into sink. Returns True if the connection can be reused"""
+        keep_alive = headers.get("connection", "").lower() != "close"
+        if method == "HEAD" or status < 200 or status in (204, 304):
+            # These responses never have a body, whatever the headers say
+            return keep_alive
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                line = self._stream.readline()
+                if not line:
+                    raise OSError("Connection closed while reading body")
+                length = int(line.split(b";")[0].strip(), 16)
+                if length == 0:
+                    # Skip any trailers
+                    while self._stream.readline() not in (b"\r\n", b"\n", b""):
+                        pass
+                    return keep_alive
+                self._read_exactly(length, sink)
+                self._stream.readline()
+        elif "content-length" in headers:
+            self._read_exactly(int(headers["content-length"]), sink)
+            return keep_alive
+        else:
+            # No length given, the body ends when the server closes the connection
+            view = memoryview(self._chunk)
+            while True:
+                n = self._stream.readinto(view)
+                if not n:
+                    return False
+                sink(view[:n])
+
+class PurpleAirClient:
+    """
+    PurpleAir API client that reuses one keep-alive HTTPS connection.
+
+    Per-request timing of the last call is available from `timing`, see
+    HttpConnection.
+    """
+
+    def __init__(self, api_key, host=API_HOST, port=443, use_ssl=True, timeout=10):
+        """
+        Args:
+            api_key (str): PurpleAir API key
+            host (str): API host, overridable for testing against a local server
+            port (int): API port
+            use_ssl (bool): Use HTTPS
+            timeout (int): Socket timeout in seconds
+        """
+        self.api_key = api_key
+        self.connection = HttpConnection(host, port, use_ssl, timeout)
+        self.timing = self.connection.timing
+        self._extractors = {}
+
+    def close(self):
+        """Close the connection to the API"""
+        self.connection.close()
+
+    def get(self, path, headers=None, sink=None):
+        """
+        Send an authenticated GET request to the API.
+
+        Args:
+            path (str): Path below /v1, including the query string
+            headers (dict): Extra request headers
+            sink (function): Body sink, see HttpConnection.request
+
+        Returns:
+            tuple: (status, headers, body), see HttpConnection.request
+        """
+        request_headers = {"X-API-Key": self.api_key}
+        if headers:
+            request_headers.update(headers)
+        return self.connection.request("GET", API_PATH + path, request_headers, sink)
+
+    def fetch_sensor_data(self, sensor_id, field_list):
+        """
+        Fetch data for a specific sensor.
+
+        Args:
+            sensor_id (str or int): ID of the sensor to query
+            field_list (list or str): List of fields to retrieve
+
+        Returns:
+            dict: Sensor data in JSON format
+
+        Raises:
+            ValueError: If field_list is not a list or string
+            Exception: For API errors, network errors, or data parsing issues
+        """
+        path = f"/sensors/{sensor_id}?" + fields_param(field_list)
+
+        try:
+            print(f"Fetching data for sensor {sensor_id}")
+            status, _, body = self.get(path)
+
+            if status == 200:
+                start = _parse_timer.start()
+                data = json.loads(body)
+                _parse_timer.stop(start)
+                return data
+            else:
+                error_msg = f"API request failed with status code {status}: {body.decode()}"
+                print(error_msg)
+                raise Exception(error_msg)
+        except ValueError as e:
+            error_msg = f"Request error: {e}"
+            print(error_msg)
+            raise Exception(error_msg)
+        except OSError as e:
+            self.close()
+            error_msg = f"Network error: {e}"
+            print(error_msg)
+            raise Exception(error_msg)
+
+    def fetch_sensors(self, sensor_ids, field_list):
+        """
+        Fetch data for several sensors in one request.
+
+        Args:
+            sensor_ids (list): IDs of the sensors to query
+            field_list (list or str): List of fields to retrieve
+
+        Returns:
+            SensorBatch: Data of the sensors that were found
+
+        Raises:
+            ValueError: If field_list is not a list or string
+            Exception: For API errors, network errors, or data parsing issues
+        """
+        show_only = ",".join(str(s) for s in sensor_ids)
+        path = "/sensors?" + fields_param(field_list) + "&show_only=" + url_encode(show_only)
+
+        try:
+            print(f"Fetching data for sensors {show_only}")
+            status, _, body = self.get(path)
+
+            if status == 200:
+                start = _parse_timer.start()
+                batch = decode_sensor_batch(json.loads(body))
+                _parse_timer.stop(start)
+                return batch
+            else:
+                error_msg = f"API request failed with status code {status}: {body.decode()}"
+                print(error_msg)
+                raise Exception(error_msg)
+        except ValueError as e:
+            error_msg = f"Request error: {e}"
+            print(error_msg)
+            raise Exception(error_msg)
+        except OSError as e:
+            self.close()
+            error_msg = f"Network error: {e}"
+            print(error_msg)
+            raise Exception(error_msg)
+
+    def fetch_sensor_fields(self, sensor_id, field_list):
+        """
+        Fetch data for a specific sensor without building the JSON document.
+
+        The response is streamed from the socket in small chunks through a
+        FieldExtractor that keeps only the requested fields and RESPONSE_KEYS,
+        so memory use does not grow with the size of the response. The same
+        extractor is reused, and overwritten, by every call with the same
+        field_list.
+
+        Args:
+            sensor_id (str or int): ID of the sensor to query
+            field_list (list or str): List of fields to retrieve
+
+        Returns:
+            FieldExtractor: Extracted values, read them with get(field)
+
+        Raises:
+            ValueError: If field_list is not a list or string
+            Exception: For API errors or network errors
+        """
+        param_string = fields_param(field_list)
+        extractor = self._extractors.get(param_string)
+        if extractor is None:
+            names = field_list if isinstance(field_list, list) else field_list.split(",")
+            extractor = FieldExtractor(names + RESPONSE_KEYS)
+            self._extractors[param_string] = extractor
+        extractor.reset()
+
+        try:
+            print(f"Fetching data for sensor {sensor_id}")
+            status, _, _ = self.get(f"/sensors/{sensor_id}?" + param_string, sink=extractor.feed)
+
+            if status == 200:
+                return extractor
+            else:
+                error_msg = f"API request failed with status code {status}: {extractor.get('description', extractor.get('error'))}"
+                print(error_msg)
+                raise Exception(error_msg)
+        except OSError as e:
+            self.close()
+            error_msg = f"Network error: {e}"
+            print(error_msg)
+            raise Exception(error_msg)
+
+class LocalSensorData:
+    """
+    Fields of one reading from a sensor's local /json payload, named like the
+    API fields. "time_stamp" and "last_seen" are both the reading's DateTime.
+    """
+
+    def __init__(self, field_list):
+        """
+        Args:
+            field_list (list): API field names to provide
+        """
+        keys = ["DateTime"]
+        for field in field_list:
+            for key in LOCAL_FIELDS.get(field, ()):
+                if key not in keys:
+                    keys.append(key)
+        self.field_list = field_list
+        self.extractor = FieldExtractor(keys)
+
+    def get(self, field, default=None):
+        """Return the value of an API field, or default if the sensor did not report it"""
+        if field == "time_stamp" or field == "last_seen":
+            date_time = self.extractor.get("DateTime")
+            return default if date_time is None else parse_sensor_datetime(date_time)
+        keys = LOCAL_FIELDS.get(field)
+        if not keys:
+            return default
+        if len(keys) == 1:
+            return self.extractor.get(keys[0], default)
+        total = 0
+        count = 0
+        for key in keys:
+            value = self.extractor.get(key)
+            if value is not None:
+                total += value
+                count += 1
+        return total / count if count else default
+
+class LocalSensorClient:
+    """
+    Client for a PurpleAir sensor's own /json endpoint on the local network.
+
+    Readings come straight from the sensor over plain HTTP, so there is no TLS
+    handshake, no API key or points, and the data is never older than the
+    sensor's own sampling. The fetch methods take the same arguments as
+    PurpleAirClient's so either client can be used by main.py; the sensor_id
+    argument is ignored.
+    """
+
+    def __init__(self, host, port=80, timeout=5):
+        """
+        Args:
+            host (str): Sensor IP address or host name
+            port (int): Sensor HTTP port
+            timeout (int): Socket timeout in seconds
+        """
+        self.connection = HttpConnection(host, port, False, timeout)
+        self.timing = self.connection.timing
+        self._readings = {}
+
+    def close(self):
+        """Close the connection to the sensor"""
+        self.connection.close()
+
+    def fetch_sensor_fields(self, sensor_id, field_list):
+        """
+        Fetch a reading, streaming the payload through a FieldExtractor.
+
+        Args:
+            sensor_id: Ignored, the sensor is the one at `host`
+            field_list (list or str): API field names to retrieve
+
+        Returns:
+            LocalSensorData: The reading, read values with get(field). The
+                same object is reused by every call with the same field_list.
+
+        Raises:
+            ValueError: If field_list is not a list or string
+            Exception: For HTTP errors or network errors
+        """
+        param_string = fields_param(field_list)
+        reading = self._readings.get(param_string)
+        if reading is None:
+            names = field_list if isinstance(field_list, list) else field_list.split(",")
+            reading = LocalSensorData(names)
+            self._readings[param_string] = reading
+        reading.extractor.reset()
+
+        try:
+            print(f"Fetching data from sensor at {self.connection.host}")
+            status, _, _ = self.connection.request("GET", "/json", sink=reading.extractor.feed)
+
+            if status == 200:
+                return reading
+            else:
+                error_msg = f"Sensor request failed with status code {status}"
+                print(error_msg)
+                raise Exception(error_msg)
+        except OSError as e:
+            self.close()
+            error_msg = f"Network error: {e}"
+            print(error_msg)
+            raise Exception(error_msg)
+
+    def fetch_sensor_data(self, sensor_id, field_list):
+        """
+        Fetch a reading shaped like an API response.
+
+        Returns:
+            dict: {"time_stamp": ..., "sensor": {field: value, ...}}
+        """
+        reading = self.fetch_sensor_fields(sensor_id, field_list)
+        sensor = {}
+        for field in reading.field_list:
+            sensor[field] = reading.get(field)
+        return {"time_stamp": reading.get("time_stamp"), "sensor": sensor}
+
+class MetadataCache:
+    """
+    Sensor metadata kept in a JSON file on flash.
+
+    Metadata such as the sensor name and location rarely changes, so it is
+    served from the file at startup without any network I/O and refreshed
+    once it is older than `ttl`. Ages are measured in API time (the
+    `time_stamp` of responses) because the device clock is not set at boot.
+    Refreshes send If-None-Match / If-Modified-Since when the API gave an
+    ETag or Last-Modified header, and a 304 response only renews the entry.
+    """
+
+    def __init__(self, path, sensor_id, field_list, ttl=7 * 24 * 3600):
+        """
+        Args:
+            path (str): Cache file path
+            sensor_id (str or int): ID of the sensor
+            field_list (list or str): Metadata fields to retrieve
+            ttl (int): Seconds before cached metadata is refreshed
+        """
+        self.path = path
+        self.sensor_id = str(sensor_id)
+        self.fields = fields_param(field_list)
+        self.ttl = ttl
+        self.data = None
+        self.fetched = 0
+        self.etag = None
+        self.last_modified = None
+
+    def load(self):
+        """
+        Load cached metadata from flash.
+
+        Returns:
+            dict: The cached response, or None if there is no usable entry
+        """
+        try:
+            with open(self.path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if entry.get("sensor_id") != self.sensor_id or entry.get("fields") != self.fields:
+            return None
+        self.data = entry.get("data")
+        self.fetched = entry.get("fetched", 0)
+        self.etag = entry.get("etag")
+        self.last_modified = entry.get("last_modified")
+        return self.data
+
+    def save(self):
+        """Write the entry to flash, replacing the old file only once complete"""
+        entry = {
+            "sensor_id": self.sensor_id,
+            "fields": self.fields,
+            "fetched": self.fetched,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "data": self.data,
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(entry, f)
+        os.rename(temp_path, self.path)
+
+    def is_stale(self, now):
+        """
+        Check whether the metadata should be refreshed.
+
+        Args:
+            now (int): Current API time, e.g. the time_stamp of the last poll
+        """
+        return self.data is None or now - self.fetched >= self.ttl
+
+    def refresh(self, client, now):
+        """
+        Fetch the metadata from the API and update the cache.
+
+        Args:
+            client (PurpleAirClient): Client to fetch with
+            now (int): Current API time, used when the API reports no changes
+
+        Returns:
+            bool: True if the metadata changed
+
+        Raises:
+            Exception: For API errors, network errors, or data parsing issues
+        """
+        headers = {}
+        if self.data is not None:
+            if self.etag:
+                headers["If-None-Match"] = self.etag
+            if self.last_modified:
+                headers["If-Modified-Since"] = self.last_modified
+
+        try:
+            print(f"Refreshing metadata for sensor {self.sensor_id}")
+            status, response_headers, body = client.get(f"/sensors/{self.sensor_id}?" + self.fields, headers)
+
+            if status == 304:
+                self.fetched = now
+                changed = False
+            elif status == 200:
+                self.data = json.loads(body)
+                self.fetched = self.data.get("time_stamp", now)
+                self.etag = response_headers.get("etag")
+                self.last_modified = response_headers.get("last-modified")
+                changed = True
+            else:
+                error_msg = f"API request failed with status code {status}: {body.decode()}"
+                print(error_msg)
+                raise Exception(error_msg)
+        except ValueError as e:
+            error_msg = f"Request error: {e}"
+            print(error_msg)
+            raise Exception(error_msg)
+        except OSError as e:
+            client.close()
+            error_msg = f"Network error: {e}"
+            print(error_msg)
+            raise Exception(error_msg)
+
+        try:
+            self.save()
+        except OSError as e:
+            print(f"Could not save metadata cache: {e}")
+        return changed
+
 # Convert US AQI from raw pm2.5 data
+#
+# Kept for compatibility: returns "-" for 'undefined' or readings above 1000
+# and negative readings unchanged. New code should use the scales in
+# aqiscale, which return None for any reading that cannot be converted.
 def aqiFromPM(pm):
     if pm == 'undefined':
         return "-"
-    if not float(pm):
-        return "-"
     if pm < 0:
         return pm
-    if pm > 1000:
-        return "-"
-    """
-                                        AQI   | RAW PM2.5
-    Good                               0 - 50 | 0.0 – 12.0
-    Moderate                         51 - 100 | 12.1 – 35.4
-    Unhealthy for Sensitive Groups  101 – 150 | 35.5 – 55.4
-    Unhealthy                       151 – 200 | 55.5 – 150.4
-    Very Unhealthy                  201 – 300 | 150.5 – 250.4
-    Hazardous                       301 – 400 | 250.5 – 350.4
-    Hazardous                       401 – 500 | 350.5 – 500.4
-    """
-
-    if pm > 350.5:
-        return calcAQI(pm, 500, 401, 500.4, 350.5)  # Hazardous
-    elif pm > 250.5:
-        return calcAQI(pm, 400, 301, 350.4, 250.5)  # Hazardous
-    elif pm > 150.5:
-        return calcAQI(pm, 300, 201, 250.4, 150.5)  # Very Unhealthy
-    elif pm > 55.5:
-        return calcAQI(pm, 200, 151, 150.4, 55.5)  # Unhealthy
-    elif pm > 35.5:
-        return calcAQI(pm, 150, 101, 55.4, 35.5)  # Unhealthy for Sensitive Groups
-    elif pm > 12.1:
-        return calcAQI(pm, 100, 51, 35.4, 12.1)  # Moderate
-    elif pm >= 0:
-        return calcAQI(pm, 50, 0, 12, 0)  # Good
-    else:
-        return 'undefined'
+    result = PM25_2012.aqi(float(pm))
+    return "-" if result is None else result
 
 def aqiColor(aqi):
     aqi = round(aqi)
@@ -0,0 +1,183 @@
+"""
+Poll scheduling from data freshness and the API budget
+
+A PurpleAir sensor uploads a reading every reporting period (2 minutes), and
+the API serves the same reading until the next upload. Polling on a fixed
+timer either shows stale values or pays for responses that did not change.
+PollScheduler works out from a response's `last_seen` and `time_stamp` when
+the next upload is due and schedules the next poll just after it. Responses
+with unchanged data and failed polls are retried after an exponential
+backoff, and every delay is stretched as needed to stay within a daily
+budget of API points. Only polls that reached the API are charged against
+the budget, so a network outage does not use it up.
+"""
+
+from utils import ticks_ms, ticks_diff, backoff_delay
+
+DAY_MS = 24 * 3600 * 1000
+
+class PollScheduler:
+    """Chooses the delay before each poll"""
+
+    def __init__(self, period_s=120, margin_s=15, jitter_s=5, min_s=10, max_s=900,
+                 retry_ms=15000, max_retry_ms=600000, points_per_day=None, points_per_poll=1,
+                 randrange=None):
+        """
+        Args:
+            period_s (int): Sensor reporting period
+            margin_s (int): Time after the expected upload before the API serves it
+            jitter_s (int): Random delay added to each poll, so displays on the
+                same sensor do not poll in step
+            min_s (int): Shortest delay between polls
+            max_s (int): Longest delay between polls, also the backoff limit
+                for unchanged data
+            retry_ms (int): Delay after the first failed poll
+            max_retry_ms (int): Longest delay after failed polls
+            points_per_day (int): API points that may be spent per day, None for no limit
+            points_per_poll (int): API points each poll costs
+            randrange (function): Random source for the jitter, see utils.backoff_delay
+        """
+        if randrange is None:
+            import random
+            randrange = random.randrange
+        self.period_ms = period_s * 1000
+        self.margin_ms = margin_s * 1000
+        self.jitter_ms = jitter_s * 1000
+        self.min_ms = min_s * 1000
+        self.max_ms = max_s * 1000
+        self.retry_ms = retry_ms
+        self.max_retry_ms = max_retry_ms
+        self.points_per_poll = points_per_poll
+        self.randrange = randrange
+
+        self.last_seen = None
+        self.unchanged = 0      # Consecutive polls that returned the same reading
+        self.errors = 0         # Consecutive failed polls
+        self.polls = 0
+        self.stale_polls = 0
+        self.points_spent = 0
+        self._started = ticks_ms()
+
+        # Token bucket refilled at the daily rate, holding up to an hour's
+        # worth of points so a few quick polls do not push the next ones out
+        self.points_per_day = points_per_day
+        if points_per_day:
+            self.capacity = max(points_per_day / 24, points_per_poll)
+            self.points = self.capacity
+        else:
+            self.capacity = self.points = None
+        self._refilled = self._started
+
+    def _refill(self, now):
+        if self.points_per_day:
+            elapsed = ticks_diff(now, self._refilled)
+            self.points = min(self.capacity, self.points + elapsed * self.points_per_day / DAY_MS)
+        self._refilled = now
+
+    def _spend(self, now):
+        self.polls += 1
+        self.points_spent += self.points_per_poll
+        self._refill(now)
+        if self.points_per_day:
+            self.points -= self.points_per_poll
+
+    def budget_delay_ms(self):
+        """Return how long until the budget allows another poll, 0 if it does now"""
+        if not self.points_per_day:
+            return 0
+        self._refill(ticks_ms())
+        missing = self.points_per_poll - self.points
+        if missing <= 0:
+            return 0
+        return int(missing * DAY_MS / self.points_per_day) + 1
+
+    def _limit(self, delay_ms):
+        return max(delay_ms, self.budget_delay_ms())
+
+    def next_upload_ms(self, time_stamp, last_seen):
+        """
+        Return the time until the sensor's next upload should be served.
+
+        Args:
+            time_stamp (int): API time of the response, in seconds
+            last_seen (int): Time of the sensor's last upload, in seconds
+
+        Returns:
+            int: Delay in ms; when uploads were missed, the next period boundary
+        """
+        age_ms = max(time_stamp - last_seen, 0) * 1000
+        periods = age_ms // self.period_ms + 1
+        return periods * self.period_ms - age_ms + self.margin_ms
+
+    def on_success(self, time_stamp, last_seen):
+        """
+        Record a successful poll.
+
+        Args:
+            time_stamp (int): API time of the response, None if unknown
+            last_seen (int): Upload time of the reading, None if unknown
+
+        Returns:
+            int: Delay in ms before the next poll
+        """
+        self._spend(ticks_ms())
+        self.errors = 0
+        if last_seen is not None and last_seen == self.last_seen:
+            self.unchanged += 1
+            self.stale_polls += 1
+        else:
+            self.unchanged = 0
+        self.last_seen = last_seen
+
+        if time_stamp is None or last_seen is None:
+            delay = self.period_ms
+        else:
+            delay = self.next_upload_ms(time_stamp, last_seen)
+        if self.unchanged:
+            # The upload did not arrive when due, the sensor may be offline
+            delay = max(delay, backoff_delay(self.unchanged - 1, self.period_ms, self.max_ms, self.randrange))
+        if self.jitter_ms:
+            delay += self.randrange(self.jitter_ms + 1)
+        delay = min(max(delay, self.min_ms), self.max_ms)
+        return self._limit(delay)
+
+    def on_error(self, charged=True):
+        """
+        Record a failed poll.
+
+        Args:
+            charged (bool): Whether the request reached the API and may have
+                cost points, e.g. it got an HTTP status back. DNS, connect and
+                TLS failures are not charged
+
+        Returns:
+            int: Delay in ms before the next attempt
+        """
+        if charged:
+            self._spend(ticks_ms())
+        delay = backoff_delay(self.errors, self.retry_ms, self.max_retry_ms, self.randrange)
+        self.errors += 1
+        return self._limit(delay)
+
+    def points_rate(self):
+        """Return the points spent per day at the rate since start, 0 if under a minute"""
+        elapsed = ticks_diff(ticks_ms(), self._started)
+        if elapsed < 60000:
+            return 0
+        return self.points_spent * DAY_MS // elapsed
+
+    def stats(self):
+        """
+        Return the polling statistics.
+
+        Returns:
+            dict: polls, stale_polls (unchanged data), errors (consecutive),
+                points_spent and points_rate (per day, since start)
+        """
+        return {
+            "polls": self.polls,
+            "stale_polls": self.stale_polls,
+            "errors": self.errors,
+            "points_spent": self.points_spent,
+            "points_rate": self.points_rate(),
+        }
@@ -0,0 +1,87 @@
+"""
+PM2.5 trend for the sparkline view
+
+Trend splits the last few hours into one time bucket per display column and
+keeps the minimum, maximum and mean of each bucket in fixed arrays. Every
+reading is folded into its bucket in O(1) as it arrives, so the sparkline
+is ready whenever it is shown and drawing it never goes back to the history.
+"""
+
+from array import array
+
+class Trend:
+    """Min, max and mean of PM2.5 per time bucket, one bucket per column"""
+
+    def __init__(self, columns=16, hours=8):
+        """
+        Args:
+            columns (int): Number of buckets, the display width
+            hours (int): Time covered by all the buckets
+        """
+        self.columns = columns
+        self.bucket_s = hours * 3600 // columns
+        self._mins = array('f', [0.0] * columns)
+        self._maxs = array('f', [0.0] * columns)
+        self._sums = array('f', [0.0] * columns)
+        self._counts = array('H', [0] * columns)
+        self._buckets = array('L', [0] * columns)
+        self.latest = 0
+        self.version = 0          # Changes whenever a reading is added
+
+    def add(self, timestamp, value):
+        """
+        Add a reading.
+
+        Args:
+            timestamp (int): Unix time of the reading
+            value (float): PM2.5 concentration
+
+        Returns:
+            bool: False if the reading is not newer than the latest one or
+                not a valid value, and was ignored
+        """
+        if timestamp <= self.latest or value is None or value < 0:
+            return False
+        self.latest = timestamp
+        bucket = timestamp // self.bucket_s
+        slot = bucket % self.columns
+        if self._buckets[slot] != bucket or not self._counts[slot]:
+            self._buckets[slot] = bucket
+            self._mins[slot] = value
+            self._maxs[slot] = value
+            self._sums[slot] = 0.0
+            self._counts[slot] = 0
+        elif value < self._mins[slot]:
+            self._mins[slot] = value
+        elif value > self._maxs[slot]:
+            self._maxs[slot] = value
+        self._sums[slot] += value
+        self._counts[slot] += 1
+        self.version += 1
+        return True
+
+    def column(self, i):
+        """
+        Return the statistics of one column, 0 being the oldest.
+
+        The newest column holds the bucket of the latest reading.
+
+        Returns:
+            tuple: (min, max, mean), or None if the bucket has no readings
+        """
+        if not self.latest:
+            return None
+        bucket = self.latest // self.bucket_s - (self.columns - 1 - i)
+        slot = bucket % self.columns
+        if self._buckets[slot] != bucket or not self._counts[slot]:
+            return None
+        return self._mins[slot], self._maxs[slot], self._sums[slot] / self._counts[slot]
+
+    def peak(self):
+        """Return the highest maximum over the columns, 0 if there are none"""
+        peak = 0.0
+        for i in range(self.columns):
+            stats = self.column(i)
+            if stats is not None and stats[1] > peak:
+                peak = stats[1]
+        return peak
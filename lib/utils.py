@@ -2,6 +2,25 @@
 # Various helpful utility functions
 #
 
+try:
+    from time import ticks_ms, ticks_us, ticks_diff, ticks_add
+except ImportError:
+    # Not running on MicroPython: provide the ticks API from the host clock so
+    # library modules can be exercised with CPython
+    import time as _time
+
+    def ticks_ms():
+        return int(_time.monotonic() * 1000)
+
+    def ticks_us():
+        return int(_time.monotonic() * 1000000)
+
+    def ticks_diff(ticks1, ticks2):
+        return ticks1 - ticks2
+
+    def ticks_add(ticks, delta):
+        return ticks + delta
+
 def format_time(time_tuple):
     """
     Convert MicroPython time tuple to human-readable timestamp.
@@ -19,4 +38,66 @@ def format_time(time_tuple):
     # Format with leading zeros where needed
     return "{:04d}-{:02d}-{:02d} {:02d}:{:02d}:{:02d}".format(
         year, month, day, hour, minute, second
-    )
\ No newline at end of file
+    )
+
+def epoch_seconds(year, month, day, hour=0, minute=0, second=0):
+    """
+    Convert a UTC date and time to seconds since 1970-01-01.
+
+    Computed directly rather than with time.mktime, whose epoch depends on
+    the MicroPython port.
+
+    Returns:
+        int: Unix timestamp
+    """
+    # Days from civil, counting years from March so the leap day is last
+    if month <= 2:
+        year -= 1
+    era = year // 400
+    year_of_era = year - era * 400
+    day_of_year = (153 * (month + (-3 if month > 2 else 9)) + 2) // 5 + day - 1
+    day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+    days = era * 146097 + day_of_era - 719468
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+def parse_sensor_datetime(text):
+    """
+    Parse the DateTime of a PurpleAir sensor's local JSON.
+
+    Args:
+        text (str): Timestamp in the form "2025/09/01T03:04:38z" (UTC)
+
+    Returns:
+        int: Unix timestamp
+
+    Raises:
+        ValueError: If the text is not in the expected form
+    """
+    try:
+        date, _, clock = text.partition("T")
+        year, month, day = date.split("/")
+        hour, minute, second = clock.rstrip("zZ").split(":")
+        return epoch_seconds(int(year), int(month), int(day), int(hour), int(minute), int(second))
+    except (ValueError, AttributeError):
+        raise ValueError(f"Invalid sensor DateTime: {text}")
+
+def backoff_delay(attempt, base_ms, max_ms, randrange=None):
+    """
+    Delay before a retry, doubling with each failed attempt, plus jitter.
+
+    Args:
+        attempt (int): Number of failed attempts so far, starting at 0
+        base_ms (int): Delay after the first failure
+        max_ms (int): Longest delay
+        randrange (function): Random source taking an exclusive upper bound,
+            random.randrange by default
+
+    Returns:
+        int: Delay in ms, up to 50% longer than the doubled delay but never
+            more than max_ms
+    """
+    if randrange is None:
+        import random
+        randrange = random.randrange
+    delay = min(base_ms << min(attempt, 16), max_ms)
+    return min(delay + randrange(delay // 2 + 1), max_ms)
@@ -1,102 +1,385 @@
+import binascii
+import json
+import os
+import time
 import network
 import config
-import time
+from utils import ticks_ms, ticks_diff
+from pixelfonts.basefont import compile_glyph
+
+WIFI_LOGO = [
+    '..######..',
+    '.########.',
+    '##......##',
+    '#..####..#',
+    '..######..',
+    '..#....#..',
+    '....##....',
+    '....##....',
+]
+
+# Logo as 1-bit column masks, for FrameBuffer.blit
+LOGO = compile_glyph(WIFI_LOGO)
 
 def draw_logo(x0, y0, pixel_function, *args, **kwargs):
-    WIFI_LOGO = [
-        '..######..',
-        '.########.',
-        '##......##',
-        '#..####..#',
-        '..######..',
-        '..#....#..',
-        '....##....',
-        '....##....',
-    ]
-
-    for y, row in enumerate(WIFI_LOGO):
-        for x, col in enumerate(row):
-            if col == '#':
-                pixel_function(x + x0, y + y0, *args, **kwargs)
+    x = x0
+    for mask in LOGO:
+        y = y0
+        while mask:
+            if mask & 1:
+                pixel_function(x, y, *args, **kwargs)
+            mask >>= 1
+            y += 1
+        x += 1
 
 def isconnected():
     wlan = network.WLAN(network.STA_IF)
     return wlan.isconnected()
 
-def do_connect():
-    # Constants for connection
-    MAX_RETRIES = 10        # Number of retries before resetting WLAN
-    SHORT_DELAY = 1000      # Milliseconds between connection attempts
-    CONNECTION_TIMEOUT = 20 # Seconds to wait for connection before timeout
-    
+def set_power_save(enabled=True):
+    # Modem sleep: the radio sleeps between access point beacons while the
+    # connection stays up. Ports without the `pm` option keep their default
+    wlan = network.WLAN(network.STA_IF)
+    try:
+        wlan.config(pm=wlan.PM_POWERSAVE if enabled else wlan.PM_NONE)
+        return True
+    except (AttributeError, ValueError) as e:
+        print(f"Wi-Fi power save not available: {e}")
+        return False
+
+# Last good access point, kept on flash so reconnects and cold boots can skip
+# the scan
+LINK_CACHE_PATH = "wifi.json"
+
+TARGETED_TIMEOUT_MS = 5000   # Association with a known BSSID
+SCAN_TIMEOUT_MS = 20000      # Association after a full scan
+POLL_MS = 100
+
+class LinkCache:
+    """
+    BSSID, channel and IP settings of the last successful connection.
+
+    The entry is only used for the SSID it was saved for.
+    """
+
+    def __init__(self, path=LINK_CACHE_PATH):
+        self.path = path
+        self.ssid = None
+        self.bssid = None      # bytes
+        self.channel = None
+        self.ifconfig = None   # (ip, netmask, gateway, dns) of the last lease
+
+    def load(self, ssid):
+        """
+        Load the entry for `ssid` from flash.
+
+        Returns:
+            bool: True if there is a usable entry
+        """
+        try:
+            with open(self.path) as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if entry.get("ssid") != ssid or not entry.get("bssid"):
+            return False
+        self.ssid = ssid
+        self.bssid = binascii.unhexlify(entry["bssid"])
+        self.channel = entry.get("channel")
+        ifconfig = entry.get("ifconfig")
+        self.ifconfig = tuple(ifconfig) if ifconfig else None
+        return True
+
+    def save(self):
+        """Write the entry to flash, replacing the old file only once complete"""
+        entry = {
+            "ssid": self.ssid,
+            "bssid": binascii.hexlify(self.bssid).decode() if self.bssid else None,
+            "channel": self.channel,
+            "ifconfig": self.ifconfig,
+        }
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(entry, f)
+        os.rename(temp_path, self.path)
+
+def _wait_connected(wlan, timeout_ms):
+    # Returns True once connected, False on timeout or when the access point
+    # was not found. Raises ValueError for a wrong password
+    start = ticks_ms()
+    while not wlan.isconnected():
+        if ticks_diff(ticks_ms(), start) > timeout_ms:
+            print(f"Connection timeout after {timeout_ms} ms")
+            return False
+        status = wlan.status()
+        if status == network.STAT_WRONG_PASSWORD:
+            print("Wrong password! Check your config.")
+            raise ValueError("Wrong password")
+        elif status == network.STAT_NO_AP_FOUND:
+            print("Network not found! Check SSID in config.")
+            return False
+        elif status == network.STAT_CONNECT_FAIL:
+            print("Connection failed!")
+            return False
+        time.sleep(POLL_MS / 1000)
+    return True
+
+def _best_access_point(wlan, ssid):
+    # Strongest access point broadcasting `ssid` as (bssid, channel, rssi), or None
+    best = None
+    for found in wlan.scan():
+        name, bssid, channel, rssi = found[0], found[1], found[2], found[3]
+        if name == ssid.encode() and (best is None or rssi > best[2]):
+            best = (bssid, channel, rssi)
+    return best
+
+def _associate(wlan, ssid, psk, bssid, channel, timeout_ms):
+    if channel:
+        try:
+            wlan.config(channel=channel)
+        except (ValueError, OSError):
+            # Not settable on this port for a station, the BSSID is enough
+            pass
+    if bssid:
+        wlan.connect(ssid, psk, bssid=bssid)
+    else:
+        wlan.connect(ssid, psk)
+    return _wait_connected(wlan, timeout_ms)
+
+def do_connect(cache_path=LINK_CACHE_PATH, rescan=False):
+    """
+    Connect to the configured network once.
+
+    The access point of the last good connection is tried first, without a
+    scan (and with its last IP settings when `reuse_lease` is set, or the
+    configured `static_ip`). If that fails the network is scanned and the
+    strongest access point is used, and the cache updated. Retrying with a
+    backoff is left to the caller.
+
+    Args:
+        cache_path (str): Link cache file, see LinkCache
+        rescan (bool): Skip the cached access point, e.g. to move away from
+            one with a weak signal
+
+    Returns:
+        bool: True if connected
+    """
+    ssid = config.CONFIG['ssid']
+    psk = config.CONFIG['psk']
     wlan = network.WLAN(network.STA_IF)
     wlan.active(True)
+    if wlan.isconnected():
+        return True
 
+    cache = LinkCache(cache_path)
+    start = ticks_ms()
     try:
-        if not wlan.isconnected():
-            print('Connecting to network... ' + config.CONFIG['ssid'])
-            
-            # Reset connection state
+        static_ip = config.CONFIG.get('static_ip')
+        if static_ip:
+            wlan.ifconfig(tuple(static_ip))
+
+        if not rescan and cache.load(ssid):
+            print(f"Connecting to network {ssid} on channel {cache.channel}...")
+            if cache.ifconfig and config.CONFIG.get('reuse_lease') and not static_ip:
+                wlan.ifconfig(cache.ifconfig)
+            if _associate(wlan, ssid, psk, cache.bssid, cache.channel, TARGETED_TIMEOUT_MS):
+                print(f"Connected in {ticks_diff(ticks_ms(), start)} ms (cached access point)")
+                return True
             wlan.disconnect()
-            wlan.active(False)
+            if cache.ifconfig and config.CONFIG.get('reuse_lease') and not static_ip:
+                # The old lease may be the problem, go back to DHCP
+                wlan.ifconfig('dhcp')
 
-            time.sleep(1)  # Brief pause after disconnect
+        print(f"Scanning for network {ssid}...")
+        found = _best_access_point(wlan, ssid)
+        bssid, channel = found[:2] if found else (None, None)
+        if not _associate(wlan, ssid, psk, bssid, channel, SCAN_TIMEOUT_MS):
+            print(f"Connection failed after {ticks_diff(ticks_ms(), start)} ms")
+            wlan.disconnect()
+            return False
+
+        print(f"Connected in {ticks_diff(ticks_ms(), start)} ms (scan)")
+        print('Network config:', wlan.ifconfig())
+        if bssid:
+            cache.ssid = ssid
+            cache.bssid = bssid
+            cache.channel = channel
+            cache.ifconfig = wlan.ifconfig()
+            cache.save()
+        return True
 
-            # Attempt to connect
-            wlan.active(True)
-            wlan.connect(config.CONFIG['ssid'], config.CONFIG['psk'])
-            
-            # Set a deadline for connection attempt
-            start_time = time.ticks_ms()
-            retry_count = 0
-            
-            # Wait for connection with timeout
-            while not wlan.isconnected():
-                # Check for timeout
-                if time.ticks_diff(time.ticks_ms(), start_time) > CONNECTION_TIMEOUT * 1000:
-                    print(f"Connection timeout after {CONNECTION_TIMEOUT} seconds")
-                    break
-                
-                # Periodically check status
-                status = wlan.status()
-                if status == network.STAT_CONNECTING:
-                    print("Still connecting...")
-                elif status == network.STAT_WRONG_PASSWORD:
-                    print("Wrong password! Check your config.")
-                    raise ValueError("Wrong password")
-                elif status == network.STAT_NO_AP_FOUND:
-                    print("Network not found! Check SSID in config.")
-                    raise ValueError("Network not found")
-                elif status == network.STAT_CONNECT_FAIL:
-                    print("Connection failed!")
-                    raise Exception("Connection failed")
-                else:
-                    raise Exception("Unknown connection error")
-
-                time.sleep_ms(SHORT_DELAY)
-                
-        # If successfully connected, print info and exit
-        if wlan.isconnected():
-            print('Connected! Network config:', wlan.ifconfig())
-            return True
-        
     except OSError as e:
-        print(f"Network error: {e}")
+        print(f"Network error after {ticks_diff(ticks_ms(), start)} ms: {e}")
         print("Resetting WLAN adapter...")
         try:
             wlan.active(False)
-            time.sleep(2)
             wlan.active(True)
         except Exception as e2:
             print(f"Error resetting WLAN: {e2}")
-        time.sleep(5)
-        
-    except Exception as e:
-        print(f"Unexpected error: {e}")
-        time.sleep(5)
-    
+
     return False
 
+class LinkSupervisor:
+    """
+    Watches the station link and brings it back.
+
+    `check` is called on a timer and reports whether the link is usable: it
+    must be connected with an IP address. It never blocks: when the RSSI
+    stays below `weak_rssi` for `weak_checks` checks in a row, at most once
+    per `roam_interval_ms`, it only reports the link unusable so that
+    `recover`, which the caller runs off the event loop, scans for another
+    access point. `recover` moves to one only if it is stronger by
+    `roam_margin`; a weak link with nowhere better to go is kept as it is.
+    Otherwise `recover` just reconnects. Link uptime and reconnect counts are
+    kept for reporting.
+    """
+
+    def __init__(self, connect=do_connect, weak_rssi=-85, weak_checks=3, roam_margin=8,
+                 roam_interval_ms=300000, cache_path=LINK_CACHE_PATH, wlan=None):
+        """
+        Args:
+            connect (function): Connects once, called as connect(rescan=...)
+            weak_rssi (int): Signal level in dBm below which the link is weak
+            weak_checks (int): Consecutive weak checks before looking for
+                another access point
+            roam_margin (int): How many dB stronger another access point must
+                be to move to it
+            roam_interval_ms (int): Minimum time between scans for another
+                access point
+            cache_path (str): Link cache file naming the current access
+                point, see LinkCache
+            wlan: Station interface, network.WLAN(network.STA_IF) by default
+        """
+        self.connect = connect
+        self.weak_rssi = weak_rssi
+        self.weak_checks = weak_checks
+        self.roam_margin = roam_margin
+        self.roam_interval_ms = roam_interval_ms
+        self.cache_path = cache_path
+        self.wlan = wlan or network.WLAN(network.STA_IF)
+        self.link_up = False
+        self.rssi = None
+        self.connects = 0      # Successful connections
+        self.drops = 0         # Links lost while up
+        self.roams = 0         # Links dropped on purpose for a weak signal
+        self.roam_scans = 0    # Scans for a better access point
+        self.checks = 0
+        self._weak = 0
+        self._roam = False
+        self._last_roam_scan = None
+        self._up_since = 0
+        self._uptime_ms = 0    # Total of the finished link periods
+
+    def _link_down(self, now):
+        if self.link_up:
+            self._uptime_ms += ticks_diff(now, self._up_since)
+            self.link_up = False
+
+    def check(self):
+        """
+        Read the link status and signal level.
+
+        Returns:
+            bool: True if the link is up and usable
+        """
+        self.checks += 1
+        now = ticks_ms()
+        connected = self.wlan.isconnected() and self.wlan.status() == network.STAT_GOT_IP
+        if not connected:
+            if self.link_up:
+                self.drops += 1
+                print(f"Wi-Fi link lost after {ticks_diff(now, self._up_since) // 1000} seconds")
+            self._link_down(now)
+            self._weak = 0
+            return False
+
+        if not self.link_up:
+            self.link_up = True
+            self._up_since = now
+        try:
+            self.rssi = self.wlan.status('rssi')
+        except (ValueError, OSError):
+            self.rssi = None
+        if self.rssi is not None and self.rssi < self.weak_rssi:
+            self._weak += 1
+            if self._weak >= self.weak_checks:
+                self._weak = 0
+                if self._last_roam_scan is None or ticks_diff(now, self._last_roam_scan) >= self.roam_interval_ms:
+                    # Have recover look for a better access point
+                    print(f"Wi-Fi signal weak ({self.rssi} dBm), looking for a better access point")
+                    self._last_roam_scan = now
+                    self._roam = True
+                    return False
+        else:
+            self._weak = 0
+        return True
+
+    def _better_access_point(self):
+        # Scan, blocking, and return True if another access point is
+        # stronger than the current link by the margin
+        self.roam_scans += 1
+        ssid = config.CONFIG['ssid']
+        try:
+            found = _best_access_point(self.wlan, ssid)
+        except OSError as e:
+            print(f"Wi-Fi scan failed: {e}")
+            return False
+        cache = LinkCache(self.cache_path)
+        current = cache.bssid if cache.load(ssid) else None
+        if found is None or found[0] == current or found[2] < self.rssi + self.roam_margin:
+            print("No better access point, keeping the link")
+            return False
+        print(f"Moving to an access point at {found[2]} dBm")
+        return True
+
+    def recover(self):
+        """
+        Reconnect once, or look for a better access point when `check` asked
+        for it, blocking.
+
+        Returns:
+            bool: True if connected
+        """
+        rescan = self._roam
+        if rescan:
+            self._roam = False
+            if self.wlan.isconnected():
+                if not self._better_access_point():
+                    return True
+                self.roams += 1
+                self._link_down(ticks_ms())
+                self.wlan.disconnect()
+        connected = self.connect(rescan=rescan)
+        if connected:
+            self.connects += 1
+        return connected
+
+    def uptime_ms(self):
+        """Return how long the current link has been up, 0 while down"""
+        return ticks_diff(ticks_ms(), self._up_since) if self.link_up else 0
+
+    def total_uptime_ms(self):
+        """Return the time the link has been up in total"""
+        return self._uptime_ms + self.uptime_ms()
+
+    def stats(self):
+        """
+        Returns:
+            dict: link_up, rssi, uptime_ms, total_uptime_ms, connects,
+                reconnects, drops, roams and roam_scans
+        """
+        return {
+            "link_up": self.link_up,
+            "rssi": self.rssi,
+            "uptime_ms": self.uptime_ms(),
+            "total_uptime_ms": self.total_uptime_ms(),
+            "connects": self.connects,
+            "reconnects": max(self.connects - 1, 0),
+            "drops": self.drops,
+            "roams": self.roams,
+            "roam_scans": self.roam_scans,
+        }
+
 if __name__ == "__main__":
     import PixelKit as kit
 
@@ -1,22 +1,60 @@
 # Standard libraries
 import time
+# Start of the imports, to compare boot times of source and .mpy builds
+IMPORT_START = time.ticks_ms()
+import gc
 import json
-import urandom
 
 # Local libraries
 import PixelKit as kit
+from framebuffer import FrameBuffer
 # import ntptime
 
 # Custom code
+import aqiscale
+from controls import Controls, BUTTON_A, CLICK, DIAL, PRESSED
+from display import AqiDisplay, TrendDisplay
+import history
+import memory
+from palette import Palette
+from power import PowerManager
+from scheduler import PollScheduler
+from trend import Trend
 import config
+import instrument
 import purpleair
 import utils
 import wifi
-from pixelfonts import Font4x7
+from nowcast import NowCast, SampleRing
+from pixelfonts import Font3x5, Font4x7
+
+# All drawing goes through the frame buffer, PixelKit is its backend
+fb = FrameBuffer(kit.WIDTH, kit.HEIGHT, kit)
+
+# Sensor name from the metadata, scrolled across the display on button A
+sensor_name = None
+
+# AQI breakpoint table used to convert PM2.5 readings
+AQI_SCALE = aqiscale.SCALES[config.CONFIG.get("aqi_scale", "pm2.5")]
+
+# The AQI colors dimmed to the dial's brightness, shared by every view
+palette = Palette((
+    purpleair.WHITE,
+    purpleair.GREEN,
+    purpleair.YELLOW,
+    purpleair.ORANGE,
+    purpleair.RED,
+    purpleair.PURPLE,
+    purpleair.MAROON,
+))
+
+def dial_brightness(dial):
+    # Perceived brightness; through the palette's gamma this spans about the
+    # same 5% to 55% of full LED power as the old linear dial
+    return (dial / 8192.0 + 0.25)
 
 def fetch_dial():
-    dial = kit.dial.read()
-    return (dial / 8192.0 + 0.05)
+    return dial_brightness(kit.dial.read())
 
 def screen_test():
     colors = [
@@ -30,28 +68,19 @@ def screen_test():
         purpleair.WHITE
     ]
     for h in range(0,kit.HEIGHT):
-        row_color = adjust_color(fetch_dial(), colors[h])
-        for w in range(0,kit.WIDTH):
-            kit.set_pixel(w,h,row_color)
-        kit.render()
+        palette.set_brightness(fetch_dial())
+        fb.hline(0, h, kit.WIDTH, palette.scaled(colors[h]))
+        fb.show()
         time.sleep(0.1)
 
-def show_wifi_logo(color=(0x10, 0x10, 0x10)):
-    kit.clear()
-    wifi.draw_logo(3, 0, kit.set_pixel, color)
-    kit.render()
-
-def adjust_color(brightness: float, color: tuple) -> tuple:
-    if not 0 <= brightness <= 1.0:
-        raise ValueError("Factor must be between 0 and 1.0")
-    return tuple(int(val * brightness) for val in color)
-
 def display_sensor_metadata(data):
+    global sensor_name
     try:
         sensor = data.get("sensor", {})
 
         # Extract basic information
         name = sensor.get("name", "Unknown")
+        sensor_name = name
         last_seen_utc = time.gmtime(sensor.get("last_seen"))
         last_seen = utils.format_time(last_seen_utc)
 
@@ -74,18 +103,17 @@ def display_sensor_metadata(data):
         # Continue even if we can't display the metadata
 
 
-def display_sensor_data(data):
+def display_sensor_data(fields):
     try:
-        sensor = data.get("sensor", {})
-        time_stamp = data.get("time_stamp")
+        time_stamp = fields.get("time_stamp")
 
-        last_seen_stamp = sensor.get("last_seen")
+        last_seen_stamp = fields.get("last_seen")
         last_seen = utils.format_time(time.gmtime(last_seen_stamp))
 
         age = time_stamp - last_seen_stamp
 
-        pm25 = sensor.get("pm2.5")
-        # confidence = sensor.get("confidence", None)
+        pm25 = fields.get("pm2.5")
+        # confidence = fields.get("confidence", None)
 
         print("\n=== PurpleAir Sensor Data ===")
         print(f"Sensor Updated: {last_seen} (UTC)")
@@ -96,106 +124,213 @@ def display_sensor_data(data):
         # print(f"Pressure: {pressure} hPa")
         print("\n--- Air Quality (PM2.5) ---")
         print(f"Current pm2.5: {pm25} µg/m³")
-        print(f"Current AQI from pm2.5: {purpleair.aqiFromPM(pm25)}")
+        print(f"Current AQI from pm2.5: {AQI_SCALE.aqi(pm25)} ({AQI_SCALE.name})")
         # print(f"Confidence: {confidence}%")
         print("================================\n")
 
-    except KeyError as e:
-        print(f"Error parsing API response: {e}")
-        print("Could not parse all sensor data. Response format may have changed.")
-        print("Raw data:", json.dumps(data, indent=2))
     except Exception as e:
-        print(f"Error parsing sensor metadata: {e}")
-        # Continue even if we can't display the metadata
-
-# Connect to the network
-def connect_to_wifi():
-    print("Starting network connection...")
-
-    # Display white logo
-    show_wifi_logo((0x10, 0x10, 0x10))
-
-    # Attempt to connect to Wi-Fi forever
-    WIFI_RETRY_DELAY = 15
-    while True:
-        try:
-            wifi.do_connect()
-        except Exception as e:
-            print(f"Error connecting to Wi-Fi: {e}")
-
-        if wifi.isconnected():
-            print("Connection successful!")
-            show_wifi_logo((0x0, 0x0, 0x10)) # Blue logo
-            time.sleep(1)
-            break
-        else:
-            print(f"Connection failed, retrying in {WIFI_RETRY_DELAY} seconds...")
-            show_wifi_logo((0x10, 0x0, 0x0)) # Red logo
-            time.sleep(WIFI_RETRY_DELAY)
-            show_wifi_logo((0x0, 0x0, 0x0)) # Black logo
+        print(f"Error parsing sensor data: {e}")
+        # Continue even if we can't display the data
 
 #
 # Initialize, then run forever
 #
 
 if __name__ == "__main__":
-    connect_to_wifi()
+    import asyncio
+    import app
 
     # Initialize the RTC
     # ntptime.settime()
 
-    bf = Font4x7(kit.WIDTH, kit.HEIGHT, kit.set_pixel)
+    bf = Font4x7(kit.WIDTH, kit.HEIGHT, fb.pixel)
+    small_font = Font3x5(kit.WIDTH, kit.HEIGHT, fb.pixel)
+
+    gc.collect()
+    print("Boot: imports took %d ms, %d bytes free" % (time.ticks_diff(time.ticks_ms(), IMPORT_START), memory.mem_free()))
+
+    # Also collect after every quarter of the free heap is allocated, so
+    # garbage cannot build up until an allocation fails; update() collects
+    # after each poll as well
+    memory.configure_gc()
+    heap = memory.MemoryMonitor()
+
+    # Timers and counters, see instrument.report() from the REPL
+    instrument.enable(config.CONFIG.get("instrument", False))
 
     METADATA_FIELDS = ["name", "latitude", "longitude", "altitude", "last_seen"]
     # AIR_QUALITY_FIELDS = ["pm2.5", "confidence", "humidity", "temperature", "pressure"]
     AIR_QUALITY_FIELDS = ["pm2.5", "last_seen"]
 
-    try:
-        sensor_metadata = purpleair.fetch_sensor_data(config.CONFIG["api_key"], config.CONFIG["sensor_id"], METADATA_FIELDS)
-        print(sensor_metadata)
-        display_sensor_metadata(sensor_metadata)
-    except Exception as e:
-        print(f"Error fetching sensor metadata: {e}")
-        # Continue with the program even if we can't get the initial metadata
-    
-    # Display screen test AFTER initial Metadata fetch
+    # Every reading is kept on flash when history is enabled, the NowCast
+    # starts from it after a reboot
+    store = None
+    if config.CONFIG.get("history"):
+        store = history.HistoryStore()
+        AIR_QUALITY_FIELDS += ["pm2.5_a", "pm2.5_b", "humidity", "temperature"]
+
+    SENSOR_IDS = purpleair.sensor_ids(config.CONFIG.get("sensor_id", ""))
+
+    # One client for the whole run, so every poll reuses the same connection
+    if config.CONFIG.get("sensor_ip"):
+        # Poll the sensor directly on the local network
+        client = purpleair.LocalSensorClient(config.CONFIG["sensor_ip"])
+        # The local reading is always current and costs no API points
+        scheduler = PollScheduler(period_s=10, margin_s=0, jitter_s=0, retry_ms=5000, max_retry_ms=60000)
+        use_batch = False
+        metadata = None
+    else:
+        client = purpleair.PurpleAirClient(config.CONFIG["api_key"])
+        # Polls just after each sensor upload, within the daily points budget.
+        # The cost of a poll is estimated at a point per field and sensor.
+        scheduler = PollScheduler(
+            points_per_day=config.CONFIG.get("api_points_per_day"),
+            points_per_poll=config.CONFIG.get("api_points_per_poll", len(AIR_QUALITY_FIELDS) * len(SENSOR_IDS)))
+        use_batch = len(SENSOR_IDS) > 1
+
+        # Metadata is shown from the on-flash cache, it is fetched or refreshed
+        # after a data poll once the AQI is on the display
+        metadata = purpleair.MetadataCache("metadata.json", SENSOR_IDS[0], METADATA_FIELDS)
+        if metadata.load() is not None:
+            display_sensor_metadata(metadata.data)
+        else:
+            print("No cached sensor metadata")
+
     screen_test()
 
-    UPDATE_DELAY_SEC = 120
-    deadline = 0
-    
-    aqi = 999
-    raw_color = purpleair.WHITE
-
-    while True:
-        # Refresh the sensor data if it is stale
-        if time.ticks_diff(time.ticks_ms(), deadline) > 0:
-            try:
-                sensor_data = purpleair.fetch_sensor_data(config.CONFIG["api_key"], config.CONFIG["sensor_id"], AIR_QUALITY_FIELDS)
-                print(sensor_data)
-                display_sensor_data(sensor_data)
-                sensor = sensor_data.get("sensor", {})
-                pm25 = sensor.get("pm2.5")
-                aqi = purpleair.aqiFromPM(pm25)
-                raw_color = purpleair.aqiColor(aqi)
-
-                # Set new deadline
-                deadline = time.ticks_add(time.ticks_ms(), UPDATE_DELAY_SEC * 1000)
-                deadline = time.ticks_add(deadline, urandom.randrange(0, 30 * 1000))
-                print(f"Update in {time.ticks_diff(deadline, time.ticks_ms()) / 1000} seconds")
-            except Exception as e:
-                print(f"Error fetching sensor data: {e}")
-                # Set a shorter deadline for retry on error
-                deadline = time.ticks_add(time.ticks_ms(), 30 * 1000)  # Retry after 30 seconds
-                print(f"Will retry in 30 seconds")
-                # Set blank display on error
-                raw_color = purpleair.RED
-                aqi = None  # Blank display
-
-        color = adjust_color(fetch_dial(), raw_color)
-
-        value_string = "%3d" % aqi if aqi is not None else " --"  # Blank if aqi is None (error)
-        kit.clear()
-        bf.text(value_string, 0, 0, color)
-        kit.render()
-        time.sleep(0.1)
+    # Recent readings and the NowCast built from them; the display shows the
+    # NowCast AQI once there is enough history for it
+    samples = SampleRing(64)
+    nowcast = NowCast()
+    # PM2.5 trend for the sparkline view, one bucket per column
+    trend_hours = config.CONFIG.get("trend_hours", 8)
+    trend = Trend(kit.WIDTH, trend_hours)
+    if store is not None:
+        print(f"History: {store.open()} records")
+        if store.latest:
+            # Enough for both the NowCast and every column of the trend
+            for record in store.scan(store.latest - max(NowCast.HOURS, trend_hours) * 3600):
+                value = history.pm25(record)
+                if value is not None and samples.append(record[0], value):
+                    nowcast.add(record[0], value)
+                    trend.add(record[0], value)
+
+    state = app.State()
+    state.aqi = 999
+    state.color = purpleair.WHITE
+
+    # Blocking, runs in a worker thread
+    def fetch():
+        if use_batch:
+            # Average of all sensors, fetched in one request
+            return client.fetch_sensors(SENSOR_IDS, AIR_QUALITY_FIELDS)
+        return client.fetch_sensor_fields(SENSOR_IDS[0], AIR_QUALITY_FIELDS)
+
+    # After a failed poll, returns the delay until the next attempt. Only a
+    # request that got a response can have cost API points
+    def retry():
+        return scheduler.on_error(charged=client.connection.status is not None)
+
+    # Apply a poll result to the state, returns the delay until the next poll
+    def update(sensor_fields):
+        print(f"Request timing (ms): {client.timing}")
+        display_sensor_data(sensor_fields)
+        pm25 = sensor_fields.get("pm2.5")
+        state.api_time = sensor_fields.get("time_stamp")
+        if AQI_SCALE.aqi(pm25) is None:
+            raise ValueError(f"Invalid pm2.5 reading: {pm25}")
+
+        last_seen = sensor_fields.get("last_seen")
+        if last_seen is not None and samples.append(last_seen, pm25):
+            nowcast.add(last_seen, pm25)
+            trend.add(last_seen, pm25)
+        concentration = nowcast.concentration(state.api_time)
+        if concentration is None:
+            # Not enough history yet, show the latest reading
+            concentration = pm25
+        print(f"NowCast pm2.5: {concentration} µg/m³ from {len(samples)} samples")
+        state.aqi = AQI_SCALE.aqi(concentration)
+        state.color = purpleair.aqiColor(state.aqi)
+        if store is not None and last_seen is not None:
+            store.append(last_seen, sensor_fields.get("pm2.5_a"), sensor_fields.get("pm2.5_b"), state.aqi,
+                         sensor_fields.get("humidity"), sensor_fields.get("temperature"))
+
+        delay_ms = scheduler.on_success(state.api_time, last_seen)
+        print(f"Update in {delay_ms / 1000} seconds")
+        print("Polls: %(polls)d, %(stale_polls)d unchanged, %(points_spent)d points, ~%(points_rate)d points/day" % scheduler.stats())
+        print("LED frames written/skipped: %d/%d" % kit.render_stats())
+        # Collect now, between frames, rather than mid-frame
+        instrument.collect()
+        # Probing the largest free block allocates most of the heap, so only
+        # when diagnosing. From the REPL: heap.sample(probe=True)
+        heap.sample(probe=instrument.enabled)
+        print("Memory: " + heap.summary())
+        if instrument.enabled:
+            print("Timing: " + instrument.log_line())
+        print("Link: up %(uptime_ms)d ms, %(rssi)s dBm, %(reconnects)d reconnects, %(drops)d drops" % link.stats())
+        if power is not None:
+            print("Power: %(duty_cycle).3f duty cycle, %(sleeps)d sleeps, ~%(current_ma).1f mA" % power.stats())
+        return delay_ms
+
+    metadata_shown = False
+
+    # Blocking, runs in a worker thread after the new value is on the display
+    def refresh_metadata():
+        global metadata_shown
+        if metadata is None:
+            # Local sensor: fetch its metadata once, it costs no API points
+            if not metadata_shown:
+                display_sensor_metadata(client.fetch_sensor_data(None, METADATA_FIELDS))
+                metadata_shown = True
+        elif state.api_time is not None and metadata.is_stale(state.api_time):
+            if metadata.refresh(client, state.api_time):
+                display_sensor_metadata(metadata.data)
+
+    # Watches the link and its signal, reconnects when needed
+    link = wifi.LinkSupervisor()
+
+    # Redraws only when the state changes, without allocating otherwise
+    display = AqiDisplay(fb, bf, wifi.LOGO, palette=palette)
+    trend_display = TrendDisplay(fb, trend, lambda pm25: purpleair.aqiColor(AQI_SCALE.aqi(pm25)), palette=palette)
+    current_view = display
+
+    # The joystick click switches between the AQI and the trend
+    def draw(state, now):
+        global current_view
+        view = trend_display if state.trend and state.link_up else display
+        if view is not current_view:
+            view.invalidate()
+            current_view = view
+        return view.draw(state, now)
+
+    controls = Controls(kit)
+
+    def handle_input(state, kind, value):
+        if kind == DIAL:
+            state.brightness = dial_brightness(value)
+        elif kind == CLICK and value == PRESSED:
+            state.trend = not state.trend
+        elif kind == BUTTON_A and value == PRESSED and sensor_name:
+            # The small font has capital letters only
+            display.scroll(sensor_name.upper(), small_font, clock.ticks_ms())
+
+    # Light sleep between frames, dial samples and polls
+    clock = app.Clock()
+    power = None
+    if config.CONFIG.get("power_save"):
+        power = PowerManager(clock, wake_pin=kit.joystick_click)
+        wifi.set_power_save(True)
+        clock = power
+
+    async def run():
+        tasks = [
+            app.wifi_task(state, clock, link.check, link.recover),
+            app.poll_task(state, clock, fetch, update, refresh_metadata, retry=retry),
+            app.render_task(state, clock, draw, config.CONFIG.get("frame_ms", 100)),
+            app.input_task(state, clock, controls, handle_input, config.CONFIG.get("dial_period_ms", 100)),
+        ]
+        if power is not None:
+            tasks.append(power.idle_task(lambda: state.fetching or state.connecting, controls.resync))
+        await asyncio.gather(*tasks)
+
+    asyncio.run(run())
@@ -0,0 +1,11 @@
+"""
+Mock for config module, the user's copy of example-config.py that is not in the repository.
+This allows modules importing it to be tested on a standard Python environment.
+"""
+
+CONFIG = {
+    'ssid': 'TestNetwork',
+    'psk': 'TestPassword',
+    'api_key': 'test_api_key',
+    'sensor_id': '12345',
+}
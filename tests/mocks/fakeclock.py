@@ -0,0 +1,55 @@
+"""
+Fake clock for testing asyncio tasks on CPython.
+Time only moves when every task is waiting in sleep_ms, and then jumps straight
+to the next wake-up, so hours of scheduling run in milliseconds.
+"""
+
+import asyncio
+import heapq
+
+class FakeClock:
+    """Virtual millisecond clock with the ticks_ms/sleep_ms interface of app.Clock"""
+
+    def __init__(self, start=0):
+        self.now = start
+        self._sleepers = []
+        self._sequence = 0
+
+    def ticks_ms(self):
+        return self.now
+
+    async def sleep_ms(self, ms):
+        future = asyncio.get_running_loop().create_future()
+        self._sequence += 1
+        heapq.heappush(self._sleepers, (self.now + max(ms, 0), self._sequence, future))
+        await future
+
+    async def advance(self, ms):
+        """Run the other tasks until `ms` of virtual time have passed"""
+        until = self.now + ms
+        while True:
+            # Let every task that can run reach its next sleep
+            for _ in range(20):
+                await asyncio.sleep(0)
+            if not self._sleepers or self._sleepers[0][0] > until:
+                # A task may have moved the clock past the end already
+                self.now = max(self.now, until)
+                return
+            self.now = max(self.now, self._sleepers[0][0])
+            while self._sleepers and self._sleepers[0][0] <= self.now:
+                _, _, future = heapq.heappop(self._sleepers)
+                if not future.done():
+                    future.set_result(None)
+
+def run_for(clock, ms, *coroutines):
+    """Run coroutines as tasks for `ms` of virtual time, then cancel them"""
+    async def main():
+        tasks = [asyncio.ensure_future(c) for c in coroutines]
+        await clock.advance(ms)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for task in tasks:
+            if not task.cancelled() and task.exception():
+                raise task.exception()
+    asyncio.run(main())
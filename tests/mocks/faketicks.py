@@ -0,0 +1,34 @@
+"""
+Settable ticks_ms for testing time-dependent modules on CPython.
+Unlike fakeclock.FakeClock, which drives asyncio tasks, this replaces the
+ticks_ms a module imported from utils.
+"""
+
+from unittest.mock import patch
+
+class FakeTicks:
+    """Settable replacement for ticks_ms"""
+
+    def __init__(self, now=0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+def patch_ticks(test, target, now=0):
+    """
+    Replace ticks_ms with a FakeTicks for the rest of a test.
+
+    Args:
+        test (unittest.TestCase): Test to undo the patch after
+        target (str): Patched name, e.g. 'wifi.ticks_ms'
+        now (int): Starting time
+
+    Returns:
+        FakeTicks: The replacement, set its `now` to move time
+    """
+    ticks = FakeTicks(now)
+    patcher = patch(target, ticks)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    return ticks
@@ -0,0 +1,56 @@
+"""
+Mock for machine module, which is used in MicroPython but not available in standard Python.
+This allows tests to run on a standard Python environment.
+"""
+
+class Pin:
+    """Mock Pin class for machine"""
+
+    IN = 1
+    OUT = 3
+    PULL_UP = 1
+    IRQ_FALLING = 2
+    IRQ_RISING = 1
+
+    def __init__(self, id, mode=None, pull=None):
+        self.id = id
+        self.mode = mode
+        self._value = 1
+        self.handler = None
+        self.trigger = None
+
+    def value(self, value=None):
+        """Get the pin level, or set it when a value is given"""
+        if value is None:
+            return self._value
+        self._value = value
+
+    def irq(self, handler=None, trigger=None):
+        """Record the IRQ handler so tests can fire it"""
+        self.handler = handler
+        self.trigger = trigger
+
+class ADC:
+    """Mock ADC class for machine"""
+
+    ATTN_0DB = 0
+    ATTN_6DB = 2
+    ATTN_11DB = 3
+
+    def __init__(self, pin):
+        self.pin = pin
+        self.value = 0
+
+    def atten(self, attenuation):
+        """Set the input attenuation"""
+        self.attenuation = attenuation
+
+    def read(self):
+        """Return the current raw reading"""
+        return self.value
+
+sleeps = []
+
+def lightsleep(ms=None):
+    """Record the requested light sleep instead of sleeping"""
+    sleeps.append(ms)
@@ -0,0 +1,36 @@
+"""
+Mock for neopixel module, which is used in MicroPython but not available in standard Python.
+This allows tests to run on a standard Python environment.
+"""
+
+class NeoPixel:
+    """Mock NeoPixel class storing pixels in GRB order like the real driver"""
+
+    ORDER = (1, 0, 2, 3)
+
+    def __init__(self, pin, n, bpp=3):
+        self.pin = pin
+        self.n = n
+        self.bpp = bpp
+        self.buf = bytearray(n * bpp)
+        self.write_count = 0
+
+    def __len__(self):
+        return self.n
+
+    def __setitem__(self, index, value):
+        offset = index * self.bpp
+        for i in range(self.bpp):
+            self.buf[offset + self.ORDER[i]] = value[i]
+
+    def __getitem__(self, index):
+        offset = index * self.bpp
+        return tuple(self.buf[offset + self.ORDER[i]] for i in range(self.bpp))
+
+    def fill(self, value):
+        for i in range(self.n):
+            self[i] = value
+
+    def write(self):
+        """Count writes instead of driving the LEDs"""
+        self.write_count += 1
@@ -0,0 +1,80 @@
+"""
+Mock for network module, which is used in MicroPython but not available in standard Python.
+This allows tests to run on a standard Python environment.
+"""
+
+STA_IF = 0
+AP_IF = 1
+
+STAT_IDLE = 1000
+STAT_CONNECTING = 1001
+STAT_GOT_IP = 1010
+STAT_WRONG_PASSWORD = 202
+STAT_NO_AP_FOUND = 201
+STAT_CONNECT_FAIL = 203
+
+class WLAN:
+    """
+    Mock WLAN interface, a single shared station.
+
+    Tests set `networks` to the scan results and `accept` to decide whether a
+    connect call succeeds; `reset` restores a fresh station.
+    """
+
+    PM_NONE = 0
+    PM_PERFORMANCE = 1
+    PM_POWERSAVE = 2
+
+    _station = None
+
+    def __new__(cls, interface=STA_IF):
+        if cls._station is None:
+            station = super().__new__(cls)
+            station._active = False
+            station._connected = False
+            station._config = {}
+            station.connects = []
+            station.networks = []
+            station.accept = lambda ssid, key, kwargs: True
+            station._status = STAT_IDLE
+            cls._station = station
+        return cls._station
+
+    @classmethod
+    def reset(cls):
+        cls._station = None
+
+    def active(self, active=None):
+        if active is None:
+            return self._active
+        self._active = active
+
+    def isconnected(self):
+        return self._connected
+
+    def connect(self, ssid=None, key=None, **kwargs):
+        self.connects.append((ssid, key, kwargs))
+        self._connected = self.accept(ssid, key, kwargs)
+        self._status = STAT_GOT_IP if self._connected else STAT_NO_AP_FOUND
+
+    def disconnect(self):
+        self._connected = False
+        self._status = STAT_IDLE
+
+    def scan(self):
+        return list(self.networks)
+
+    def status(self, param=None):
+        if param is not None:
+            return self._config.get(param)
+        return self._status
+
+    def config(self, *args, **kwargs):
+        if args:
+            return self._config.get(args[0])
+        self._config.update(kwargs)
+
+    def ifconfig(self, config=None):
+        if config is None:
+            return self._config.get("ifconfig", ("0.0.0.0", "0.0.0.0", "0.0.0.0", "0.0.0.0"))
+        self._config["ifconfig"] = config
@@ -0,0 +1,79 @@
+"""
+Local HTTP/1.1 server standing in for api.purpleair.com or a sensor on the LAN.
+This allows the socket based clients to be tested without network access.
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        super().setup()
+        self.server.standin.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        standin = self.server.standin
+        standin.requests.append((self.path, dict(self.headers)))
+        status, headers, body = standin.route(self.path, self.headers)
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        if status < 200 or status in (204, 304):
+            # No body and, like most servers, no Content-Length either
+            self.end_headers()
+        elif standin.chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for i in range(0, len(body), 7):
+                piece = body[i:i + 7]
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(piece), piece))
+            self.wfile.write(b"0\r\n\r\n")
+        else:
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        if standin.drop_connections:
+            # Close without telling the client, like an idle keep-alive timeout
+            self.close_connection = True
+
+class StandInServer:
+    """
+    Threaded HTTP server on localhost with canned responses.
+
+    Responses are looked up by request path without the query string in
+    `routes`, a dict of path to (status, headers, body). A request whose
+    If-None-Match matches the route's ETag gets a 304.
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.requests = []
+        self.connections = 0
+        self.chunked = False
+        self.drop_connections = False
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.standin = self
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.05,), daemon=True)
+
+    def route(self, path, headers):
+        """Return (status, headers, body) for a request"""
+        status, response_headers, body = self.routes.get(path.split("?")[0], (404, {}, b'{"error": "NotFoundError"}'))
+        etag = response_headers.get("ETag")
+        if etag and headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b""
+        return status, response_headers, body
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._server.shutdown()
+        self._server.server_close()
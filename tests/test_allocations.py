@@ -0,0 +1,66 @@
+"""
+Allocation checks for the hot paths measured by the benchmarks in bench/
+"""
+
+import unittest
+import sys
+import os
+import json
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+# Add bench/ for the measurement helpers
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'bench')))
+
+# Mock machine and neopixel before importing PixelKit
+sys.modules['machine'] = __import__('machine')
+sys.modules['neopixel'] = __import__('neopixel')
+
+import benchlib
+import PixelKit as kit
+from framebuffer import FrameBuffer, MemoryBackend
+from jsonfields import FieldExtractor
+from pixelfonts import Font4x7
+
+COLOR = (1, 2, 3)
+
+def allocations(function):
+    """Return (peak, kept) bytes allocated by one call"""
+    _, peak, kept = benchlib.measure(function, number=1, repeat=1)
+    return peak, kept
+
+class TestDrawingAllocations(unittest.TestCase):
+    """Drawing must not keep memory and only allocate small temporaries"""
+
+    def test_framebuffer_text(self):
+        """Test drawing text keeps nothing"""
+        fb = FrameBuffer(16, 8, MemoryBackend(16 * 8 * 3))
+        font = Font4x7(16, 8, fb.pixel)
+        peak, kept = allocations(lambda: fb.text(font, "888", 0, 0, COLOR))
+        self.assertEqual(kept, 0)
+        self.assertLess(peak, 1024)
+
+    def test_render_unchanged(self):
+        """Test skipping an unchanged frame does not copy it"""
+        kit.render()
+        peak, _ = allocations(kit.render)
+        self.assertLess(peak, len(kit.np.buf))
+
+class TestParseAllocations(unittest.TestCase):
+    """Streaming extraction must use far less memory than decoding the document"""
+
+    def test_field_extractor(self):
+        with open(os.path.join(os.path.dirname(__file__), '..', 'example-local.json'), 'rb') as f:
+            payload = f.read()
+        extractor = FieldExtractor(["DateTime", "pm2_5_atm", "pm2_5_atm_b"])
+
+        def stream():
+            extractor.reset()
+            for i in range(0, len(payload), 256):
+                extractor.feed(memoryview(payload)[i:i + 256])
+
+        stream_peak, _ = allocations(stream)
+        loads_peak, _ = allocations(lambda: json.loads(payload))
+        self.assertLess(stream_peak * 4, loads_peak)
@@ -0,0 +1,115 @@
+"""
+Tests for animation.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+import animation
+from animation import Governor, Transition, Scroller, FULL
+from framebuffer import FrameBuffer
+from pixelfonts import Font3x5, Font4x7
+
+class TestGovernor(unittest.TestCase):
+    """Tests for Governor"""
+
+    def test_on_time(self):
+        """Test frames follow the grid when drawing is quick"""
+        governor = Governor(100, 0)
+        self.assertEqual(governor.wait_ms(20), 80)
+        self.assertEqual(governor.wait_ms(100), 100)
+        self.assertEqual(governor.dropped, 0)
+
+    def test_late_frames_dropped(self):
+        """Test the slots a slow frame overran are dropped and the grid holds"""
+        governor = Governor(100, 1000)
+        self.assertEqual(governor.wait_ms(1350), 50)
+        self.assertEqual(governor.next_frame, 1400)
+        self.assertEqual(governor.dropped, 3)
+        self.assertEqual(governor.wait_ms(1400), 100)
+        self.assertEqual(governor.frames, 2)
+
+class TestTransition(unittest.TestCase):
+    """Tests for Transition"""
+
+    def test_levels(self):
+        """Test the level rises linearly and the transition ends at FULL"""
+        fade = Transition(400)
+        self.assertEqual(fade.level(0), FULL)
+        fade.start(1000)
+        self.assertTrue(fade.active)
+        self.assertEqual(fade.level(1000), 0)
+        self.assertEqual(fade.level(1100), 64)
+        self.assertEqual(fade.level(1400), FULL)
+        self.assertFalse(fade.active)
+
+    def test_blend(self):
+        """Test colors are mixed by level, or faded to black"""
+        out = bytearray(3)
+        self.assertEqual(animation.blend((200, 0, 100), (0, 200, 100), 64, out), bytearray([150, 50, 100]))
+        self.assertEqual(animation.blend((200, 0, 100), None, 128, out), bytearray([100, 0, 50]))
+        self.assertEqual(animation.blend((200, 0, 100), None, FULL, out), bytearray(3))
+
+class TestRenderStrip(unittest.TestCase):
+    """Tests for render_strip"""
+
+    def test_matches_text(self):
+        """Test a strip blitted at x draws the same pixels as FrameBuffer.text"""
+        font = Font4x7(16, 8, None)
+        expected = FrameBuffer(16, 8)
+        expected.text(font, "123", 1, 0, (1, 2, 3))
+        fb = FrameBuffer(16, 8)
+        fb.blit(animation.render_strip(font, "123"), 1, 0, (1, 2, 3))
+        self.assertEqual(fb.buf, expected.buf)
+
+    def test_into_buffer(self):
+        """Test rendering into a buffer clears what was there"""
+        font = Font3x5(16, 8, None)
+        out = bytearray(b'\xff' * 12)
+        self.assertIs(animation.render_strip(font, "1", out), out)
+        self.assertEqual(out[4:], bytes(8))
+
+    def test_missing(self):
+        """Test missing characters raise, or are replaced when asked"""
+        font = Font4x7(16, 8, None)
+        with self.assertRaises(ValueError):
+            animation.render_strip(font, "A1")
+        self.assertEqual(animation.render_strip(font, "A1", missing=" ")[:5], bytes(5))
+
+class TestScroller(unittest.TestCase):
+    """Tests for Scroller"""
+
+    def setUp(self):
+        self.font = Font3x5(16, 8, None)
+        self.strip = animation.render_strip(self.font, "AB")   # 8 columns
+        self.scroller = Scroller(self.strip, 16, speed=10)
+        self.scroller.start(0)
+
+    def frame(self, now):
+        fb = FrameBuffer(16, 8)
+        self.scroller.draw(fb, 0, 0, (9, 9, 9), now)
+        return fb
+
+    def text_at(self, x):
+        fb = FrameBuffer(16, 8)
+        fb.text(self.font, "AB", x, 0, (9, 9, 9))
+        return fb.buf
+
+    def test_enters_from_right(self):
+        """Test the text enters at the right edge, one pixel per 1000/speed ms"""
+        self.assertEqual(self.frame(0).buf, bytes(16 * 8 * 3))
+        self.assertEqual(self.frame(300).buf, self.text_at(13))
+        self.assertEqual(self.frame(1600).buf, self.text_at(0))
+
+    def test_leaves_left(self):
+        """Test the text is clipped pixel by pixel as it leaves, then the scroll is done"""
+        self.assertEqual(self.frame(1900).buf, self.text_at(-3))
+        self.assertFalse(self.scroller.done(2300))
+        self.assertTrue(self.scroller.done(2400))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,261 @@
+"""
+Tests for app.py module
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import patch
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+
+import app
+from fakeclock import FakeClock, run_for
+
+def slow_offload(clock, ms):
+    """Offload that takes `ms` of virtual time, like a slow network call"""
+    async def offload(function):
+        await clock.sleep_ms(ms)
+        return function()
+    return offload
+
+class TestRenderTask(unittest.TestCase):
+    """Tests for render_task"""
+
+    def test_steady_frame_rate(self):
+        """Test frames are drawn every frame period"""
+        clock = FakeClock()
+        state = app.State()
+        times = []
+        run_for(clock, 1000, app.render_task(state, clock, lambda s, now: times.append(now), frame_ms=100))
+        self.assertEqual(times, list(range(0, 1001, 100)))
+
+    def test_slow_frames_dropped(self):
+        """Test a slow frame is not followed by a burst of catch-up frames"""
+        clock = FakeClock()
+        state = app.State()
+        times = []
+
+        def draw(state, now):
+            times.append(clock.ticks_ms())
+            if len(times) == 2:
+                clock.now += 350  # This frame took 350 ms
+
+        run_for(clock, 1000, app.render_task(state, clock, draw, frame_ms=100))
+        # The frames due at 200, 300 and 400 ms are dropped, the grid holds
+        self.assertEqual(times[:4], [0, 100, 500, 600])
+        self.assertEqual(state.late_frames, 3)
+
+class TestPollTask(unittest.TestCase):
+    """Tests for poll_task"""
+
+    def test_render_continues_during_slow_fetch(self):
+        """Test the frame rate holds while a fetch takes seconds"""
+        clock = FakeClock()
+        state = app.State()
+        state.link_up = True
+        fetching = []
+
+        def draw(state, now):
+            fetching.append(state.fetching)
+
+        run_for(clock, 10000,
+                app.poll_task(state, clock, lambda: 10.5, lambda fields: 60000, offload=slow_offload(clock, 4000)),
+                app.render_task(state, clock, draw, frame_ms=100))
+        self.assertEqual(state.polls, 1)
+        self.assertEqual(state.frames, 101)
+        self.assertEqual(sum(fetching), 40)
+
+    def test_update_sets_next_poll(self):
+        """Test polls are spaced by the delay returned by update"""
+        clock = FakeClock()
+        state = app.State()
+        state.link_up = True
+        polls = []
+
+        def update(fields):
+            polls.append(clock.ticks_ms())
+            return 120000
+
+        run_for(clock, 500000, app.poll_task(state, clock, lambda: None, update, offload=slow_offload(clock, 0)))
+        self.assertEqual(polls, [0, 120000, 240000, 360000, 480000])
+
+    def test_error_retry(self):
+        """Test a failed poll blanks the value and retries sooner"""
+        clock = FakeClock()
+        state = app.State()
+        state.link_up = True
+        state.aqi = 42
+        after = []
+
+        def fetch():
+            raise Exception("Network error")
+
+        run_for(clock, 65000, app.poll_task(state, clock, fetch, lambda f: 120000, after=lambda: after.append(1),
+                                            retry_ms=30000, offload=slow_offload(clock, 0)))
+        self.assertEqual(state.poll_errors, 3)
+        self.assertIsNone(state.aqi)
+        self.assertTrue(state.error)
+        self.assertEqual(after, [])
+
+    def test_retry_callback(self):
+        """Test the retry function chooses the delay after each error"""
+        clock = FakeClock()
+        state = app.State()
+        state.link_up = True
+        delays = iter([1000, 2000, 4000, 8000])
+        attempts = []
+
+        def fetch():
+            attempts.append(clock.ticks_ms())
+            raise Exception("Network error")
+
+        run_for(clock, 10000, app.poll_task(state, clock, fetch, lambda f: 120000, retry=lambda: next(delays),
+                                            offload=slow_offload(clock, 0)))
+        self.assertEqual(attempts, [0, 1000, 3000, 7000])
+
+    def test_after_runs_after_update(self):
+        """Test the after hook runs once per successful poll"""
+        clock = FakeClock()
+        state = app.State()
+        state.link_up = True
+        calls = []
+        run_for(clock, 1000, app.poll_task(state, clock, lambda: calls.append("fetch"),
+                                           lambda f: calls.append("update") or 60000,
+                                           after=lambda: calls.append("after"), offload=slow_offload(clock, 0)))
+        self.assertEqual(calls, ["fetch", "update", "after"])
+
+    def test_waits_for_link(self):
+        """Test no poll is attempted while the link is down"""
+        clock = FakeClock()
+        state = app.State()
+        run_for(clock, 5000, app.poll_task(state, clock, lambda: None, lambda f: 60000, offload=slow_offload(clock, 0)))
+        self.assertEqual(state.polls, 0)
+
+class FakeControls:
+    """Controls stand-in returning scripted events"""
+
+    def __init__(self, events):
+        self.events = list(events)
+        self.samples = 0
+
+    def sample(self):
+        self.samples += 1
+
+    def get(self):
+        return self.events.pop(0) if self.events else None
+
+class TestInputTask(unittest.TestCase):
+    """Tests for input_task"""
+
+    def test_events_handled(self):
+        """Test queued events are all handed over and the dial is sampled each period"""
+        clock = FakeClock()
+        state = app.State()
+        controls = FakeControls([(8, 2048), (1, 1)])
+        handled = []
+        run_for(clock, 500, app.input_task(state, clock, controls, lambda s, k, v: handled.append((k, v)), period_ms=100))
+        self.assertEqual(handled, [(8, 2048), (1, 1)])
+        self.assertEqual(controls.samples, 6)
+
+class TestWifiTask(unittest.TestCase):
+    """Tests for wifi_task"""
+
+    def test_reconnects(self):
+        """Test the link is brought up and retried after failures"""
+        clock = FakeClock()
+        state = app.State()
+        attempts = []
+        connected = []
+
+        def connect():
+            attempts.append(clock.ticks_ms())
+            if len(attempts) == 2:
+                connected.append(True)
+
+        run_for(clock, 40000, app.wifi_task(state, clock, lambda: bool(connected), connect,
+                                            retry_ms=15000, offload=slow_offload(clock, 1000),
+                                            randrange=lambda n: 0))
+        self.assertEqual(attempts, [1000, 17000])
+        self.assertTrue(state.link_up)
+        self.assertFalse(state.connecting)
+
+    def test_backoff(self):
+        """Test the delay between failed attempts doubles up to the limit"""
+        clock = FakeClock()
+        state = app.State()
+        attempts = []
+        run_for(clock, 30000, app.wifi_task(state, clock, lambda: False, lambda: attempts.append(clock.ticks_ms()),
+                                            retry_ms=1000, max_retry_ms=8000, offload=slow_offload(clock, 0),
+                                            randrange=lambda n: 0))
+        self.assertEqual(attempts, [0, 1000, 3000, 7000, 15000, 23000])
+
+    def test_checks_before_poll(self):
+        """Test the link is checked shortly before a scheduled poll"""
+        clock = FakeClock()
+        state = app.State()
+        state.next_poll = 9000
+        checks = []
+
+        def isconnected():
+            checks.append(clock.ticks_ms())
+            return True
+
+        run_for(clock, 13000, app.wifi_task(state, clock, isconnected, lambda: None, check_ms=5000, lead_ms=2000))
+        self.assertEqual(checks, [0, 5000, 7000, 12000])
+
+    def test_poll_schedules_next(self):
+        """Test the poll task publishes when the next poll is due"""
+        clock = FakeClock()
+        state = app.State()
+        state.link_up = True
+        run_for(clock, 1000, app.poll_task(state, clock, lambda: None, lambda f: 60000, offload=slow_offload(clock, 0)))
+        self.assertEqual(state.next_poll, 60000)
+
+class TestRunBlocking(unittest.TestCase):
+    """Tests for run_blocking"""
+
+    def test_result_and_exception(self):
+        """Test the result or exception of the worker is returned to the caller"""
+        import asyncio
+        self.assertEqual(asyncio.run(app.run_blocking(lambda: 42, poll_ms=1)), 42)
+
+        def fail():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            asyncio.run(app.run_blocking(fail, poll_ms=1))
+
+    def test_base_exception(self):
+        """Test an exception that is not an Exception still ends the wait"""
+        import asyncio
+
+        class Abort(BaseException):
+            pass
+
+        def abort():
+            raise Abort()
+
+        with self.assertRaises(Abort):
+            asyncio.run(app.run_blocking(abort, poll_ms=1))
+
+    def test_stack_size(self):
+        """Test the worker gets the requested stack and the default is restored"""
+        import asyncio
+        import _thread
+        sizes = []
+
+        class Thread:
+            def stack_size(self, size=0):
+                sizes.append(size)
+                return 4096 if len(sizes) == 1 else size
+
+            def start_new_thread(self, function, args):
+                return _thread.start_new_thread(function, args)
+
+        with patch('app._thread', Thread()):
+            self.assertEqual(asyncio.run(app.run_blocking(lambda: 1, poll_ms=1, stack_size=12288)), 1)
+        self.assertEqual(sizes, [12288, 4096])
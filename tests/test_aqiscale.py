@@ -0,0 +1,88 @@
+"""
+Tests for aqiscale.py module
+"""
+
+import unittest
+import sys
+import os
+from array import array
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+from aqiscale import AqiScale, PM25_2012, PM25_2024, PM10, SCALES, INVALID
+
+class TestAqiScale(unittest.TestCase):
+    """Tests for AqiScale.aqi"""
+
+    def test_breakpoints_pm25_2012(self):
+        """Test every breakpoint of the 2012 PM2.5 table maps to its index"""
+        for c_low, c_high, i_low, i_high in PM25_2012.breakpoints:
+            self.assertEqual(PM25_2012.aqi(c_low), i_low)
+            self.assertEqual(PM25_2012.aqi(c_high), i_high)
+
+    def test_breakpoints_pm25_2024(self):
+        """Test every breakpoint of the 2024 PM2.5 table maps to its index"""
+        for c_low, c_high, i_low, i_high in PM25_2024.breakpoints:
+            self.assertEqual(PM25_2024.aqi(c_low), i_low)
+            self.assertEqual(PM25_2024.aqi(c_high), i_high)
+        self.assertEqual(PM25_2024.aqi(10.0), 53)
+
+    def test_breakpoints_pm10(self):
+        """Test every breakpoint of the PM10 table maps to its index"""
+        for c_low, c_high, i_low, i_high in PM10.breakpoints:
+            self.assertEqual(PM10.aqi(c_low), i_low)
+            self.assertEqual(PM10.aqi(c_high), i_high)
+
+    def test_truncation(self):
+        """Test concentrations are truncated to the table precision"""
+        self.assertEqual(PM25_2012.aqi(12.09), 50)
+        self.assertEqual(PM25_2012.aqi(35.49), 100)
+        self.assertEqual(PM10.aqi(54.9), 50)
+
+    def test_extrapolation_to_limit(self):
+        """Test the top segment is extended up to the limit"""
+        self.assertGreater(PM25_2012.aqi(700.0), 500)
+        self.assertIsNotNone(PM25_2012.aqi(1000.0))
+        self.assertIsNone(PM25_2012.aqi(1000.1))
+        self.assertIsNone(PM10.aqi(605))
+
+    def test_invalid_readings(self):
+        """Test readings that cannot be converted return None"""
+        for value in (None, -0.1, "12", "undefined", float("nan"), float("inf")):
+            self.assertIsNone(PM25_2012.aqi(value), value)
+
+    def test_custom_scale(self):
+        """Test a scale built from a custom table"""
+        scale = AqiScale("test", [(0, 10, 0, 100), (11, 20, 101, 200)], precision=0)
+        self.assertEqual(scale.aqi(5), 50)
+        self.assertEqual(scale.aqi(20), 200)
+        self.assertIsNone(scale.aqi(21))
+
+    def test_scales_by_name(self):
+        """Test the config names of the scales"""
+        self.assertIs(SCALES["pm2.5"], PM25_2012)
+        self.assertIs(SCALES["pm2.5_2024"], PM25_2024)
+        self.assertIs(SCALES["pm10"], PM10)
+
+class TestAqiMany(unittest.TestCase):
+    """Tests for AqiScale.aqi_many"""
+
+    def test_matches_single_conversion(self):
+        """Test batch conversion matches aqi() for a sweep of readings"""
+        readings = array('f', [i * 0.37 for i in range(3000)])
+        result = PM25_2012.aqi_many(readings)
+        for value, converted in zip(readings, result):
+            expected = PM25_2012.aqi(value)
+            self.assertEqual(converted, INVALID if expected is None else expected)
+
+    def test_invalid_readings(self):
+        """Test invalid readings are marked INVALID"""
+        result = PM25_2012.aqi_many([None, -1.0, float("nan"), 2000.0, 12.1])
+        self.assertEqual(list(result), [INVALID, INVALID, INVALID, INVALID, 51])
+
+    def test_output_buffer_reused(self):
+        """Test results are written into a provided array"""
+        out = array('h', [0, 0])
+        self.assertIs(PM25_2012.aqi_many([0.0, 35.5], out), out)
+        self.assertEqual(list(out), [0, 101])
@@ -0,0 +1,57 @@
+"""
+Tests for tools/build.py
+"""
+
+import unittest
+import sys
+import os
+import shutil
+import tempfile
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add tools/ for the build script
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'tools')))
+
+import build
+from pixelfonts.fonts import font3x5, font4x7
+
+class TestFontSource(unittest.TestCase):
+    """Tests for the precompiled font modules"""
+
+    def load(self, module):
+        namespace = {}
+        source = build.font_source(module).replace("from ..basefont import", "from pixelfonts.basefont import")
+        exec(source, namespace)
+        return namespace
+
+    def test_same_glyphs(self):
+        """Test the generated classes have the glyphs compiled from the string art"""
+        for module, name in ((font4x7, "Font4x7"), (font3x5, "Font3x5")):
+            generated = self.load(module)[name]
+            original = getattr(module, name)
+            self.assertEqual(generated.glyphs(), original.glyphs())
+            self.assertEqual((generated.WIDTH, generated.HEIGHT), (original.WIDTH, original.HEIGHT))
+
+    def test_no_string_art(self):
+        """Test the generated module does not carry the FONT table"""
+        source = build.font_source(font4x7)
+        self.assertNotIn("FONT", source)
+        self.assertNotIn("####", source)
+
+@unittest.skipIf(shutil.which("mpy-cross") is None, "mpy-cross is not installed")
+class TestBuild(unittest.TestCase):
+    """Tests for a full build"""
+
+    def test_build(self):
+        """Test every module in lib/ is compiled"""
+        out = tempfile.mkdtemp()
+        try:
+            report = build.build(out)
+            names = [name for name, _, _ in report]
+            self.assertIn("purpleair", names)
+            self.assertIn("pixelfonts.fonts.font4x7", names)
+            self.assertTrue(os.path.exists(os.path.join(out, "lib", "pixelfonts", "fonts", "font4x7.mpy")))
+            self.assertFalse(os.path.exists(os.path.join(out, "generated")))
+        finally:
+            shutil.rmtree(out)
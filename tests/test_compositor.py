@@ -0,0 +1,112 @@
+"""
+Tests for compositor.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+from compositor import Compositor, Layer
+from framebuffer import FrameBuffer
+
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+BLACK = (0, 0, 0)
+
+class TestLayer(unittest.TestCase):
+    """Tests for Layer dirty tracking"""
+
+    def test_primitives_mark_dirty(self):
+        """Test each primitive marks the area it touched, clipped to the layer"""
+        layer = Layer(16, 8)
+        layer.pixel(3, 4, RED)
+        self.assertEqual(layer.dirty, [3, 4, 4, 5])
+        layer.fill_rect(10, 6, 20, 20, RED)
+        self.assertEqual(layer.dirty, [3, 4, 16, 8])
+        layer.dirty = [0, 0, 0, 0]
+        layer.blit([1, 1], -1, 2, RED)
+        self.assertEqual(layer.dirty, [0, 2, 1, 8])
+
+    def test_clear_marks_drawn_area(self):
+        """Test clear marks only what was drawn since the last clear"""
+        layer = Layer(16, 8)
+        layer.clear()
+        self.assertEqual(layer.dirty, [0, 0, 0, 0])
+        layer.hline(2, 3, 4, RED)
+        layer.dirty = [0, 0, 0, 0]
+        layer.clear()
+        self.assertEqual(layer.dirty, [2, 3, 6, 4])
+        self.assertEqual(layer.get_pixel(2, 3), BLACK)
+
+    def test_hidden(self):
+        """Test drawing on a hidden layer only marks it dirty once shown"""
+        layer = Layer(16, 8)
+        layer.set_visible(False)
+        layer.pixel(1, 1, RED)
+        self.assertEqual(layer.dirty, [0, 0, 0, 0])
+        layer.set_visible(True)
+        self.assertEqual(layer.dirty, [1, 1, 2, 2])
+
+class TestCompositor(unittest.TestCase):
+    """Tests for Compositor"""
+
+    def setUp(self):
+        self.fb = FrameBuffer(16, 8)
+        self.bottom = Layer(16, 8)
+        self.top = Layer(4, 2, 12, 6)
+        self.compositor = Compositor(self.fb, (self.bottom, self.top))
+
+    def test_stacking(self):
+        """Test upper layers cover lower ones except where they are black"""
+        self.bottom.fill(RED)
+        self.top.pixel(1, 1, BLUE)
+        self.assertTrue(self.compositor.compose())
+        self.assertEqual(self.fb.get_pixel(13, 7), BLUE)
+        self.assertEqual(self.fb.get_pixel(12, 7), RED)
+        self.assertEqual(self.fb.get_pixel(0, 0), RED)
+        self.assertEqual(self.fb.backend.writes, 1)
+
+    def test_nothing_changed(self):
+        """Test no frame is shown when no layer changed"""
+        self.bottom.fill(RED)
+        self.compositor.compose()
+        self.assertFalse(self.compositor.compose())
+        self.assertEqual(self.fb.backend.writes, 1)
+
+    def test_partial(self):
+        """Test only the changed area is recomposed"""
+        self.bottom.fill(RED)
+        self.compositor.compose()
+        pixels = self.compositor.pixels
+        self.top.pixel(0, 0, BLUE)
+        self.compositor.compose()
+        self.assertEqual(self.compositor.pixels - pixels, 1)
+        self.assertEqual(self.fb.get_pixel(12, 6), BLUE)
+        self.top.clear()
+        self.compositor.compose()
+        self.assertEqual(self.fb.get_pixel(12, 6), RED)
+        self.assertEqual(self.compositor.pixels - pixels, 2)
+
+    def test_hidden_layer_removed(self):
+        """Test hiding a layer uncovers what is below it"""
+        self.bottom.pixel(5, 5, RED)
+        self.compositor.compose()
+        self.bottom.set_visible(False)
+        self.compositor.compose()
+        self.assertEqual(self.fb.get_pixel(5, 5), BLACK)
+
+    def test_invalidate(self):
+        """Test invalidate recomposes over whatever was drawn on the front buffer"""
+        self.bottom.pixel(0, 0, RED)
+        self.compositor.compose()
+        self.fb.fill(BLUE)
+        self.compositor.invalidate()
+        self.compositor.compose()
+        self.assertEqual(self.fb.get_pixel(0, 0), RED)
+        self.assertEqual(self.fb.get_pixel(8, 4), BLACK)
+
+if __name__ == "__main__":
+    unittest.main()
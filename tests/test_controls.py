@@ -0,0 +1,184 @@
+"""
+Tests for controls.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+
+# Mock machine before importing controls
+sys.modules['machine'] = __import__('machine')
+
+import controls
+from machine import Pin, ADC
+from faketicks import patch_ticks
+
+class TestEventQueue(unittest.TestCase):
+    """Tests for EventQueue"""
+
+    def test_fifo_order(self):
+        """Test events come out in the order they were put"""
+        queue = controls.EventQueue(4)
+        queue.put(controls.UP, 1)
+        queue.put(controls.DIAL, 2048)
+        self.assertEqual(len(queue), 2)
+        self.assertEqual(queue.get(), (controls.UP, 1))
+        self.assertEqual(queue.get(), (controls.DIAL, 2048))
+        self.assertIsNone(queue.get())
+
+    def test_wraps_around(self):
+        """Test the ring reuses its slots"""
+        queue = controls.EventQueue(3)
+        for i in range(10):
+            queue.put(controls.DIAL, i)
+            self.assertEqual(queue.get(), (controls.DIAL, i))
+
+    def test_full_queue_drops(self):
+        """Test events are dropped and counted when the queue is full"""
+        queue = controls.EventQueue(2)
+        self.assertTrue(queue.put(controls.UP))
+        self.assertTrue(queue.put(controls.DOWN))
+        self.assertFalse(queue.put(controls.LEFT))
+        self.assertEqual(queue.dropped, 1)
+        self.assertEqual(queue.get()[0], controls.UP)
+
+    def test_put_during_get(self):
+        """Test events put by interrupts in the middle of get are neither lost nor repeated"""
+        class InterruptedQueue(controls.EventQueue):
+            interrupt = None
+
+            def __setattr__(self, name, value):
+                # An "interrupt" fires before every write of get, after it read the state
+                interrupt = self.interrupt
+                if interrupt is not None:
+                    object.__setattr__(self, "interrupt", None)
+                    interrupt()
+                    object.__setattr__(self, "interrupt", interrupt)
+                object.__setattr__(self, name, value)
+
+        queue = InterruptedQueue(8)
+        queue.put(controls.UP, 0)
+        puts = []
+
+        def interrupt():
+            puts.append(len(puts) + 1)
+            queue.put(controls.DOWN, len(puts))
+
+        object.__setattr__(queue, "interrupt", interrupt)
+        self.assertEqual(queue.get(), (controls.UP, 0))
+        object.__setattr__(queue, "interrupt", None)
+        self.assertTrue(puts)
+        events = []
+        while len(queue):
+            events.append(queue.get())
+        self.assertEqual(events, [(controls.DOWN, i) for i in puts])
+
+class TestButton(unittest.TestCase):
+    """Tests for Button debouncing"""
+
+    def setUp(self):
+        self.ticks = patch_ticks(self, 'controls.ticks_ms', 1000)
+        self.pin = Pin(27, Pin.IN)
+        self.queue = controls.EventQueue()
+        self.button = controls.Button(self.pin, controls.CLICK, self.queue, debounce_ms=30)
+
+    def edge(self, level, after_ms):
+        self.ticks.now += after_ms
+        self.pin.value(level)
+        self.pin.handler(self.pin)
+
+    def test_registers_irq(self):
+        """Test both edges trigger the handler"""
+        self.assertEqual(self.pin.trigger, Pin.IRQ_FALLING | Pin.IRQ_RISING)
+
+    def test_press_and_release(self):
+        """Test a clean press and release queue two events"""
+        self.edge(0, 100)
+        self.edge(1, 200)
+        self.assertEqual(self.queue.get(), (controls.CLICK, controls.PRESSED))
+        self.assertEqual(self.queue.get(), (controls.CLICK, controls.RELEASED))
+        self.assertIsNone(self.queue.get())
+
+    def test_bounce_ignored(self):
+        """Test contact bounce produces a single press"""
+        self.edge(0, 100)
+        self.edge(1, 2)
+        self.edge(0, 3)
+        self.assertEqual(len(self.queue), 1)
+        self.button.settle()
+        self.ticks.now += 30
+        self.button.settle()
+        self.assertEqual(len(self.queue), 1)
+        self.assertTrue(self.button.pressed)
+
+    def test_settle_catches_missed_release(self):
+        """Test a release hidden inside the debounce window is picked up"""
+        self.edge(0, 100)
+        self.edge(1, 10)
+        self.assertEqual(len(self.queue), 1)
+        self.ticks.now += 30
+        self.button.settle()
+        self.queue.get()
+        self.assertEqual(self.queue.get(), (controls.CLICK, controls.RELEASED))
+
+    def test_resync(self):
+        """Test a level change without an edge is queued by resync"""
+        self.pin.value(0)
+        self.button.resync()
+        self.assertEqual(self.queue.get(), (controls.CLICK, controls.PRESSED))
+        self.button.resync()
+        self.assertIsNone(self.queue.get())
+
+class TestDialSampler(unittest.TestCase):
+    """Tests for DialSampler"""
+
+    def setUp(self):
+        self.adc = ADC(Pin(36))
+        self.queue = controls.EventQueue()
+        self.dial = controls.DialSampler(self.adc, self.queue, oversample=4, hysteresis=24)
+
+    def test_first_sample_reported(self):
+        """Test the first reading is always queued"""
+        self.adc.value = 1000
+        self.assertTrue(self.dial.sample())
+        self.assertEqual(self.queue.get(), (controls.DIAL, 1000))
+
+    def test_hysteresis(self):
+        """Test small changes are not reported"""
+        self.adc.value = 1000
+        self.dial.sample()
+        self.queue.clear()
+        self.adc.value = 1024
+        self.assertFalse(self.dial.sample())
+        self.adc.value = 1025
+        self.assertTrue(self.dial.sample())
+        self.assertEqual(self.queue.get(), (controls.DIAL, 1025))
+
+    def test_oversampling_averages(self):
+        """Test the readings are averaged"""
+        readings = iter([100, 200, 300, 400])
+        self.adc.read = lambda: next(readings)
+        self.dial.sample()
+        self.assertEqual(self.dial.value, 250)
+
+class TestControls(unittest.TestCase):
+    """Tests for Controls on the PixelKit pins"""
+
+    def test_events_from_kit(self):
+        """Test joystick and dial events share one queue"""
+        sys.modules['neopixel'] = __import__('neopixel')
+        import PixelKit as kit
+        kit.dial.value = 2000
+        c = controls.Controls(kit)
+        kit.button_a.value(0)
+        kit.button_a.handler(kit.button_a)
+        c.sample()
+        self.assertEqual(c.get(), (controls.BUTTON_A, controls.PRESSED))
+        self.assertEqual(c.get(), (controls.DIAL, 2000))
+        self.assertIsNone(c.get())
+        kit.button_a.value(1)
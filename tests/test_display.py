@@ -0,0 +1,222 @@
+"""
+Tests for display.py module
+"""
+
+import unittest
+import sys
+import os
+import tracemalloc
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+
+import app
+import display
+from framebuffer import FrameBuffer
+from pixelfonts import Font3x5, Font4x7
+from pixelfonts.basefont import compile_glyph
+from trend import Trend
+
+LOGO = compile_glyph(['#.#', '.#.'])
+
+class TestScaleColor(unittest.TestCase):
+    """Tests for scale_color"""
+
+    def test_scale(self):
+        """Test the color is dimmed into the buffer"""
+        out = bytearray(3)
+        self.assertIs(display.scale_color(0.5, (255, 100, 3), out), out)
+        self.assertEqual(out, bytearray([127, 50, 1]))
+
+    def test_invalid_brightness(self):
+        """Test a brightness outside 0 to 1 is rejected"""
+        with self.assertRaises(ValueError):
+            display.scale_color(1.5, (1, 2, 3), bytearray(3))
+
+class TestAqiDisplay(unittest.TestCase):
+    """Tests for AqiDisplay"""
+
+    def setUp(self):
+        self.fb = FrameBuffer(16, 8)
+        self.display = display.AqiDisplay(self.fb, Font4x7(16, 8, self.fb.pixel), LOGO, logo_x=0)
+        self.state = app.State()
+        self.state.link_up = True
+        self.state.aqi = 42
+        self.state.color = (200, 100, 0)
+        self.state.brightness = 0.5
+
+    def expected(self, text, color):
+        fb = FrameBuffer(16, 8)
+        fb.text(Font4x7(16, 8, fb.pixel), text, 0, 0, color)
+        return fb.buf
+
+    def test_value(self):
+        """Test the AQI is drawn in the dimmed color"""
+        self.assertTrue(self.display.draw(self.state, 0))
+        self.assertEqual(self.fb.backend.buf, self.expected(" 42", (45, 22, 0)))
+
+    def test_error(self):
+        """Test an error blanks the value in red"""
+        self.state.aqi = None
+        self.state.error = True
+        self.display.draw(self.state, 0)
+        self.assertEqual(self.fb.buf, self.expected(" --", (57, 0, 0)))
+
+    def test_link_down(self):
+        """Test the logo is shown while the link is down"""
+        self.state.link_up = False
+        self.state.connecting = True
+        self.display.draw(self.state, 0)
+        self.assertEqual(self.fb.get_pixel(0, 0), display.CONNECTING)
+        self.assertEqual(self.fb.get_pixel(1, 1), display.CONNECTING)
+        self.assertEqual(self.fb.get_pixel(1, 0), (0, 0, 0))
+
+    def test_unchanged_not_redrawn(self):
+        """Test the same state does not draw or show again"""
+        self.display.draw(self.state, 0)
+        self.assertFalse(self.display.draw(self.state, 0))
+        self.assertEqual(self.fb.backend.writes, 1)
+        self.state.brightness = 0.3
+        self.assertTrue(self.display.draw(self.state, 0))
+        self.state.aqi = 43
+        self.assertTrue(self.display.draw(self.state, 0))
+        self.assertEqual(self.display.text, " 43")
+
+    def test_text_after_logo(self):
+        """Test a value set while the logo was shown is drawn once the link is up"""
+        self.state.link_up = False
+        self.display.draw(self.state, 0)
+        self.state.link_up = True
+        self.display.draw(self.state, 0)
+        self.assertEqual(self.fb.buf, self.expected(" 42", (45, 22, 0)))
+
+    def test_steady_state_does_not_allocate(self):
+        """Test frames with an unchanged state allocate nothing"""
+        def peak(function):
+            tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                tracemalloc.reset_peak()
+                for _ in range(100):
+                    function(self.state, 0)
+                return tracemalloc.get_traced_memory()[1] - before
+            finally:
+                tracemalloc.stop()
+
+        self.display.draw(self.state, 0)
+        # The loop itself allocates a little under tracemalloc
+        self.assertLessEqual(peak(self.display.draw), peak(lambda state, now: None))
+
+    def test_status_pixel(self):
+        """Test a fetch lights the status pixel, recomposing only that pixel"""
+        self.display.draw(self.state, 0)
+        pixels = self.display.compositor.pixels
+        self.state.fetching = True
+        self.assertTrue(self.display.draw(self.state, 0))
+        self.assertEqual(self.fb.get_pixel(15, 0), display.FETCHING)
+        self.assertEqual(self.display.compositor.pixels - pixels, 1)
+        self.state.fetching = False
+        self.display.draw(self.state, 0)
+        self.assertEqual(self.fb.buf, self.expected(" 42", (45, 22, 0)))
+
+    def test_same_brightness_level(self):
+        """Test a brightness change within one palette level shows no new frame"""
+        self.display.draw(self.state, 0)
+        self.state.brightness = 0.501
+        self.assertFalse(self.display.draw(self.state, 0))
+        self.assertEqual(self.fb.backend.writes, 1)
+
+    def test_invalidate(self):
+        """Test invalidate forces the next frame to be drawn"""
+        self.display.draw(self.state, 0)
+        self.display.invalidate()
+        self.assertTrue(self.display.draw(self.state, 0))
+
+class TestAnimations(unittest.TestCase):
+    """Tests for the AqiDisplay cross-fade and ticker"""
+
+    def setUp(self):
+        self.fb = FrameBuffer(16, 8)
+        self.display = display.AqiDisplay(self.fb, Font4x7(16, 8, self.fb.pixel), LOGO, fade_ms=400)
+        self.state = app.State()
+        self.state.link_up = True
+        self.state.aqi = 11
+        self.state.color = (200, 0, 0)
+        self.state.brightness = 1.0
+
+    def test_cross_fade(self):
+        """Test a new value fades in over the old one and then stays as drawn"""
+        self.display.draw(self.state, 0)
+        self.state.aqi = 17
+        self.state.color = (0, 200, 0)
+        self.assertTrue(self.display.draw(self.state, 100))
+        # The middle digit is in both values, it blends from the old color to the new
+        self.assertEqual(self.fb.get_pixel(6, 0), (200, 0, 0))
+        self.display.draw(self.state, 300)
+        self.assertEqual(self.fb.get_pixel(6, 0), (100, 100, 0))
+        self.display.draw(self.state, 500)
+        self.assertFalse(self.display.fade.active)
+        expected = FrameBuffer(16, 8)
+        expected.text(Font4x7(16, 8, expected.pixel), " 17", 0, 0, (0, 200, 0))
+        self.assertEqual(self.fb.buf, expected.buf)
+        self.assertFalse(self.display.draw(self.state, 500))
+
+    def test_no_fade_from_logo(self):
+        """Test the value is drawn at once when the link comes up"""
+        self.state.link_up = False
+        self.display.draw(self.state, 0)
+        self.state.link_up = True
+        self.state.aqi = 12
+        self.display.draw(self.state, 0)
+        self.assertFalse(self.display.fade.active)
+
+    def test_ticker(self):
+        """Test scrolled text hides the value until it has passed"""
+        self.display.draw(self.state, 0)
+        self.display.scroll("HI", Font3x5(16, 8, None), 0, speed=10)
+        self.assertTrue(self.display.draw(self.state, 100))
+        self.assertFalse(self.display.value.visible)
+        self.assertEqual(self.fb.get_pixel(15, 1), (255, 255, 255))
+        self.assertEqual(self.fb.get_pixel(1, 0), (0, 0, 0))
+        self.display.draw(self.state, 2500)
+        self.assertIsNone(self.display.scroller)
+        self.assertTrue(self.display.value.visible)
+        self.assertFalse(self.display.draw(self.state, 2500))
+
+class TestTrendDisplay(unittest.TestCase):
+    """Tests for TrendDisplay"""
+
+    def setUp(self):
+        self.fb = FrameBuffer(16, 8)
+        self.trend = Trend(4, hours=4)    # One hour per column
+        self.display = display.TrendDisplay(self.fb, self.trend, lambda pm25: (200, 100, 0), floor=7.0)
+        self.state = app.State()
+        self.state.brightness = 1.0
+
+    def test_columns(self):
+        """Test each column spans min to max dimmed, with the mean at full brightness"""
+        self.trend.add(3600, 0.0)
+        self.trend.add(3601, 2.0)
+        self.trend.add(3 * 3600, 7.0)
+        self.display.draw(self.state)
+        # Right-aligned: the oldest of the 4 columns is x=12
+        self.assertEqual(self.fb.get_pixel(12, 7), (0, 0, 0))
+        self.assertEqual(self.fb.get_pixel(13, 7), (50, 25, 0))
+        self.assertEqual(self.fb.get_pixel(13, 6), (200, 100, 0))
+        self.assertEqual(self.fb.get_pixel(13, 5), (50, 25, 0))
+        self.assertEqual(self.fb.get_pixel(13, 4), (0, 0, 0))
+        self.assertEqual(self.fb.get_pixel(14, 7), (0, 0, 0))
+        self.assertEqual(self.fb.get_pixel(15, 0), (200, 100, 0))
+
+    def test_redrawn_on_change(self):
+        """Test frames are only drawn when the trend or brightness changes"""
+        self.trend.add(3600, 5.0)
+        self.assertTrue(self.display.draw(self.state))
+        self.assertFalse(self.display.draw(self.state))
+        self.trend.add(3700, 6.0)
+        self.assertTrue(self.display.draw(self.state))
+        self.state.brightness = 0.5
+        self.assertTrue(self.display.draw(self.state))
+        self.assertEqual(self.fb.backend.writes, 3)
@@ -0,0 +1,86 @@
+"""
+Tests for framebuffer.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+from framebuffer import FrameBuffer, MemoryBackend
+from pixelfonts import Font4x7
+from pixelfonts.basefont import compile_glyph
+
+RED = (255, 0, 0)
+BLUE = (0, 0, 255)
+BLACK = (0, 0, 0)
+
+def lit(fb):
+    """Set of (x, y) pixels that are not black"""
+    return {(x, y) for y in range(fb.height) for x in range(fb.width) if fb.get_pixel(x, y) != BLACK}
+
+class TestFrameBufferDrawing(unittest.TestCase):
+    """Tests for the FrameBuffer drawing primitives"""
+
+    def setUp(self):
+        self.fb = FrameBuffer(16, 8)
+
+    def test_pixel_grb_order(self):
+        """Test pixels are stored in GRB order"""
+        self.fb.pixel(1, 0, (1, 2, 3))
+        self.assertEqual(self.fb.buf[3:6], bytearray([2, 1, 3]))
+        self.assertEqual(self.fb.get_pixel(1, 0), (1, 2, 3))
+
+    def test_pixel_out_of_bounds(self):
+        """Test pixels outside the buffer are ignored"""
+        self.fb.pixel(16, 0, RED)
+        self.fb.pixel(-1, 3, RED)
+        self.fb.pixel(0, 8, RED)
+        self.assertEqual(lit(self.fb), set())
+
+    def test_fill_and_clear(self):
+        """Test fill sets every pixel and clear resets them"""
+        self.fb.fill(BLUE)
+        self.assertEqual(len(lit(self.fb)), 128)
+        self.fb.clear()
+        self.assertEqual(lit(self.fb), set())
+
+    def test_fill_rect_clipped(self):
+        """Test fill_rect clips to the buffer"""
+        self.fb.fill_rect(14, 6, 4, 4, RED)
+        self.assertEqual(lit(self.fb), {(14, 6), (15, 6), (14, 7), (15, 7)})
+        self.assertEqual(self.fb.get_pixel(15, 7), RED)
+
+    def test_hline_vline(self):
+        """Test horizontal and vertical lines"""
+        self.fb.hline(0, 2, 3, RED)
+        self.fb.vline(5, 5, 10, BLUE)
+        self.assertEqual(lit(self.fb), {(0, 2), (1, 2), (2, 2), (5, 5), (5, 6), (5, 7)})
+
+    def test_blit_clipped(self):
+        """Test blit draws lit sprite bits and clips to the buffer"""
+        sprite = compile_glyph(["#.", "##"])
+        self.fb.blit(sprite, 15, 6, RED)
+        self.assertEqual(lit(self.fb), {(15, 6), (15, 7)})
+
+    def test_text_matches_font(self):
+        """Test text draws the same pixels as the font's pixel renderer"""
+        pixels = set()
+        Font4x7(16, 8, lambda x, y, color: pixels.add((x, y))).text("123", 1, 0, RED)
+        self.fb.text(Font4x7(16, 8, self.fb.pixel), "123", 1, 0, RED)
+        self.assertEqual(lit(self.fb), pixels)
+
+class TestFrameBufferShow(unittest.TestCase):
+    """Tests for sending frames to a backend"""
+
+    def test_show_copies_to_memory_backend(self):
+        """Test show copies the frame into the backend"""
+        backend = MemoryBackend(16 * 8 * 3)
+        fb = FrameBuffer(16, 8, backend)
+        fb.pixel(0, 0, RED)
+        self.assertTrue(fb.show())
+        self.assertEqual(backend.buf, fb.buf)
+        self.assertIsNot(backend.buf, fb.buf)
+        self.assertEqual(backend.writes, 1)
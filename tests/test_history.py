@@ -0,0 +1,131 @@
+"""
+Tests for history.py module
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+import history
+from history import HistoryStore, RECORD_SIZE
+
+class TestRecords(unittest.TestCase):
+    """Tests for encode, decode and pm25"""
+
+    def test_round_trip(self):
+        """Test a record keeps its values at the stored resolution"""
+        buf = bytearray(RECORD_SIZE * 2)
+        history.encode(buf, RECORD_SIZE, 1756695878, 12.34, 11.96, 57, 41.6, 72.4)
+        self.assertEqual(history.decode(buf, RECORD_SIZE), (1756695878, 12.3, 12.0, 57, 42, 72))
+        self.assertEqual(RECORD_SIZE, 12)
+
+    def test_missing_and_clamped(self):
+        """Test None is kept as missing and out of range values are clamped"""
+        buf = bytearray(RECORD_SIZE)
+        history.encode(buf, 0, 100, None, 9000.0, None, None, None)
+        self.assertEqual(history.decode(buf), (100, None, 6553.4, None, None, None))
+        history.encode(buf, 0, 100, -1.0, 0.0, 9999999, 120, -300)
+        self.assertEqual(history.decode(buf), (100, 0.0, 0.0, 65534, 120, -127))
+
+    def test_pm25(self):
+        """Test the channels are averaged, or the one reported is used"""
+        self.assertEqual(history.pm25((0, 10.0, 12.0, 0, 0, 0)), 11.0)
+        self.assertEqual(history.pm25((0, None, 12.0, 0, 0, 0)), 12.0)
+        self.assertIsNone(history.pm25((0, None, None, 0, 0, 0)))
+
+class TestHistoryStore(unittest.TestCase):
+    """Tests for HistoryStore"""
+
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'history')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def store(self, **kwargs):
+        store = HistoryStore(self.path, **kwargs)
+        store.open()
+        return store
+
+    def fill(self, store, count, start=1000, step=120):
+        for i in range(count):
+            store.append(start + i * step, i / 10, i / 10, i, 50, 70)
+
+    def test_block_writes(self):
+        """Test records reach flash a block at a time"""
+        store = self.store(block_records=10)
+        self.fill(store, 25)
+        self.assertEqual(store.writes, 2)
+        self.assertEqual(len(store), 25)
+        self.assertEqual(len(list(store.scan())), 25)
+        store.flush()
+        self.assertEqual(store.writes, 3)
+
+    def test_rejects_old(self):
+        """Test a reading not newer than the latest is ignored"""
+        store = self.store()
+        self.assertTrue(store.append(1000, 1.0))
+        self.assertFalse(store.append(1000, 2.0))
+        self.assertFalse(store.append(900, 2.0))
+        self.assertEqual(len(store), 1)
+
+    def test_reopen(self):
+        """Test flushed records are found again after a reboot and unflushed ones are lost"""
+        store = self.store(block_records=10, segment_records=30, stride=8)
+        self.fill(store, 75)
+        reopened = self.store(block_records=10, segment_records=30, stride=8)
+        self.assertEqual(len(reopened), 70)
+        self.assertEqual(reopened.latest, 1000 + 69 * 120)
+        self.assertEqual([r[0] for r in reopened.scan()], [1000 + i * 120 for i in range(70)])
+        # Appending continues in the partly filled segment
+        reopened.append(100000, 1.0)
+        self.assertEqual(list(reopened.scan(100000))[0][:2], (100000, 1.0))
+
+    def test_segment_ring(self):
+        """Test the oldest segment is deleted once the ring is full"""
+        store = self.store(segments=3, segment_records=20, block_records=5)
+        self.fill(store, 100)
+        store.flush()
+        self.assertEqual(len(os.listdir(self.path)), 3)
+        self.assertEqual(len(store), 60)
+        times = [r[0] for r in store.scan()]
+        self.assertEqual(times, [1000 + i * 120 for i in range(40, 100)])
+
+    def test_scan_range(self):
+        """Test a scan returns exactly the records in the range, across segments and the block buffer"""
+        store = self.store(segment_records=50, block_records=7, stride=8)
+        self.fill(store, 123, start=10, step=10)
+        self.assertEqual([r[0] for r in store.scan(455, 1000)], list(range(460, 1001, 10)))
+        self.assertEqual([r[0] for r in store.scan(1195)], [1200, 1210, 1220, 1230])
+        self.assertEqual([r[0] for r in store.scan(None, 30)], [10, 20, 30])
+        self.assertEqual(list(store.scan(5000)), [])
+        self.assertEqual(len(list(store.scan(-100))), 123)
+
+    def test_locate_uses_index(self):
+        """Test the sparse index points at most a stride before the wanted record"""
+        store = self.store(segment_records=100, stride=16)
+        self.fill(store, 250, start=1, step=1)
+        self.assertEqual(store._locate(171), (1, 64))
+        self.assertEqual(store._locate(1), (0, 0))
+        self.assertEqual(store._locate(250), (2, 48))
+
+    def test_torn_record(self):
+        """Test a partly written record is skipped and new records start a new segment"""
+        store = self.store(block_records=1)
+        self.fill(store, 3)
+        name = os.listdir(self.path)[0]
+        with open(os.path.join(self.path, name), 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        reopened = self.store(block_records=1)
+        self.assertEqual(len(reopened), 3)
+        reopened.append(5000, 1.0)
+        self.assertEqual(len(os.listdir(self.path)), 2)
+        self.assertEqual([r[0] for r in reopened.scan()], [1000, 1120, 1240, 5000])
+
+if __name__ == "__main__":
+    unittest.main()
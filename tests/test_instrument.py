@@ -0,0 +1,124 @@
+"""
+Tests for instrument.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+
+import instrument
+from framebuffer import FrameBuffer
+from jsonfields import FieldExtractor
+from pixelfonts import Font4x7
+
+class InstrumentTestCase(unittest.TestCase):
+    """Enables instrumentation for the test and restores it afterwards"""
+
+    def setUp(self):
+        instrument.enable()
+        instrument.reset()
+
+    def tearDown(self):
+        instrument.enable(False)
+        instrument.reset()
+
+class TestTimer(InstrumentTestCase):
+    """Tests for Timer"""
+
+    def test_record(self):
+        """Test count, mean and max"""
+        timer = instrument.Timer("t")
+        for us in (100, 300, 200):
+            timer.record(us)
+        self.assertEqual(timer.count, 3)
+        self.assertEqual(timer.mean(), 200)
+        self.assertEqual(timer.max, 300)
+
+    def test_histogram(self):
+        """Test durations land in log2 buckets"""
+        timer = instrument.Timer("t")
+        timer.record(0)
+        timer.record(1)
+        timer.record(5)
+        timer.record(7)
+        timer.record(1 << 40)
+        self.assertEqual(timer.histogram[0], 1)
+        self.assertEqual(timer.histogram[1], 1)
+        self.assertEqual(timer.histogram[3], 2)
+        self.assertEqual(timer.histogram[timer.BUCKETS - 1], 1)
+
+    def test_percentile(self):
+        """Test the percentile is the upper edge of its bucket"""
+        timer = instrument.Timer("t")
+        for _ in range(9):
+            timer.record(100)
+        timer.record(5000)
+        self.assertEqual(timer.percentile(50), 128)
+        self.assertEqual(timer.percentile(100), 5000)
+
+    def test_total_stays_small(self):
+        """Test the total restarts instead of growing past the small int range"""
+        timer = instrument.Timer("t")
+        big = instrument.MAX_TOTAL // 3
+        for _ in range(3):
+            timer.record(big)
+        timer.record(big + 10)
+        self.assertEqual(timer.count, 4)
+        self.assertEqual(timer.total, big + 10)
+        self.assertEqual(timer.mean(), big + 10)
+        self.assertLessEqual(timer.total, instrument.MAX_TOTAL)
+
+    def test_start_stop(self):
+        """Test a measured interval is recorded"""
+        timer = instrument.Timer("t")
+        start = timer.start()
+        timer.stop(start)
+        self.assertEqual(timer.count, 1)
+        self.assertGreaterEqual(timer.total, 0)
+
+    def test_disabled(self):
+        """Test nothing is recorded while disabled"""
+        instrument.enable(False)
+        timer = instrument.Timer("t")
+        counter = instrument.Counter("c")
+        self.assertEqual(timer.start(), 0)
+        timer.stop(timer.start())
+        timer.record(10)
+        counter.add()
+        self.assertEqual(timer.count, 0)
+        self.assertEqual(counter.count, 0)
+
+class TestRegistry(InstrumentTestCase):
+    """Tests for the named metrics and reports"""
+
+    def test_same_metric(self):
+        """Test a name always returns the same metric"""
+        self.assertIs(instrument.timer("test.a"), instrument.timer("test.a"))
+        self.assertIs(instrument.counter("test.b"), instrument.counter("test.b"))
+
+    def test_log_line(self):
+        """Test the log line only lists metrics with data"""
+        instrument.timer("test.timer").record(250)
+        instrument.counter("test.counter").add(3)
+        line = instrument.log_line()
+        self.assertIn("test.timer n=1 avg=250us", line)
+        self.assertIn("test.counter=3", line)
+        self.assertNotIn("kit.render", line)
+
+    def test_collect(self):
+        """Test garbage collection pauses are timed"""
+        instrument.collect()
+        self.assertEqual(instrument.timer("gc").count, 1)
+
+    def test_probes(self):
+        """Test the library hot paths record into their timers"""
+        fb = FrameBuffer(16, 8)
+        fb.text(Font4x7(16, 8, fb.pixel), "12", 0, 0, (1, 2, 3))
+        FieldExtractor(["a"]).feed(b'{"a": 1}')
+        self.assertEqual(instrument.timer("fb.text").count, 1)
+        self.assertEqual(instrument.timer("json.feed").count, 1)
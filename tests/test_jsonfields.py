@@ -0,0 +1,114 @@
+"""
+Tests for jsonfields.py module
+"""
+
+import unittest
+import sys
+import os
+import json
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+from jsonfields import FieldExtractor
+
+RESPONSE = {
+    "api_version": "V1.0.11-0.0.38",
+    "time_stamp": 1700000100,
+    "sensor": {
+        "sensor_index": 12345,
+        "name": "Back \"yard\"\n",
+        "last_seen": 1700000000,
+        "stats": {"pm2.5": 99.9},
+        "pm2.5": 10.5,
+        "confidence": None,
+        "private": False,
+        "temperature": -3e1,
+    }
+}
+
+def extract(fields, document, piece_size=None):
+    extractor = FieldExtractor(fields)
+    data = json.dumps(document).encode()
+    piece_size = piece_size or len(data)
+    for i in range(0, len(data), piece_size):
+        extractor.feed(memoryview(data)[i:i + piece_size])
+    return extractor
+
+class TestFieldExtractor(unittest.TestCase):
+    """Tests for the FieldExtractor class"""
+
+    FIELDS = ["pm2.5", "last_seen", "time_stamp", "name", "confidence", "private", "temperature"]
+
+    def test_extracts_nested_and_top_level(self):
+        """Test fields are found at any depth and decoded"""
+        result = extract(self.FIELDS, RESPONSE)
+        self.assertEqual(result.as_dict(), {
+            "pm2.5": 10.5,
+            "last_seen": 1700000000,
+            "time_stamp": 1700000100,
+            "name": "Back \"yard\"\n",
+            "confidence": None,
+            "private": False,
+            "temperature": -30.0,
+        })
+        self.assertEqual(result.found, len(self.FIELDS))
+
+    def test_any_piece_size(self):
+        """Test the result does not depend on how the document is split"""
+        expected = extract(self.FIELDS, RESPONSE).as_dict()
+        for piece_size in (1, 2, 3, 7, 64):
+            self.assertEqual(extract(self.FIELDS, RESPONSE, piece_size).as_dict(), expected)
+
+    def test_shallowest_value_wins(self):
+        """Test a nested duplicate key does not replace the outer value"""
+        result = extract(["pm2.5"], RESPONSE)
+        self.assertEqual(result.get("pm2.5"), 10.5)
+
+    def test_key_text_in_values_ignored(self):
+        """Test a value equal to a field name is not mistaken for a key"""
+        result = extract(["pm2.5"], {"name": "pm2.5", "list": ["pm2.5", 1], "pm2.5": 4})
+        self.assertEqual(result.get("pm2.5"), 4)
+
+    def test_missing_and_container_fields(self):
+        """Test missing keys and container values stay None"""
+        result = extract(["missing", "stats"], RESPONSE)
+        self.assertIsNone(result.get("missing"))
+        self.assertEqual(result.get("stats", "default"), "default")
+        self.assertEqual(result.found, 0)
+
+    def test_long_values_truncated(self):
+        """Test strings longer than the token buffer are truncated"""
+        extractor = FieldExtractor(["name"], max_value_len=4)
+        extractor.feed(b'{"name": "abcdefgh"}')
+        self.assertEqual(extractor.get("name"), "abcd")
+
+    def test_truncated_at_character_boundary(self):
+        """Test truncation never splits a UTF-8 character"""
+        extractor = FieldExtractor(["name"], max_value_len=4)
+        extractor.feed('{"name": "café au lait"}'.encode())
+        self.assertEqual(extractor.get("name"), "caf")
+        extractor = FieldExtractor(["name"], max_value_len=5)
+        extractor.feed('{"name": "café"}'.encode())
+        self.assertEqual(extractor.get("name"), "café")
+
+    def test_unicode_escapes(self):
+        """Test \\uXXXX escapes are decoded, surrogate pairs included, in pieces of any size"""
+        data = b'{"name": "caf\\u00e9 \\u2603 \\ud83d\\ude00", "n": "\\u00E9"}'
+        for size in (1, 3, len(data)):
+            extractor = FieldExtractor(["name", "n"])
+            for i in range(0, len(data), size):
+                extractor.feed(data[i:i + size])
+            self.assertEqual(extractor.get("name"), "caf\u00e9 \u2603 \U0001F600")
+            self.assertEqual(extractor.get("n"), "\u00e9")
+
+    def test_reset(self):
+        """Test reset clears values for reuse"""
+        extractor = extract(self.FIELDS, RESPONSE)
+        values = extractor.values
+        extractor.reset()
+        extractor.feed(b'{"pm2.5": 1}')
+        self.assertIs(extractor.values, values)
+        self.assertEqual(extractor.get("pm2.5"), 1)
+        self.assertIsNone(extractor.get("name"))
+        self.assertEqual(extractor.found, 1)
@@ -0,0 +1,82 @@
+"""
+Tests for memory.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+import memory
+
+class TestLargestFreeBlock(unittest.TestCase):
+    """Tests for largest_free_block"""
+
+    def test_limit(self):
+        """Test the search stops at the limit, rounded down to the step"""
+        self.assertEqual(memory.largest_free_block(10000, step=64), 9984)
+
+    def test_memory_error(self):
+        """Test the search backs off from sizes that cannot be allocated"""
+        import builtins
+        real = builtins.bytearray
+
+        def limited(size):
+            if size > 3000:
+                raise MemoryError
+            return real(size)
+
+        memory.bytearray = limited
+        try:
+            self.assertEqual(memory.largest_free_block(10000, step=100), 3000)
+        finally:
+            del memory.bytearray
+
+class TestMemoryMonitor(unittest.TestCase):
+    """Tests for MemoryMonitor"""
+
+    def test_fragmentation(self):
+        """Test fragmentation is the free share outside the largest block"""
+        monitor = memory.MemoryMonitor(4)
+        self.assertEqual(monitor.fragmentation(), 0.0)
+        monitor.sample(free=40000, largest=30000)
+        self.assertAlmostEqual(monitor.fragmentation(), 0.25)
+
+    def test_no_probe_by_default(self):
+        """Test a sample does not search for the largest block unless asked"""
+        probed = []
+        real = memory.largest_free_block
+        memory.largest_free_block = lambda limit=None, step=64: probed.append(limit) or 1000
+        try:
+            monitor = memory.MemoryMonitor(4)
+            monitor.sample(free=4000)
+            self.assertEqual(probed, [])
+            self.assertIsNone(monitor.fragmentation())
+            self.assertNotIn("largest", monitor.summary())
+            monitor.sample(free=4000, probe=True)
+            self.assertEqual(probed, [4000])
+            self.assertAlmostEqual(monitor.fragmentation(), 0.75)
+        finally:
+            memory.largest_free_block = real
+
+    def test_history(self):
+        """Test the history keeps the newest samples and the minimum"""
+        monitor = memory.MemoryMonitor(3)
+        for free in (50000, 42000, 45000, 41000, 44000):
+            monitor.sample(free=free, largest=free // 2)
+        self.assertEqual(monitor.count, 3)
+        self.assertEqual(monitor.min_free, 41000)
+        summary = monitor.summary()
+        self.assertIn("free=44000", summary)
+        self.assertIn("min_free=41000", summary)
+        self.assertIn("change=-1000 over 3 samples", summary)
+
+    def test_configure_gc(self):
+        """Test the threshold is only set where the port supports it"""
+        import gc
+        if hasattr(gc, "threshold") and hasattr(gc, "mem_free"):
+            self.assertGreater(memory.configure_gc(), 0)
+        else:
+            self.assertEqual(memory.configure_gc(), 0)
@@ -0,0 +1,124 @@
+"""
+Tests for nowcast.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+from nowcast import SampleRing, NowCast, HOUR
+
+# Start of a clock hour
+BASE = 1700000000 // HOUR * HOUR
+
+def reference_nowcast(hourly):
+    """NowCast from hourly averages, newest first, None for missing hours"""
+    present = [c for c in hourly if c is not None]
+    weight = max(min(present) / max(present), 0.5)
+    total = sum(weight ** i * c for i, c in enumerate(hourly) if c is not None)
+    weights = sum(weight ** i for i, c in enumerate(hourly) if c is not None)
+    return total / weights
+
+class TestSampleRing(unittest.TestCase):
+    """Tests for the SampleRing class"""
+
+    def test_append_and_get(self):
+        """Test samples are returned oldest first"""
+        ring = SampleRing(4)
+        for t in range(3):
+            ring.append(100 + t, t * 1.5)
+        self.assertEqual(len(ring), 3)
+        self.assertEqual(ring.get(0), (100, 0.0))
+        self.assertEqual(ring.get(-1), (102, 3.0))
+        self.assertEqual(ring.latest(), (102, 3.0))
+
+    def test_wraps_at_capacity(self):
+        """Test the oldest samples are overwritten once full"""
+        ring = SampleRing(3)
+        for t in range(5):
+            ring.append(100 + t, float(t))
+        self.assertEqual(len(ring), 3)
+        self.assertEqual([ring.get(i)[0] for i in range(3)], [102, 103, 104])
+        with self.assertRaises(IndexError):
+            ring.get(3)
+
+    def test_rejects_old_samples(self):
+        """Test repeated or older timestamps are ignored"""
+        ring = SampleRing(3)
+        self.assertTrue(ring.append(100, 1.0))
+        self.assertFalse(ring.append(100, 2.0))
+        self.assertFalse(ring.append(99, 2.0))
+        self.assertEqual(len(ring), 1)
+
+    def test_clear(self):
+        """Test clear empties the ring"""
+        ring = SampleRing(3)
+        ring.append(100, 1.0)
+        ring.clear()
+        self.assertEqual(len(ring), 0)
+        self.assertIsNone(ring.latest())
+
+class TestNowCast(unittest.TestCase):
+    """Tests for the NowCast class"""
+
+    def add_hours(self, nowcast, hourly):
+        """Add readings for hourly averages given newest first"""
+        for i, value in enumerate(reversed(hourly)):
+            if value is not None:
+                start = BASE + i * HOUR
+                nowcast.add(start + 60, value - 1)
+                nowcast.add(start + 1800, value + 1)
+
+    def test_matches_reference(self):
+        """Test against the NowCast computed directly from hourly averages"""
+        hourly = [35.0, 40.0, 12.0, None, 80.0, 5.0, 9.0, 10.0, 11.0, 12.0, 13.0, 14.0]
+        nowcast = NowCast()
+        self.add_hours(nowcast, hourly)
+        self.assertAlmostEqual(nowcast.concentration(), reference_nowcast(hourly), places=4)
+
+    def test_stable_air_is_average(self):
+        """Test steady readings give the same concentration"""
+        nowcast = NowCast()
+        self.add_hours(nowcast, [20.0] * 12)
+        self.assertAlmostEqual(nowcast.concentration(), 20.0, places=4)
+
+    def test_requires_recent_hours(self):
+        """Test two of the three most recent hours are required"""
+        nowcast = NowCast()
+        self.add_hours(nowcast, [10.0, None, None, 10.0])
+        self.assertIsNone(nowcast.concentration())
+        nowcast = NowCast()
+        self.add_hours(nowcast, [10.0, None, 12.0])
+        self.assertIsNotNone(nowcast.concentration())
+
+    def test_old_hours_expire(self):
+        """Test hours more than 12 hours ago are no longer used"""
+        nowcast = NowCast()
+        self.add_hours(nowcast, [10.0, 10.0])
+        self.assertIsNotNone(nowcast.concentration())
+        self.assertIsNone(nowcast.concentration(now=BASE + 30 * HOUR))
+        nowcast.add(BASE + 13 * HOUR, 50.0)
+        nowcast.add(BASE + 14 * HOUR, 50.0)
+        self.assertAlmostEqual(nowcast.concentration(), 50.0, places=4)
+
+    def test_rejects_old_samples(self):
+        """Test repeated, older or invalid samples are ignored"""
+        nowcast = NowCast()
+        self.assertTrue(nowcast.add(BASE, 10.0))
+        self.assertFalse(nowcast.add(BASE, 10.0))
+        self.assertFalse(nowcast.add(BASE + 1, None))
+        self.assertFalse(nowcast.add(BASE + 2, -1.0))
+        self.assertAlmostEqual(nowcast.hourly_average(0), 10.0)
+
+    def test_load_from_ring(self):
+        """Test a NowCast can be rebuilt from a SampleRing"""
+        ring = SampleRing(8)
+        for i in range(6):
+            ring.append(BASE + i * 1200, float(i))
+        nowcast = NowCast()
+        nowcast.load(ring)
+        self.assertAlmostEqual(nowcast.hourly_average(0), 4.0)
+        self.assertAlmostEqual(nowcast.hourly_average(1), 1.0)
@@ -0,0 +1,75 @@
+"""
+Tests for palette.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+import palette
+from palette import Palette
+
+GREEN = (0, 228, 0)
+ORANGE = (255, 126, 0)
+
+class TestGammaTable(unittest.TestCase):
+    """Tests for gamma_table"""
+
+    def test_table(self):
+        """Test the table has 256 rising entries from 0 to 255"""
+        lut = palette.gamma_table()
+        self.assertIsInstance(lut, bytes)
+        self.assertEqual(len(lut), 256)
+        self.assertEqual((lut[0], lut[128], lut[255]), (0, 56, 255))
+        self.assertTrue(all(a <= b for a, b in zip(lut, lut[1:])))
+
+    def test_linear(self):
+        """Test a gamma of 1 gives the identity"""
+        self.assertEqual(palette.gamma_table(1.0), bytes(range(256)))
+
+class TestPalette(unittest.TestCase):
+    """Tests for Palette"""
+
+    def test_scaled(self):
+        """Test colors are dimmed through the gamma table"""
+        p = Palette((GREEN, ORANGE))
+        self.assertEqual(p.scaled(ORANGE), bytearray(ORANGE))
+        p.set_brightness(0.5)
+        self.assertEqual(p.scaled(ORANGE), bytearray([57, 28, 0]))
+        self.assertEqual(p.scaled(GREEN), bytearray([0, 51, 0]))
+
+    def test_linear_table(self):
+        """Test a linear table dims in proportion"""
+        p = Palette(levels=256, lut=palette.gamma_table(1.0))
+        p.set_brightness(0.2)
+        self.assertEqual(p.scaled((255, 100, 10)), bytearray([51, 20, 2]))
+
+    def test_rebuilt_only_on_level_change(self):
+        """Test the cache is kept while the brightness stays within a level"""
+        p = Palette((GREEN,), levels=16)
+        cached = p.scaled(GREEN)
+        rebuilds = p.rebuilds
+        self.assertTrue(p.set_brightness(0.5))
+        self.assertFalse(p.set_brightness(0.51))
+        self.assertEqual(p.rebuilds, rebuilds + 1)
+        self.assertIs(p.scaled(GREEN), cached)
+
+    def test_new_color_cached(self):
+        """Test a color not given at creation is cached on first use and kept up to date"""
+        p = Palette()
+        p.set_brightness(0.5)
+        color = p.scaled((255, 255, 255))
+        self.assertIs(p.scaled((255, 255, 255)), color)
+        p.set_brightness(1.0)
+        self.assertEqual(color, bytearray([255, 255, 255]))
+
+    def test_invalid_brightness(self):
+        """Test a brightness outside 0 to 1 is rejected"""
+        with self.assertRaises(ValueError):
+            Palette().set_brightness(1.5)
+
+if __name__ == "__main__":
+    unittest.main()
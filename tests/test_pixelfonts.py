@@ -0,0 +1,102 @@
+"""
+Tests for the pixelfonts package
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+from pixelfonts import Font3x5, Font4x7
+from pixelfonts.basefont import BaseFont, compile_glyph
+
+def reference_pixels(font_class, char, x_offset=0, y_offset=0):
+    """Lit pixels of a glyph, read directly from its string art"""
+    pixels = set()
+    for y, row in enumerate(font_class.FONT[char]):
+        for x, col in enumerate(row):
+            if col == '#':
+                pixels.add((x + x_offset, y + y_offset))
+    return pixels
+
+class TestCompileGlyph(unittest.TestCase):
+    """Tests for the compile_glyph function"""
+
+    def test_compile_glyph_columns(self):
+        """Test each column becomes a bitmask with bit 0 as the top row"""
+        result = compile_glyph(["#.", ".#", "##"])
+        self.assertEqual(result, bytes([0b101, 0b110]))
+
+    def test_compile_glyph_blank(self):
+        """Test a blank glyph compiles to empty columns"""
+        result = compile_glyph(["   ", "   "])
+        self.assertEqual(result, bytes(3))
+
+    def test_glyph_table_cached_per_class(self):
+        """Test each font class compiles its own table once"""
+        self.assertIs(Font4x7.glyphs(), Font4x7.glyphs())
+        self.assertIsNot(Font4x7.glyphs(), Font3x5.glyphs())
+
+    def test_precompiled_glyphs(self):
+        """Test a GLYPHS table is used as is, without a FONT table"""
+        class Precompiled(BaseFont):
+            WIDTH = 2
+            HEIGHT = 3
+            GLYPHS = {"1": b"\x05\x06"}
+
+        self.assertIs(Precompiled.glyphs(), Precompiled.GLYPHS)
+        self.assertEqual(Precompiled(8, 8, None).glyph("1"), bytes([0b101, 0b110]))
+
+class TestDrawChar(unittest.TestCase):
+    """Tests for BaseFont.draw_char and BaseFont.text"""
+
+    def render(self, font_class, width, height, draw):
+        pixels = []
+        font = font_class(width, height, lambda x, y, *args: pixels.append((x, y) + args))
+        draw(font)
+        return pixels
+
+    def test_draw_char_matches_string_art(self):
+        """Test every glyph draws exactly the pixels of its string art"""
+        for font_class in (Font3x5, Font4x7):
+            for char in font_class.FONT:
+                pixels = self.render(font_class, 16, 8, lambda f: f.draw_char(char, 2, 1))
+                self.assertEqual(set(pixels), reference_pixels(font_class, char, 2, 1))
+                self.assertEqual(len(pixels), len(set(pixels)))
+
+    def test_draw_char_passes_args(self):
+        """Test extra arguments are forwarded to the pixel function"""
+        pixels = self.render(Font4x7, 16, 8, lambda f: f.draw_char("1", 0, 0, (1, 2, 3)))
+        self.assertTrue(pixels)
+        self.assertTrue(all(p[2] == (1, 2, 3) for p in pixels))
+
+    def test_draw_char_clips_to_region(self):
+        """Test partially visible glyphs are clipped to the region"""
+        pixels = self.render(Font4x7, 16, 8, lambda f: f.draw_char("8", 14, 3))
+        expected = {p for p in reference_pixels(Font4x7, "8", 14, 3) if p[0] < 16 and p[1] < 8}
+        self.assertEqual(set(pixels), expected)
+
+    def test_draw_char_outside_region(self):
+        """Test glyphs fully outside the region draw nothing"""
+        pixels = self.render(Font4x7, 16, 8, lambda f: f.draw_char("8", 16, 0))
+        self.assertEqual(pixels, [])
+
+    def test_draw_char_unknown(self):
+        """Test unknown characters raise ValueError"""
+        font = Font4x7(16, 8, lambda x, y: None)
+        with self.assertRaises(ValueError):
+            font.draw_char("A", 0, 0)
+
+    def test_font3x5_letters(self):
+        """Test the small font has every capital letter, for scrolling names"""
+        font = Font3x5(16, 8, lambda x, y: None)
+        for code in range(ord("A"), ord("Z") + 1):
+            self.assertEqual(len(font.glyph(chr(code))), 3)
+
+    def test_text_spacing(self):
+        """Test text advances one glyph width plus one column per character"""
+        pixels = self.render(Font3x5, 16, 8, lambda f: f.text("12", 0, 0))
+        expected = reference_pixels(Font3x5, "1") | reference_pixels(Font3x5, "2", 4, 0)
+        self.assertEqual(set(pixels), expected)
@@ -0,0 +1,72 @@
+"""
+Tests for PixelKit.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+
+# Mock machine and neopixel before importing PixelKit
+sys.modules['machine'] = __import__('machine')
+sys.modules['neopixel'] = __import__('neopixel')
+
+import PixelKit as kit
+
+class TestRender(unittest.TestCase):
+    """Tests for render and its redundant write detection"""
+
+    def setUp(self):
+        kit.clear()
+        kit.has_rendered = False
+        kit.reset_render_stats()
+        kit.np.write_count = 0
+
+    def test_first_render_writes(self):
+        """Test the first frame is always written"""
+        self.assertTrue(kit.render())
+        self.assertEqual(kit.np.write_count, 1)
+        self.assertEqual(kit.render_stats(), (1, 0))
+
+    def test_unchanged_frame_skipped(self):
+        """Test an identical frame is not written again"""
+        kit.set_pixel(1, 1, (10, 20, 30))
+        kit.render()
+        kit.clear()
+        kit.set_pixel(1, 1, (10, 20, 30))
+        self.assertFalse(kit.render())
+        self.assertEqual(kit.np.write_count, 1)
+        self.assertEqual(kit.render_stats(), (1, 1))
+
+    def test_changed_frame_written(self):
+        """Test a changed frame is written"""
+        kit.render()
+        kit.set_pixel(15, 7, (1, 0, 0))
+        self.assertTrue(kit.render())
+        self.assertEqual(kit.np.write_count, 2)
+        self.assertEqual(kit.render_stats(), (2, 0))
+
+    def test_force_render(self):
+        """Test force writes even an unchanged frame"""
+        kit.render()
+        self.assertTrue(kit.render(force=True))
+        self.assertEqual(kit.np.write_count, 2)
+
+    def test_reset_render_stats(self):
+        """Test the counters can be reset"""
+        kit.render()
+        kit.render()
+        kit.reset_render_stats()
+        self.assertEqual(kit.render_stats(), (0, 0))
+
+    def test_write_bulk_frame(self):
+        """Test write copies a whole GRB frame into the NeoPixel buffer"""
+        frame = bytearray(len(kit.np.buf))
+        frame[0:3] = bytes([1, 2, 3])
+        self.assertTrue(kit.write(frame))
+        self.assertEqual(kit.np[0], (2, 1, 3))
+        self.assertFalse(kit.write(frame))
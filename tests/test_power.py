@@ -0,0 +1,91 @@
+"""
+Tests for power.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+
+# Mock machine before importing power
+sys.modules['machine'] = __import__('machine')
+
+import app
+import power
+from fakeclock import FakeClock, run_for
+
+class TestPowerManager(unittest.TestCase):
+    """Tests for PowerManager"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.slept = []
+
+        def sleep(ms):
+            self.slept.append(ms)
+            self.clock.now += ms
+
+        self.power = power.PowerManager(self.clock, sleep=sleep, min_sleep_ms=10, max_sleep_ms=1000)
+
+    def frame_task(self, draw_ms):
+        state = app.State()
+
+        def draw(state, now):
+            self.clock.now += draw_ms
+
+        return app.render_task(state, self.power, draw, frame_ms=100)
+
+    def test_sleeps_between_frames(self):
+        """Test the idle time between frames is spent in light sleep"""
+        run_for(self.clock, 950, self.frame_task(5), self.power.idle_task(lambda: False))
+        self.assertEqual(self.slept[:3], [95, 95, 95])
+        self.assertEqual(self.power.sleeps, 10)
+        self.assertAlmostEqual(self.power.duty_cycle(), 0.05, places=2)
+
+    def test_no_sleep_while_busy(self):
+        """Test nothing sleeps while a network call is in flight"""
+        run_for(self.clock, 1000, self.frame_task(5), self.power.idle_task(lambda: True))
+        self.assertEqual(self.slept, [])
+        self.assertEqual(self.power.duty_cycle(), 1.0)
+
+    def test_sleep_capped(self):
+        """Test a long wait is split into sleeps of at most max_sleep_ms"""
+        run_for(self.clock, 5000, self.power.sleep_ms(4500), self.power.idle_task(lambda: False))
+        self.assertEqual(self.slept, [1000, 1000, 1000, 1000, 500])
+
+    def test_short_wait_stays_awake(self):
+        """Test waits below min_sleep_ms do not sleep"""
+        run_for(self.clock, 100, self.frame_task(95), self.power.idle_task(lambda: False))
+        self.assertEqual(self.slept, [])
+
+    def test_on_wake(self):
+        """Test the wake callback runs after every sleep"""
+        woken = []
+        run_for(self.clock, 500, self.frame_task(0), self.power.idle_task(lambda: False, lambda: woken.append(1)))
+        self.assertEqual(len(woken), self.power.sleeps)
+
+    def test_next_deadline(self):
+        """Test the earliest sleeping task sets the next deadline"""
+        self.assertIsNone(self.power.next_deadline_ms())
+        seen = []
+
+        async def probe():
+            await self.clock.sleep_ms(50)
+            seen.append(self.power.next_deadline_ms())
+
+        run_for(self.clock, 100, self.power.sleep_ms(300), self.power.sleep_ms(120), self.power.sleep_ms(70), probe())
+        self.assertEqual(seen, [20])
+
+    def test_stats(self):
+        """Test the current estimate follows the duty cycle"""
+        run_for(self.clock, 950, self.frame_task(5), self.power.idle_task(lambda: False))
+        stats = self.power.stats()
+        self.assertEqual(stats["elapsed_ms"], 1000)
+        expected = stats["duty_cycle"] * power.AWAKE_MA + (1 - stats["duty_cycle"]) * power.ASLEEP_MA
+        self.assertAlmostEqual(stats["current_ma"], expected)
+        self.power.reset_stats()
+        self.assertEqual(self.power.sleeps, 0)
@@ -6,6 +6,7 @@ import unittest
 import sys
 import os
 import json
+import tempfile
 from unittest.mock import patch, MagicMock
 
 # Add the lib directory to the path so we can import modules
@@ -16,7 +17,8 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mock
 # Mock urequests before importing purpleair
 sys.modules['urequests'] = __import__('urequests')
 
-from purpleair import url_encode, aqiFromPM, aqiColor, calcAQI, fetch_sensor_data, GREEN, YELLOW, ORANGE, RED, PURPLE, MAROON, WHITE
+from purpleair import url_encode, aqiFromPM, aqiColor, calcAQI, fetch_sensor_data, PurpleAirClient, LocalSensorClient, MetadataCache, decode_sensor_batch, sensor_ids, GREEN, YELLOW, ORANGE, RED, PURPLE, MAROON, WHITE
+from standin_server import StandInServer
 
 class TestAqiColorFunction(unittest.TestCase):
     """Tests for the aqiColor function"""
@@ -387,4 +389,279 @@ class TestFetchSensorData(unittest.TestCase):
             fetch_sensor_data("test_api_key", 12345, ["pm2.5"])
         
         # Verify that an appropriate error message is part of the exception
-        self.assertIn("Network error", str(context.exception))
\ No newline at end of file
+        self.assertIn("Network error", str(context.exception))
+
+class TestPurpleAirClient(unittest.TestCase):
+    """Tests for PurpleAirClient against a local stand-in server"""
+
+    SENSOR = {"time_stamp": 1700000000, "sensor": {"sensor_index": 12345, "pm2.5": 10.5}}
+
+    def setUp(self):
+        self.server = StandInServer().__enter__()
+        self.server.routes["/v1/sensors/12345"] = (200, {}, json.dumps(self.SENSOR).encode())
+        self.client = PurpleAirClient("test_api_key", host="127.0.0.1", port=self.server.port, use_ssl=False)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def test_fetch_sensor_data(self):
+        """Test a request returns the decoded JSON and sends the API key"""
+        result = self.client.fetch_sensor_data(12345, ["pm2.5"])
+        self.assertEqual(result, self.SENSOR)
+        path, headers = self.server.requests[0]
+        self.assertEqual(path, "/v1/sensors/12345?fields=pm2%2e5")
+        self.assertEqual(headers["X-API-Key"], "test_api_key")
+
+    def test_connection_reused(self):
+        """Test repeated requests share one keep-alive connection"""
+        for _ in range(3):
+            self.client.fetch_sensor_data(12345, ["pm2.5"])
+        self.assertEqual(self.server.connections, 1)
+        self.assertEqual(self.client.connection.connects, 1)
+        self.assertEqual(self.client.connection.requests, 3)
+
+    def test_reconnect_after_server_close(self):
+        """Test a connection closed by the server is replaced transparently"""
+        self.server.drop_connections = True
+        for _ in range(3):
+            self.assertEqual(self.client.fetch_sensor_data(12345, ["pm2.5"]), self.SENSOR)
+        self.assertEqual(self.client.connection.connects, 3)
+
+    def test_chunked_response(self):
+        """Test chunked transfer encoding is decoded"""
+        self.server.chunked = True
+        self.assertEqual(self.client.fetch_sensor_data(12345, ["pm2.5"]), self.SENSOR)
+        self.assertEqual(self.client.fetch_sensor_data(12345, ["pm2.5"]), self.SENSOR)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_not_modified_without_length(self):
+        """Test a 304 without Content-Length ends at the headers and keeps the connection"""
+        self.server.routes["/v1/sensors/12345"] = (200, {"ETag": '"v1"'}, json.dumps(self.SENSOR).encode())
+        connection = self.client.connection
+        connection.timeout = 2
+        for _ in range(2):
+            status, headers, body = connection.request("GET", "/v1/sensors/12345", {"If-None-Match": '"v1"'})
+            self.assertEqual(status, 304)
+            self.assertNotIn("content-length", headers)
+            self.assertEqual(body, b"")
+        self.assertEqual(self.server.connections, 1)
+        self.assertLess(connection.timing["total"], 1000)
+
+    def test_timing(self):
+        """Test per-request timing is recorded for every phase"""
+        self.client.fetch_sensor_data(12345, ["pm2.5"])
+        timing = self.client.timing
+        for phase in ("connect", "tls", "request", "headers", "body", "total"):
+            self.assertGreaterEqual(timing[phase], 0)
+        self.assertEqual(timing["tls"], 0)
+
+    def test_api_error(self):
+        """Test an error status raises an exception"""
+        with self.assertRaises(Exception) as context:
+            self.client.fetch_sensor_data(99999, ["pm2.5"])
+        self.assertIn("API request failed with status code 404", str(context.exception))
+        self.assertEqual(self.client.connection.status, 404)
+
+    def test_network_error(self):
+        """Test a refused connection raises a network error"""
+        self.server.__exit__()
+        client = PurpleAirClient("test_api_key", host="127.0.0.1", port=self.server.port, use_ssl=False)
+        with self.assertRaises(Exception) as context:
+            client.fetch_sensor_data(12345, ["pm2.5"])
+        self.assertIn("Network error", str(context.exception))
+        self.assertIsNone(client.connection.status)
+
+    def test_fetch_sensor_fields(self):
+        """Test streaming extraction returns only the requested fields"""
+        fields = self.client.fetch_sensor_fields(12345, ["pm2.5", "last_seen"])
+        self.assertEqual(fields.get("pm2.5"), 10.5)
+        self.assertEqual(fields.get("time_stamp"), 1700000000)
+        self.assertIsNone(fields.get("last_seen"))
+        path, _ = self.server.requests[0]
+        self.assertEqual(path, "/v1/sensors/12345?fields=pm2%2e5%2clast%5fseen")
+
+    def test_fetch_sensor_fields_reuses_extractor(self):
+        """Test repeated calls reuse the same preallocated extractor"""
+        self.server.chunked = True
+        first = self.client.fetch_sensor_fields(12345, ["pm2.5"])
+        second = self.client.fetch_sensor_fields(12345, ["pm2.5"])
+        self.assertIs(first, second)
+        self.assertEqual(second.get("pm2.5"), 10.5)
+
+    def test_fetch_sensor_fields_api_error(self):
+        """Test an error status raises an exception with the API description"""
+        self.server.routes["/v1/sensors/1"] = (403, {}, b'{"error": "ApiKeyInvalidError", "description": "Bad key"}')
+        with self.assertRaises(Exception) as context:
+            self.client.fetch_sensor_fields(1, ["pm2.5"])
+        self.assertIn("status code 403: Bad key", str(context.exception))
+
+
+class TestMetadataCache(unittest.TestCase):
+    """Tests for MetadataCache against a local stand-in server"""
+
+    METADATA = {"time_stamp": 1700000000, "sensor": {"sensor_index": 12345, "name": "Back yard"}}
+    FIELDS = ["name", "latitude"]
+
+    def setUp(self):
+        self.server = StandInServer().__enter__()
+        self.server.routes["/v1/sensors/12345"] = (200, {"ETag": '"abc"'}, json.dumps(self.METADATA).encode())
+        self.client = PurpleAirClient("test_api_key", host="127.0.0.1", port=self.server.port, use_ssl=False)
+        self.tempdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tempdir.name, "metadata.json")
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+        self.tempdir.cleanup()
+
+    def test_load_without_file(self):
+        """Test a missing cache file loads nothing and is stale"""
+        cache = MetadataCache(self.path, 12345, self.FIELDS)
+        self.assertIsNone(cache.load())
+        self.assertTrue(cache.is_stale(0))
+
+    def test_refresh_persists_entry(self):
+        """Test a refresh is saved and served by a new cache without network I/O"""
+        cache = MetadataCache(self.path, 12345, self.FIELDS)
+        self.assertTrue(cache.refresh(self.client, 1700000000))
+        self.assertEqual(cache.data, self.METADATA)
+
+        reloaded = MetadataCache(self.path, 12345, self.FIELDS)
+        self.assertEqual(reloaded.load(), self.METADATA)
+        self.assertEqual(reloaded.etag, '"abc"')
+        self.assertEqual(len(self.server.requests), 1)
+
+    def test_ttl(self):
+        """Test the entry goes stale after the TTL in API time"""
+        cache = MetadataCache(self.path, 12345, self.FIELDS, ttl=3600)
+        cache.refresh(self.client, 1700000000)
+        self.assertFalse(cache.is_stale(1700003599))
+        self.assertTrue(cache.is_stale(1700003600))
+
+    def test_conditional_refresh(self):
+        """Test a refresh sends the ETag and a 304 only renews the entry"""
+        cache = MetadataCache(self.path, 12345, self.FIELDS)
+        cache.refresh(self.client, 1700000000)
+        self.assertFalse(cache.refresh(self.client, 1700090000))
+        _, headers = self.server.requests[1]
+        self.assertEqual(headers["If-None-Match"], '"abc"')
+        self.assertEqual(cache.data, self.METADATA)
+        self.assertEqual(cache.fetched, 1700090000)
+
+    def test_other_sensor_not_served(self):
+        """Test an entry for other fields or another sensor is ignored"""
+        MetadataCache(self.path, 12345, self.FIELDS).refresh(self.client, 1700000000)
+        self.assertIsNone(MetadataCache(self.path, 54321, self.FIELDS).load())
+        self.assertIsNone(MetadataCache(self.path, 12345, ["name"]).load())
+
+    def test_refresh_error(self):
+        """Test an API error raises and keeps the cached data"""
+        cache = MetadataCache(self.path, 99999, self.FIELDS)
+        with self.assertRaises(Exception) as context:
+            cache.refresh(self.client, 1700000000)
+        self.assertIn("API request failed", str(context.exception))
+        self.assertIsNone(cache.data)
+
+
+class TestSensorBatch(unittest.TestCase):
+    """Tests for batch fetches of several sensors"""
+
+    RESPONSE = {
+        "time_stamp": 1700000100,
+        "fields": ["sensor_index", "last_seen", "pm2.5"],
+        "data": [[111, 1700000000, 10.0], [222, 1700000011, 20.0], [333, 1700000020, None]],
+    }
+
+    def setUp(self):
+        self.server = StandInServer().__enter__()
+        self.server.routes["/v1/sensors"] = (200, {}, json.dumps(self.RESPONSE).encode())
+        self.client = PurpleAirClient("test_api_key", host="127.0.0.1", port=self.server.port, use_ssl=False)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def test_sensor_ids(self):
+        """Test configured sensor IDs are normalized to a list of strings"""
+        self.assertEqual(sensor_ids("123"), ["123"])
+        self.assertEqual(sensor_ids(123), ["123"])
+        self.assertEqual(sensor_ids(["1", 2]), ["1", "2"])
+
+    def test_decode_records(self):
+        """Test the columnar response becomes one tuple per sensor"""
+        batch = decode_sensor_batch(self.RESPONSE)
+        self.assertEqual(batch.fields, ("sensor_index", "last_seen", "pm2.5"))
+        self.assertEqual(batch.records[111], (111, 1700000000, 10.0))
+        self.assertEqual(batch.get_sensor("222", "pm2.5"), 20.0)
+        self.assertIsNone(batch.get_sensor(333, "pm2.5"))
+        self.assertIsNone(batch.get_sensor(444, "pm2.5"))
+
+    def test_decode_without_sensor_index(self):
+        """Test a response without sensor indices is rejected"""
+        with self.assertRaises(ValueError):
+            decode_sensor_batch({"fields": ["pm2.5"], "data": [[1.0]]})
+
+    def test_combined_values(self):
+        """Test get combines a field over the sensors that reported it"""
+        batch = decode_sensor_batch(self.RESPONSE)
+        self.assertEqual(batch.get("pm2.5"), 15.0)
+        self.assertEqual(batch.get("last_seen"), 1700000010)
+        self.assertEqual(batch.get("time_stamp"), 1700000100)
+        self.assertIsNone(batch.get("humidity"))
+
+    def test_fetch_sensors_single_request(self):
+        """Test several sensors are fetched with one show_only request"""
+        batch = self.client.fetch_sensors(["111", "222", "333"], ["last_seen", "pm2.5"])
+        self.assertEqual(len(batch.records), 3)
+        self.assertEqual(len(self.server.requests), 1)
+        path, _ = self.server.requests[0]
+        self.assertEqual(path, "/v1/sensors?fields=last%5fseen%2cpm2%2e5&show_only=111%2c222%2c333")
+
+
+class TestLocalSensorClient(unittest.TestCase):
+    """Tests for LocalSensorClient against a stand-in sensor serving example-local.json"""
+
+    def setUp(self):
+        with open(os.path.join(os.path.dirname(__file__), '..', 'example-local.json'), 'rb') as f:
+            payload = f.read()
+        self.server = StandInServer().__enter__()
+        self.server.routes["/json"] = (200, {}, payload)
+        self.client = LocalSensorClient("127.0.0.1", port=self.server.port)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.__exit__()
+
+    def test_fetch_sensor_fields(self):
+        """Test API field names are mapped onto the local payload"""
+        reading = self.client.fetch_sensor_fields(None, ["pm2.5", "pm2.5_a", "pm2.5_b", "temperature", "humidity", "last_seen"])
+        self.assertAlmostEqual(reading.get("pm2.5"), (13.98 + 13.90) / 2)
+        self.assertEqual(reading.get("pm2.5_a"), 13.98)
+        self.assertEqual(reading.get("pm2.5_b"), 13.90)
+        self.assertEqual(reading.get("temperature"), 78)
+        self.assertEqual(reading.get("humidity"), 42)
+        self.assertEqual(reading.get("last_seen"), 1756695878)
+        self.assertEqual(reading.get("time_stamp"), 1756695878)
+        self.assertIsNone(reading.get("confidence"))
+        self.assertEqual(self.server.requests[0][0], "/json")
+
+    def test_reading_reused(self):
+        """Test polls reuse the reading object and the connection"""
+        first = self.client.fetch_sensor_fields(None, ["pm2.5"])
+        second = self.client.fetch_sensor_fields(None, ["pm2.5"])
+        self.assertIs(first, second)
+        self.assertEqual(self.server.connections, 1)
+
+    def test_fetch_sensor_data(self):
+        """Test the dict form matches the API response shape"""
+        data = self.client.fetch_sensor_data(None, ["name", "latitude", "longitude"])
+        self.assertEqual(data["time_stamp"], 1756695878)
+        self.assertEqual(data["sensor"], {"name": "PurpleAir-126a", "latitude": 45.360802, "longitude": -121.934097})
+
+    def test_http_error(self):
+        """Test an error status raises an exception"""
+        self.server.routes.pop("/json")
+        with self.assertRaises(Exception) as context:
+            self.client.fetch_sensor_fields(None, ["pm2.5"])
+        self.assertIn("status code 404", str(context.exception))
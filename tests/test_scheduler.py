@@ -0,0 +1,134 @@
+"""
+Tests for scheduler.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+
+import scheduler
+from scheduler import PollScheduler
+from faketicks import patch_ticks
+
+def no_jitter(n):
+    return 0
+
+class SchedulerTestCase(unittest.TestCase):
+    """Runs each test with a fake ticks_ms"""
+
+    def setUp(self):
+        self.ticks = patch_ticks(self, 'scheduler.ticks_ms')
+
+class TestUploadAlignment(SchedulerTestCase):
+    """Tests for polls aligned to the sensor's uploads"""
+
+    def test_next_upload(self):
+        """Test the delay runs to the next upload plus the margin"""
+        s = PollScheduler(period_s=120, margin_s=15, randrange=no_jitter)
+        self.assertEqual(s.next_upload_ms(1000, 1000), 135000)
+        self.assertEqual(s.next_upload_ms(1100, 1000), 35000)
+        # Two uploads missed: the next period boundary
+        self.assertEqual(s.next_upload_ms(1250, 1000), 125000)
+
+    def test_fresh_data(self):
+        """Test a fresh reading schedules the poll just after the next upload"""
+        s = PollScheduler(period_s=120, margin_s=15, randrange=no_jitter)
+        self.assertEqual(s.on_success(1030, 1000), 105000)
+        self.assertEqual(s.on_success(1140, 1120), 115000)
+
+    def test_jitter_and_limits(self):
+        """Test the jitter is added and the delay is kept within min_s and max_s"""
+        s = PollScheduler(period_s=120, margin_s=15, jitter_s=5, min_s=30, randrange=lambda n: n - 1)
+        self.assertEqual(s.on_success(1030, 1000), 110000)
+        # The upload is due in 1 s, the poll still waits min_s
+        self.assertEqual(s.on_success(1239, 1120), 30000)
+        s = PollScheduler(period_s=3600, max_s=900, randrange=no_jitter)
+        self.assertEqual(s.on_success(1000, 1000), 900000)
+
+    def test_unknown_times(self):
+        """Test a response without timestamps waits one period"""
+        s = PollScheduler(period_s=120, jitter_s=0)
+        self.assertEqual(s.on_success(None, None), 120000)
+
+    def test_unchanged_backoff(self):
+        """Test repeated unchanged readings back off up to max_s"""
+        s = PollScheduler(period_s=120, margin_s=15, jitter_s=0, max_s=600, randrange=no_jitter)
+        s.on_success(1030, 1000)
+        delays = [s.on_success(t, 1000) for t in (1135, 1255, 1495, 1975)]
+        self.assertEqual(delays, [120000, 240000, 480000, 600000])
+        self.assertEqual(s.stale_polls, 4)
+        # A new reading goes back to the upload schedule
+        self.assertEqual(s.on_success(2000, 1990), 125000)
+        self.assertEqual(s.unchanged, 0)
+
+class TestErrors(SchedulerTestCase):
+    """Tests for the error backoff"""
+
+    def test_backoff_and_reset(self):
+        """Test failed polls back off exponentially and a success resets it"""
+        s = PollScheduler(retry_ms=15000, max_retry_ms=60000, randrange=no_jitter)
+        self.assertEqual([s.on_error() for _ in range(4)], [15000, 30000, 60000, 60000])
+        self.assertEqual(s.stats()["errors"], 4)
+        s.on_success(1000, 1000)
+        self.assertEqual(s.on_error(), 15000)
+
+class TestBudget(SchedulerTestCase):
+    """Tests for the daily API points budget"""
+
+    def test_no_budget(self):
+        """Test no limit applies without a budget"""
+        s = PollScheduler(points_per_poll=100)
+        for _ in range(10):
+            s.on_error()
+        self.assertEqual(s.budget_delay_ms(), 0)
+
+    def test_polls_stretched_to_budget(self):
+        """Test polls are spaced out once the burst allowance is spent"""
+        # 2400 points a day, 100 points burst, 10 points a poll: one poll per 6 minutes
+        s = PollScheduler(period_s=120, margin_s=15, jitter_s=0, max_s=3600,
+                          points_per_day=2400, points_per_poll=10, randrange=no_jitter)
+        delays = []
+        for i in range(30):
+            delay = s.on_success(1000 + i * 120, 1000 + i * 120)
+            delays.append(delay)
+            self.ticks.now += delay
+        self.assertEqual(delays[0], 135000)
+        self.assertGreater(delays[-1], 135000)
+        # Over the whole run the budget rate is respected, with the burst on top
+        spent = s.points_spent
+        allowed = self.ticks.now * 2400 / scheduler.DAY_MS + 100 + 10
+        self.assertLessEqual(spent, allowed)
+        self.assertEqual(s.stats()["polls"], 30)
+
+    def test_budget_refills(self):
+        """Test the budget allows polls again after waiting"""
+        s = PollScheduler(points_per_day=2400, points_per_poll=100)
+        s.on_error()
+        self.assertEqual(s.budget_delay_ms(), 3600001)
+        self.ticks.now += 3600001
+        self.assertEqual(s.budget_delay_ms(), 0)
+
+    def test_uncharged_errors(self):
+        """Test failures that never reached the API leave the budget alone"""
+        s = PollScheduler(points_per_day=2400, points_per_poll=100, randrange=no_jitter)
+        for _ in range(5):
+            s.on_error(charged=False)
+        self.assertEqual(s.budget_delay_ms(), 0)
+        self.assertEqual((s.stats()["points_spent"], s.stats()["errors"]), (0, 5))
+
+    def test_points_rate(self):
+        """Test the spending rate is extrapolated to a day"""
+        s = PollScheduler(points_per_poll=5)
+        s.on_error()
+        self.assertEqual(s.stats()["points_rate"], 0)
+        self.ticks.now = 3600000
+        s.on_error()
+        self.assertEqual(s.stats()["points_rate"], 240)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,51 @@
+"""
+Tests for trend.py module
+"""
+
+import unittest
+import sys
+import os
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+
+from trend import Trend
+
+class TestTrend(unittest.TestCase):
+    """Tests for Trend"""
+
+    def test_bucket_statistics(self):
+        """Test each bucket keeps its min, max and mean"""
+        trend = Trend(4, hours=4)
+        for timestamp, value in ((7200, 4.0), (7300, 10.0), (7400, 1.0), (10800, 3.0)):
+            self.assertTrue(trend.add(timestamp, value))
+        self.assertEqual(trend.column(3), (3.0, 3.0, 3.0))
+        self.assertEqual(trend.column(2), (1.0, 10.0, 5.0))
+        self.assertIsNone(trend.column(1))
+        self.assertEqual(trend.peak(), 10.0)
+
+    def test_old_buckets_expire(self):
+        """Test buckets older than the window are not shown and their slots are reused"""
+        trend = Trend(4, hours=4)
+        trend.add(3600, 50.0)
+        trend.add(5 * 3600, 2.0)
+        self.assertIsNone(trend.column(0))
+        self.assertEqual(trend.column(3), (2.0, 2.0, 2.0))
+        trend.add(6 * 3600, 1.0)
+        self.assertEqual(trend.column(2), (2.0, 2.0, 2.0))
+        self.assertEqual(trend.peak(), 2.0)
+
+    def test_ignored(self):
+        """Test old, missing and negative readings are ignored"""
+        trend = Trend()
+        self.assertIsNone(trend.column(15))
+        trend.add(1000, 5.0)
+        version = trend.version
+        self.assertFalse(trend.add(1000, 6.0))
+        self.assertFalse(trend.add(2000, None))
+        self.assertFalse(trend.add(2000, -1.0))
+        self.assertEqual(trend.version, version)
+        self.assertEqual(trend.bucket_s, 1800)
+
+if __name__ == "__main__":
+    unittest.main()
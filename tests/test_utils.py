@@ -9,7 +9,9 @@ import os
 # Add the lib directory to the path so we can import modules
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
 
-from utils import format_time
+import calendar
+
+from utils import format_time, epoch_seconds, parse_sensor_datetime, backoff_delay
 
 class TestFormatTime(unittest.TestCase):
     """Tests for the format_time function"""
@@ -45,4 +47,41 @@ class TestFormatTime(unittest.TestCase):
     def test_format_time_partial_tuple(self):
         """Test format_time with a partial tuple (should raise an error)"""
         with self.assertRaises(ValueError):
-            format_time((2025, 9, 11))
\ No newline at end of file
+            format_time((2025, 9, 11))
+
+
+class TestEpochSeconds(unittest.TestCase):
+    """Tests for the epoch_seconds and parse_sensor_datetime functions"""
+
+    def test_epoch_seconds_matches_timegm(self):
+        """Test against the host's UTC conversion, including leap days"""
+        for date in [(1970, 1, 1, 0, 0, 0), (2000, 2, 29, 1, 2, 3), (2024, 12, 31, 23, 59, 59), (2100, 3, 1, 0, 0, 0)]:
+            self.assertEqual(epoch_seconds(*date), calendar.timegm(date))
+
+    def test_parse_sensor_datetime(self):
+        """Test parsing the DateTime of a sensor's local JSON"""
+        self.assertEqual(parse_sensor_datetime("2025/09/01T03:04:38z"), 1756695878)
+
+    def test_parse_sensor_datetime_invalid(self):
+        """Test malformed timestamps raise ValueError"""
+        with self.assertRaises(ValueError):
+            parse_sensor_datetime("yesterday")
+
+class TestBackoffDelay(unittest.TestCase):
+    """Tests for backoff_delay"""
+
+    def test_doubles(self):
+        """Test the delay doubles with each attempt up to the limit"""
+        delays = [backoff_delay(n, 1000, 10000, lambda n: 0) for n in range(6)]
+        self.assertEqual(delays, [1000, 2000, 4000, 8000, 10000, 10000])
+
+    def test_jitter(self):
+        """Test the jitter adds up to half the delay, within the limit"""
+        self.assertEqual(backoff_delay(1, 1000, 10000, lambda n: n - 1), 3000)
+        self.assertEqual(backoff_delay(3, 1000, 10000, lambda n: n - 1), 10000)
+        for _ in range(50):
+            self.assertTrue(2000 <= backoff_delay(1, 1000, 10000) <= 3000)
+
+    def test_large_attempt(self):
+        """Test a long run of failures does not overflow the shift"""
+        self.assertEqual(backoff_delay(1000, 1000, 60000, lambda n: 0), 60000)
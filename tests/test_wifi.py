@@ -0,0 +1,209 @@
+"""
+Tests for wifi.py module
+"""
+
+import unittest
+import sys
+import os
+import tempfile
+
+# Add the lib directory to the path so we can import modules
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'lib')))
+# Add the tests/mocks directory to the path for mock imports
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), 'mocks')))
+
+# Mock network and config before importing wifi
+sys.modules['network'] = __import__('network')
+sys.modules['config'] = __import__('config')
+
+import network
+import wifi
+from faketicks import patch_ticks
+
+BSSID_NEAR = b'\x01\x02\x03\x04\x05\x06'
+BSSID_FAR = b'\x0a\x0b\x0c\x0d\x0e\x0f'
+
+class TestDoConnect(unittest.TestCase):
+    """Tests for do_connect with a cached access point"""
+
+    def setUp(self):
+        network.WLAN.reset()
+        self.wlan = network.WLAN(network.STA_IF)
+        self.wlan.networks = [
+            (b'TestNetwork', BSSID_FAR, 11, -80, 3, False),
+            (b'OtherNetwork', b'\x00' * 6, 1, -30, 3, False),
+            (b'TestNetwork', BSSID_NEAR, 6, -50, 3, False),
+        ]
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'wifi.json')
+
+    def tearDown(self):
+        self.dir.cleanup()
+        network.WLAN.reset()
+
+    def test_cold_connect_scans_and_caches(self):
+        """Test the first connection picks the strongest access point and caches it"""
+        self.assertTrue(wifi.do_connect(self.path))
+        self.assertEqual(self.wlan.connects, [('TestNetwork', 'TestPassword', {'bssid': BSSID_NEAR})])
+        cache = wifi.LinkCache(self.path)
+        self.assertTrue(cache.load('TestNetwork'))
+        self.assertEqual((cache.bssid, cache.channel), (BSSID_NEAR, 6))
+
+    def test_cached_connect_skips_scan(self):
+        """Test a reconnect goes straight to the cached access point"""
+        wifi.do_connect(self.path)
+        self.wlan.disconnect()
+        self.wlan.networks = []
+        self.assertTrue(wifi.do_connect(self.path))
+        self.assertEqual(len(self.wlan.connects), 2)
+        self.assertEqual(self.wlan.connects[1][2], {'bssid': BSSID_NEAR})
+
+    def test_fallback_to_scan(self):
+        """Test a failed targeted association falls back to a scan"""
+        wifi.do_connect(self.path)
+        self.wlan.disconnect()
+        # The cached access point is gone
+        self.wlan.networks = [(b'TestNetwork', BSSID_FAR, 11, -80, 3, False)]
+        self.wlan.accept = lambda ssid, key, kwargs: kwargs.get('bssid') == BSSID_FAR
+        self.assertTrue(wifi.do_connect(self.path))
+        self.assertEqual([c[2] for c in self.wlan.connects[1:]], [{'bssid': BSSID_NEAR}, {'bssid': BSSID_FAR}])
+        cache = wifi.LinkCache(self.path)
+        cache.load('TestNetwork')
+        self.assertEqual(cache.bssid, BSSID_FAR)
+
+    def test_not_found(self):
+        """Test a failed connection returns False"""
+        self.wlan.networks = []
+        self.wlan.accept = lambda ssid, key, kwargs: False
+        self.assertFalse(wifi.do_connect(self.path))
+        self.assertEqual(self.wlan.connects, [('TestNetwork', 'TestPassword', {})])
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_already_connected(self):
+        """Test nothing is done while connected"""
+        self.wlan._connected = True
+        self.assertTrue(wifi.do_connect(self.path))
+        self.assertEqual(self.wlan.connects, [])
+
+    def test_cache_other_ssid(self):
+        """Test an entry saved for another network is ignored"""
+        wifi.do_connect(self.path)
+        self.assertFalse(wifi.LinkCache(self.path).load('OtherNetwork'))
+
+class TestLinkSupervisor(unittest.TestCase):
+    """Tests for LinkSupervisor"""
+
+    def setUp(self):
+        network.WLAN.reset()
+        self.wlan = network.WLAN(network.STA_IF)
+        self.wlan.config(rssi=-60)
+        self.ticks = patch_ticks(self, 'wifi.ticks_ms')
+        self.rescans = []
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'wifi.json')
+        # Connected to the near access point
+        cache = wifi.LinkCache(self.path)
+        cache.ssid, cache.bssid, cache.channel = 'TestNetwork', BSSID_NEAR, 6
+        cache.save()
+
+        def connect(rescan=False):
+            self.rescans.append(rescan)
+            self.wlan.connect('TestNetwork', 'TestPassword')
+            return self.wlan.isconnected()
+
+        self.link = wifi.LinkSupervisor(connect, weak_rssi=-80, weak_checks=2, roam_interval_ms=60000,
+                                        cache_path=self.path, wlan=self.wlan)
+
+    def tearDown(self):
+        self.dir.cleanup()
+        network.WLAN.reset()
+
+    def test_uptime_and_drops(self):
+        """Test link periods are timed and drops counted"""
+        self.assertFalse(self.link.check())
+        self.assertTrue(self.link.recover())
+        self.assertTrue(self.link.check())
+        self.ticks.now = 60000
+        self.assertEqual(self.link.uptime_ms(), 60000)
+        self.wlan.disconnect()
+        self.assertFalse(self.link.check())
+        self.ticks.now = 70000
+        self.link.recover()
+        self.link.check()
+        self.ticks.now = 75000
+        stats = self.link.stats()
+        self.assertEqual(stats["uptime_ms"], 5000)
+        self.assertEqual(stats["total_uptime_ms"], 65000)
+        self.assertEqual((stats["connects"], stats["reconnects"], stats["drops"]), (2, 1, 1))
+        self.assertEqual(stats["rssi"], -60)
+
+    def test_weak_signal_rescans(self):
+        """Test a persistently weak signal moves to a stronger access point"""
+        self.wlan.networks = [
+            (b'TestNetwork', BSSID_NEAR, 6, -90, 3, False),
+            (b'TestNetwork', BSSID_FAR, 11, -70, 3, False),
+        ]
+        self.link.recover()
+        self.wlan.config(rssi=-90)
+        self.assertTrue(self.link.check())
+        self.assertFalse(self.link.check())
+        self.assertTrue(self.link.recover())
+        self.assertEqual(self.rescans, [False, True])
+        self.assertEqual(self.link.roams, 1)
+        self.assertEqual(self.link.drops, 0)
+
+    def test_single_weak_access_point_kept(self):
+        """Test a weak link is kept when no other access point is stronger, and scans are rate limited"""
+        self.wlan.networks = [(b'TestNetwork', BSSID_NEAR, 6, -88, 3, False)]
+        self.link.recover()
+        self.wlan.config(rssi=-90)
+        disconnects = []
+        self.wlan.disconnect = lambda: disconnects.append(self.ticks.now)
+        for _ in range(10):
+            self.ticks.now += 15000
+            # Like app.wifi_task: recover whenever the check fails
+            if not self.link.check():
+                self.assertTrue(self.link.recover())
+        self.assertEqual(disconnects, [])
+        self.assertTrue(self.wlan.isconnected())
+        self.assertEqual(self.rescans, [False])
+        self.assertEqual(self.link.roams, 0)
+        # Weak for 150 seconds, scanned at most once a minute
+        self.assertEqual(self.link.roam_scans, 3)
+
+    def test_check_does_not_scan(self):
+        """Test the scan is left to recover, check never blocks on it"""
+        self.wlan.networks = [(b'TestNetwork', BSSID_FAR, 11, -60, 3, False)]
+        scans = []
+        scan = self.wlan.scan
+        self.wlan.scan = lambda: scans.append(1) or scan()
+        self.link.recover()
+        self.wlan.config(rssi=-90)
+        self.link.check()
+        self.assertFalse(self.link.check())
+        self.assertEqual(scans, [])
+        self.link.recover()
+        self.assertEqual(scans, [1])
+
+    def test_current_access_point_not_roamed_to(self):
+        """Test the current access point is not a reason to roam, however strong it scans"""
+        self.wlan.networks = [(b'TestNetwork', BSSID_NEAR, 6, -60, 3, False)]
+        self.link.recover()
+        self.wlan.config(rssi=-90)
+        self.link.check()
+        self.assertFalse(self.link.check())
+        self.assertTrue(self.link.recover())
+        self.assertTrue(self.link.check())
+        self.assertEqual(self.link.roam_scans, 1)
+        self.assertEqual(self.link.roams, 0)
+        self.assertEqual(self.rescans, [False])
+
+    def test_brief_weak_signal(self):
+        """Test a single weak reading does not drop the link"""
+        self.link.recover()
+        self.wlan.config(rssi=-90)
+        self.link.check()
+        self.wlan.config(rssi=-70)
+        self.assertTrue(self.link.check())
+        self.wlan.config(rssi=-90)
+        self.assertTrue(self.link.check())
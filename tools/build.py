@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Build the device image
+
+Cross-compiles every module in lib/ to .mpy bytecode with mpy-cross, so the
+ESP32 loads ready-made bytecode instead of compiling the sources at every
+boot. Font modules are first rewritten with their glyphs as precompiled
+bytes literals (see BaseFont.GLYPHS) in place of the string-art tables.
+
+main.py and boot.py stay as source: MicroPython only runs those two by file
+name. config.py is the user's own and is not part of the build.
+
+Run from the project root with:
+    python tools/build.py            # writes build/
+    mpremote rm -r :lib + cp -r build/lib : + cp boot.py main.py config.py : + reset
+
+Remove the old lib/ on the device first, as a .py file is imported in
+preference to the .mpy next to it.
+"""
+
+import argparse
+import importlib
+import os
+import shutil
+import subprocess
+import sys
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+LIB = os.path.join(ROOT, 'lib')
+
+FONT_PACKAGE = 'pixelfonts.fonts'
+
+def font_classes(module):
+    """Return the BaseFont subclasses with a FONT table defined in `module`"""
+    from pixelfonts.basefont import BaseFont
+    classes = []
+    for value in vars(module).values():
+        if (isinstance(value, type) and issubclass(value, BaseFont) and value is not BaseFont
+                and value.__module__ == module.__name__ and 'FONT' in vars(value)):
+            classes.append(value)
+    return classes
+
+def font_source(module):
+    """
+    Return the source of a font module with precompiled glyphs.
+
+    Args:
+        module: Imported font module
+
+    Returns:
+        str: Python source defining the same classes with GLYPHS instead of FONT
+    """
+    lines = [
+        "# Generated by tools/build.py from %s.py, do not edit" % module.__name__.rsplit('.', 1)[-1],
+        "from ..basefont import BaseFont",
+    ]
+    for cls in font_classes(module):
+        lines += [
+            "",
+            "class %s(BaseFont):" % cls.__name__,
+            "    WIDTH = %d" % cls.WIDTH,
+            "    HEIGHT = %d" % cls.HEIGHT,
+            "    GLYPHS = {",
+        ]
+        for char, columns in cls.glyphs().items():
+            lines.append("        %r: %r," % (char, bytes(columns)))
+        lines.append("    }")
+    return "\n".join(lines) + "\n"
+
+def module_name(path):
+    """Return the dotted module name of a source file under lib/"""
+    relative = os.path.relpath(path, LIB)[:-3]
+    return relative.replace(os.sep, '.')
+
+def sources():
+    """Yield every .py file under lib/"""
+    for directory, dirs, files in os.walk(LIB):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        for name in sorted(files):
+            if name.endswith('.py'):
+                yield os.path.join(directory, name)
+
+def compile_module(mpy_cross, source, target, arch, name):
+    """Run mpy-cross on one file"""
+    command = [mpy_cross, '-march=' + arch, '-s', name, '-o', target, source]
+    subprocess.run(command, check=True)
+
+def build(out, arch='xtensawin', mpy_cross='mpy-cross'):
+    """
+    Build the device image into `out`.
+
+    Returns:
+        list: (module, source bytes, mpy bytes) for each compiled module
+
+    Raises:
+        FileNotFoundError: If mpy-cross cannot be found
+    """
+    if shutil.which(mpy_cross) is None:
+        raise FileNotFoundError("mpy-cross not found, install it with: pip install -r requirements-dev.txt")
+    if LIB not in sys.path:
+        sys.path.insert(0, LIB)
+
+    shutil.rmtree(out, ignore_errors=True)
+    generated = os.path.join(out, 'generated')
+    report = []
+    for source in sources():
+        name = module_name(source)
+        relative = os.path.relpath(source, ROOT)
+        if name.startswith(FONT_PACKAGE + '.'):
+            module = importlib.import_module(name)
+            if font_classes(module):
+                text = font_source(module)
+                source = os.path.join(generated, relative)
+                os.makedirs(os.path.dirname(source), exist_ok=True)
+                with open(source, 'w') as f:
+                    f.write(text)
+        target = os.path.join(out, relative[:-3] + '.mpy')
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        compile_module(mpy_cross, source, target, arch, relative)
+        report.append((name, os.path.getsize(os.path.join(ROOT, relative)), os.path.getsize(target)))
+    shutil.rmtree(generated)
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--out', default=os.path.join(ROOT, 'build'), help='output directory')
+    parser.add_argument('--arch', default='xtensawin', help='mpy-cross -march value (ESP32: xtensawin)')
+    parser.add_argument('--mpy-cross', default='mpy-cross', help='mpy-cross executable')
+    args = parser.parse_args()
+
+    report = build(args.out, args.arch, args.mpy_cross)
+    total_source = total_mpy = 0
+    for name, source_size, mpy_size in report:
+        print(f"{name:28s} {source_size:8d} B -> {mpy_size:7d} B")
+        total_source += source_size
+        total_mpy += mpy_size
+    print(f"{'total':28s} {total_source:8d} B -> {total_mpy:7d} B")
+    print(f"Built {len(report)} modules in {args.out}")
+
+if __name__ == '__main__':
+    main()